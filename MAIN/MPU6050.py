@@ -4,8 +4,18 @@
 # and https://github.com/CoreElectronics/CE-PiicoDev-MPU6050-MicroPython-Module
 
 from math import sqrt, atan2
-from machine import Pin, SoftI2C
-from time import sleep_ms
+try:
+    from machine import Pin, SoftI2C
+except ImportError:
+    # Host CPython (benchmarks / simulator): pass an I2C object explicitly
+    Pin = SoftI2C = None
+try:
+    from time import sleep_ms
+except ImportError:
+    from time import sleep
+
+    def sleep_ms(ms):
+        sleep(ms / 1000)
 
 error_msg = "\nError \n"
 i2c_err_str = "ESP32 could not communicate with module at address 0x{:02X}, check wiring"
@@ -47,8 +57,44 @@ _GYRO_XOUT0 = 0x43
 _ACCEL_CONFIG = 0x1C
 _GYRO_CONFIG = 0x1B
 
+_SMPLRT_DIV = 0x19
+_CONFIG = 0x1A
+_FIFO_EN = 0x23
+_INT_ENABLE = 0x38
+_INT_STATUS = 0x3A
+_USER_CTRL = 0x6A
+_FIFO_COUNTH = 0x72
+_FIFO_R_W = 0x74
+
+# FIFO_EN register bits
+_FIFO_EN_XG = 0x40
+_FIFO_EN_YG = 0x20
+_FIFO_EN_ZG = 0x10
+_FIFO_EN_ACCEL = 0x08
+
+# USER_CTRL / INT_ENABLE / INT_STATUS bits
+_USER_CTRL_FIFO_EN = 0x40
+_USER_CTRL_FIFO_RESET = 0x04
+_INT_FIFO_OFLOW = 0x10
+
+# Digital low pass filter (CONFIG register, DLPF_CFG), accel/gyro bandwidth
+_DLPF_260HZ = 0x00  # DLPF off: gyro output rate is 8 kHz
+_DLPF_184HZ = 0x01
+_DLPF_94HZ = 0x02
+_DLPF_44HZ = 0x03
+_DLPF_21HZ = 0x04
+_DLPF_10HZ = 0x05
+_DLPF_5HZ = 0x06
+
+_FIFO_SIZE = 1024
+# Frames pulled from the FIFO per I2C transaction (12 bytes each with accel+gyro)
+_FIFO_CHUNK_FRAMES = 32
+
 _maxFails = 3
 
+# ACCEL_XOUT_H .. GYRO_ZOUT_L: accel(6) + temp(2) + gyro(6) contiguous bytes
+_BURST_LEN = 14
+
 # Address
 _MPU6050_ADDRESS = 0x68
 
@@ -58,10 +104,28 @@ def signedIntFromBytes(x, endian="big"):
         return -((65535 - y) + 1)
     else:
         return y
+
+def _accel_scaler(accel_range):
+    if accel_range == _ACC_RNG_4G:
+        return _ACC_SCLR_4G
+    elif accel_range == _ACC_RNG_8G:
+        return _ACC_SCLR_8G
+    elif accel_range == _ACC_RNG_16G:
+        return _ACC_SCLR_16G
+    return _ACC_SCLR_2G
+
+def _gyro_scaler(gyro_range):
+    if gyro_range == _GYR_RNG_500DEG:
+        return _GYR_SCLR_500DEG
+    elif gyro_range == _GYR_RNG_1000DEG:
+        return _GYR_SCLR_1000DEG
+    elif gyro_range == _GYR_RNG_2000DEG:
+        return _GYR_SCLR_2000DEG
+    return _GYR_SCLR_250DEG
     
 
 class MPU6050(object):     
-    def __init__(self, bus=None, freq=None, sda=None, scl=None, addr=_MPU6050_ADDRESS):
+    def __init__(self, bus=None, freq=None, sda=None, scl=None, addr=_MPU6050_ADDRESS, i2c=None):
         # Checks any erorr would happen with I2C communication protocol.
         self._failCount = 0
         self._terminatingFailCount = 0
@@ -70,7 +134,10 @@ class MPU6050(object):
         # Pin assignment:
         # SCL -> GPIO 22
         # SDA -> GPIO 21
-        self.i2c = SoftI2C(scl=Pin(22), sda=Pin(21), freq=100000)
+        # An already configured bus (or a fake one on the host) can be passed as i2c.
+        if i2c is None:
+            i2c = SoftI2C(scl=Pin(22), sda=Pin(21), freq=100000)
+        self.i2c = i2c
         
         # Initializing the I2C method for ESP8266
         # Pin assignment:
@@ -87,14 +154,29 @@ class MPU6050(object):
             print(i2c_err_str.format(self.addr))
             print(error_msg)
             raise e
+        # Reusable buffer for burst reads, so the hot path does not allocate
+        self._burst = bytearray(_BURST_LEN)
+        self._burst_mv = memoryview(self._burst)
         self._accel_range = self.get_accel_range(True)
         self._gyro_range = self.get_gyro_range(True)
+        self._acc_scaler = _accel_scaler(self._accel_range)
+        self._gyr_scaler = _gyro_scaler(self._gyro_range)
+
+        # FIFO streaming state, see start_fifo() / drain_fifo()
+        self._fifo_accel = False
+        self._fifo_gyro = False
+        self._fifo_frame_len = 0
+        self._fifo_buf = bytearray(_FIFO_CHUNK_FRAMES * 12)
+        self._fifo_mv = memoryview(self._fifo_buf)
+        self._fifo_out = [float("NaN")] * 6
+        self._fifoOverflowCount = 0
+        self.fifo_overflow = False
+        self.fifo_frames_drained = 0
 
     def _readData(self, register):
         failCount = 0
         while failCount < _maxFails:
             try:
-                sleep_ms(10)
                 data = self.i2c.readfrom_mem(self.addr, register, 6)
                 break
             except:
@@ -104,6 +186,8 @@ class MPU6050(object):
                     self._terminatingFailCount = self._terminatingFailCount + 1
                     print(i2c_err_str.format(self.addr))
                     return {"x": float("NaN"), "y": float("NaN"), "z": float("NaN")} 
+                # Only back off when the bus actually failed
+                sleep_ms(10)
         x = signedIntFromBytes(data[0:2])
         y = signedIntFromBytes(data[2:4])
         z = signedIntFromBytes(data[4:6])
@@ -126,6 +210,7 @@ class MPU6050(object):
     def set_accel_range(self, accel_range):
         self.i2c.writeto_mem(self.addr, _ACCEL_CONFIG, bytes([accel_range]))
         self._accel_range = accel_range
+        self._acc_scaler = _accel_scaler(accel_range)
 
     # Gets the range the accelerometer is set to.
     # raw=True: Returns raw value from the ACCEL_CONFIG register
@@ -185,6 +270,7 @@ class MPU6050(object):
     def set_gyro_range(self, gyro_range):
         self.i2c.writeto_mem(self.addr, _GYRO_CONFIG, bytes([gyro_range]))
         self._gyro_range = gyro_range
+        self._gyr_scaler = _gyro_scaler(gyro_range)
 
     # Gets the range the gyroscope is set to.
     # raw=True: return raw value from GYRO_CONFIG register
@@ -231,9 +317,192 @@ class MPU6050(object):
 
         return {"x": x, "y": y, "z": z}
 
-    def read_angle(self): # returns radians. orientation matches silkscreen
+    # Returns radians. orientation matches silkscreen. Same tilt formulas as
+    # main.py and orientation.accel_angles; use orientation.py to fuse the gyro.
+    def read_angle(self):
         a=self.read_accel_data()
-        x=atan2(a["y"],a["z"])
-        y=atan2(-a["x"],a["z"])
+        x=atan2(a["y"],sqrt(a["x"]*a["x"]+a["z"]*a["z"]))
+        y=atan2(-a["x"],sqrt(a["y"]*a["y"]+a["z"]*a["z"]))
         return {"x": x, "y": y}
 
+    # Reads the 14 accel/temp/gyro registers in a single I2C transaction.
+    # buf: bytearray or memoryview of 14 bytes (big-endian int16 registers).
+    # Returns True on success, False when the bus kept failing.
+    def read_raw_into(self, buf):
+        failCount = 0
+        while failCount < _maxFails:
+            try:
+                self.i2c.readfrom_mem_into(self.addr, _ACCEL_XOUT0, buf)
+                return True
+            except:
+                failCount = failCount + 1
+                self._failCount = self._failCount + 1
+                if failCount >= _maxFails:
+                    self._terminatingFailCount = self._terminatingFailCount + 1
+                    print(i2c_err_str.format(self.addr))
+                    return False
+                sleep_ms(10)
+        return False
+
+    # Reads accel, temperature and gyro in one burst and decodes them into out.
+    # out: mutable sequence of 7 items (list or array('f')), reused between calls.
+    # Layout: [AcX, AcY, AcZ, Temp, GyX, GyY, GyZ] in g or m/s^2 (g=False), degC, deg/s.
+    # Returns out; every value is NaN when the read failed.
+    def read_all_into(self, out, g=False):
+        b = self._burst
+        if not self.read_raw_into(self._burst_mv):
+            nan = float("NaN")
+            for i in range(7):
+                out[i] = nan
+            return out
+        acc = self._acc_scaler if g else self._acc_scaler / _GRAVITIY_MS2
+        gyr = self._gyr_scaler
+        for i in range(7):
+            v = (b[2 * i] << 8) | b[2 * i + 1]
+            if v & 0x8000:
+                v -= 0x10000
+            if i < 3:
+                out[i] = v / acc
+            elif i == 3:
+                out[i] = (v / 340) + 36.53
+            else:
+                out[i] = v / gyr
+        return out
+
+    # Same as read_all_into but returns a new tuple
+    # (AcX, AcY, AcZ, Temp, GyX, GyY, GyZ).
+    def read_all(self, g=False):
+        return tuple(self.read_all_into([0.0] * 7, g))
+
+    def _read_register(self, register):
+        return self.i2c.readfrom_mem(self.addr, register, 1)[0]
+
+    def _write_register(self, register, value):
+        self.i2c.writeto_mem(self.addr, register, bytes([value]))
+
+    # Sets the digital low pass filter (CONFIG register).
+    # dlpf : one of the pre-defined _DLPF_* values.
+    def set_dlpf(self, dlpf):
+        self._write_register(_CONFIG, dlpf & 0x07)
+
+    def get_dlpf(self):
+        return self._read_register(_CONFIG) & 0x07
+
+    # Sets SMPLRT_DIV. Sample rate = gyro output rate / (1 + divider), where the
+    # gyro output rate is 8 kHz with the DLPF off and 1 kHz otherwise.
+    def set_sample_rate_divider(self, divider):
+        self._write_register(_SMPLRT_DIV, divider & 0xFF)
+
+    # Configures DLPF and SMPLRT_DIV for the closest rate to rate_hz.
+    # The accelerometer only updates at 1 kHz, so keep rate_hz <= 1000.
+    # Returns the actual sample rate in Hz.
+    def set_sample_rate(self, rate_hz, dlpf=_DLPF_184HZ):
+        self.set_dlpf(dlpf)
+        base = 8000 if dlpf in (_DLPF_260HZ, 0x07) else 1000
+        divider = int(base / rate_hz + 0.5) - 1
+        if divider < 0:
+            divider = 0
+        elif divider > 255:
+            divider = 255
+        self.set_sample_rate_divider(divider)
+        return base / (1 + divider)
+
+    # Empties the FIFO and clears a pending overflow.
+    def reset_fifo(self):
+        user_ctrl = _USER_CTRL_FIFO_EN if self._fifo_frame_len else 0
+        self._write_register(_USER_CTRL, user_ctrl | _USER_CTRL_FIFO_RESET)
+        self._read_register(_INT_STATUS)
+
+    # Starts queueing accel and/or gyro frames in the on-chip FIFO at the rate
+    # set with set_sample_rate(). Frames are pulled with drain_fifo().
+    def start_fifo(self, accel=True, gyro=True):
+        mask = 0
+        if accel:
+            mask |= _FIFO_EN_ACCEL
+        if gyro:
+            mask |= _FIFO_EN_XG | _FIFO_EN_YG | _FIFO_EN_ZG
+        self._fifo_accel = accel
+        self._fifo_gyro = gyro
+        self._fifo_frame_len = (6 if accel else 0) + (6 if gyro else 0)
+        for i in range(6):
+            self._fifo_out[i] = float("NaN")
+        self._write_register(_FIFO_EN, 0)
+        self._write_register(_USER_CTRL, _USER_CTRL_FIFO_RESET)
+        self._write_register(_INT_ENABLE, _INT_FIFO_OFLOW)
+        self._write_register(_FIFO_EN, mask)
+        self._write_register(_USER_CTRL, _USER_CTRL_FIFO_EN)
+        self._read_register(_INT_STATUS)
+
+    def stop_fifo(self):
+        self._write_register(_FIFO_EN, 0)
+        self._write_register(_USER_CTRL, _USER_CTRL_FIFO_RESET)
+        self._fifo_frame_len = 0
+
+    # Returns the number of bytes queued in the FIFO.
+    def fifo_count(self):
+        data = self.i2c.readfrom_mem(self.addr, _FIFO_COUNTH, 2)
+        return (data[0] << 8) | data[1]
+
+    def _read_fifo_into(self, buf):
+        failCount = 0
+        while failCount < _maxFails:
+            try:
+                self.i2c.readfrom_mem_into(self.addr, _FIFO_R_W, buf)
+                return True
+            except:
+                failCount = failCount + 1
+                self._failCount = self._failCount + 1
+                if failCount >= _maxFails:
+                    self._terminatingFailCount = self._terminatingFailCount + 1
+                    print(i2c_err_str.format(self.addr))
+                    return False
+                sleep_ms(10)
+        return False
+
+    # Generator that yields every frame queued in the FIFO, read in bulk.
+    # Each frame is the same reused list [AcX, AcY, AcZ, GyX, GyY, GyZ] in
+    # g or m/s^2 (g=False) and deg/s; channels not in the FIFO stay NaN.
+    # Copy the values if they must outlive the next iteration.
+    # Once exhausted, fifo_frames_drained holds the frames yielded by this call
+    # and fifo_overflow tells whether the FIFO had overflowed (it is then reset
+    # and its misaligned contents discarded).
+    def drain_fifo(self, g=False, max_frames=None):
+        self.fifo_frames_drained = 0
+        self.fifo_overflow = False
+        frame = self._fifo_frame_len
+        if frame == 0:
+            return
+        if self._read_register(_INT_STATUS) & _INT_FIFO_OFLOW:
+            self.fifo_overflow = True
+            self._fifoOverflowCount = self._fifoOverflowCount + 1
+            self.reset_fifo()
+            return
+
+        frames = self.fifo_count() // frame
+        if max_frames is not None and frames > max_frames:
+            frames = max_frames
+        acc = self._acc_scaler if g else self._acc_scaler / _GRAVITIY_MS2
+        gyr = self._gyr_scaler
+        # Channel index in out for each int16 of a frame (accel first, then gyro)
+        first = 0 if self._fifo_accel else 3
+        words = frame // 2
+        b = self._fifo_buf
+        out = self._fifo_out
+        chunk = len(b) // frame
+
+        while frames > 0:
+            n = frames if frames < chunk else chunk
+            if not self._read_fifo_into(self._fifo_mv[:n * frame]):
+                return
+            for f in range(n):
+                base = f * frame
+                for w in range(words):
+                    i = base + 2 * w
+                    v = (b[i] << 8) | b[i + 1]
+                    if v & 0x8000:
+                        v -= 0x10000
+                    ch = first + w
+                    out[ch] = v / acc if ch < 3 else v / gyr
+                self.fifo_frames_drained = self.fifo_frames_drained + 1
+                yield out
+            frames -= n
@@ -0,0 +1,122 @@
+# Almacenamiento temporal de muestras en el ESP32 mientras no hay cliente.
+#
+# Las tramas (protocol.py) se guardan primero en un buffer circular en RAM;
+# cuando se llena, su contenido se vuelca de una vez al final de un archivo
+# en la flash. Al leer se entregan primero las del archivo (las más antiguas)
+# y después las de la RAM, así el orden de seq se conserva. Cuando se ha
+# leído todo, el archivo se borra.
+#
+# Funciona en MicroPython y en CPython.
+
+import os
+
+from ring import FrameRing
+
+
+class Backlog:
+    """
+    Cola FIFO de tramas: `ram_frames` en RAM y hasta `max_file_bytes` en el
+    archivo `path`. Si la flash también se llena, se descartan las tramas de
+    la RAM para seguir guardando las nuevas; se cuentan en `dropped` (el
+    hueco queda en la secuencia).
+    """
+
+    def __init__(self, ram_frames, frame_size, path, max_file_bytes):
+        self.ram = FrameRing(ram_frames, frame_size)
+        self.frame_size = frame_size
+        self.path = path
+        self.max_file_bytes = max_file_bytes - max_file_bytes % frame_size
+        self.file_written = 0  # Bytes escritos en el archivo
+        self.file_read = 0     # Bytes del archivo ya entregados
+        self.stored = 0        # Tramas guardadas desde el arranque
+        self.delivered = 0     # Tramas entregadas desde el arranque
+        self.spills = 0        # Volcados de la RAM a la flash
+        self.dropped = 0
+        self._remove_file()    # Lo que quedara de un arranque anterior ya no encaja con seq
+
+    def __len__(self):
+        return (self.file_written - self.file_read) // self.frame_size + len(self.ram)
+
+    def add(self, frames, n):
+        """Guarda n tramas contiguas (p. ej. la vista devuelta por FrameRing.peek)."""
+        size = self.frame_size
+        for i in range(n):
+            if self.ram.free() == 0:
+                self._spill()
+            if not self.ram.push(frames[i * size:(i + 1) * size]):
+                self.dropped += 1
+                continue
+            self.stored += 1
+
+    def _spill(self):
+        # Vuelca toda la RAM al final del archivo; lo que no quepa se pierde
+        ram = self.ram
+        room = (self.max_file_bytes - self.file_written) // self.frame_size
+        if room <= 0:
+            # Flash llena: se descarta lo más antiguo de la RAM para seguir guardando lo nuevo
+            n = len(ram)
+            ram.consume(n, sent=False)
+            self.dropped += n
+            return
+        with open(self.path, "ab") as file:
+            pending = min(len(ram), room)
+            while pending > 0:
+                chunk, n = ram.peek(pending)
+                file.write(chunk)
+                ram.consume(n)
+                self.file_written += n * self.frame_size
+                pending -= n
+        self.spills += 1
+
+    def peek_into(self, buf):
+        """
+        Copia en buf (bytearray/memoryview) las tramas más antiguas que quepan,
+        sin darlas por entregadas: eso lo hace consume() cuando se han enviado.
+        Devuelve el número de tramas copiadas. Solo toma del archivo o, si está
+        vacío, de la RAM, así un volcado entre medias no cambia cuáles son las
+        más antiguas.
+        """
+        size = self.frame_size
+        max_frames = len(buf) // size
+        if self.file_read < self.file_written:
+            with open(self.path, "rb") as file:
+                file.seek(self.file_read)
+                want = min(max_frames, (self.file_written - self.file_read) // size)
+                got = file.readinto(memoryview(buf)[:want * size])
+            return got // size
+        if max_frames == 0 or len(self.ram) == 0:
+            return 0
+        chunk, n = self.ram.peek(max_frames)
+        buf[0:n * size] = chunk
+        return n
+
+    def consume(self, n):
+        """Da por entregadas las n tramas más antiguas (las de peek_into)."""
+        size = self.frame_size
+        in_file = min(n, (self.file_written - self.file_read) // size)
+        if in_file:
+            self.file_read += in_file * size
+            if self.file_read >= self.file_written:
+                self._remove_file()
+        in_ram = min(n - in_file, len(self.ram))
+        if in_ram:
+            self.ram.consume(in_ram)
+        self.delivered += in_file + in_ram
+
+    def read_into(self, buf):
+        """peek_into() y consume() a la vez. Devuelve el número de tramas copiadas."""
+        n = self.peek_into(buf)
+        self.consume(n)
+        return n
+
+    def _remove_file(self):
+        self.file_written = 0
+        self.file_read = 0
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def stats(self):
+        return {"pending": len(self), "in_flash": (self.file_written - self.file_read) // self.frame_size,
+                "stored": self.stored, "delivered": self.delivered, "spills": self.spills, "dropped": self.dropped}
@@ -0,0 +1,95 @@
+# Carga del colector asyncio con muchos dispositivos simulados en un solo núcleo.
+#
+# Levanta N servidores locales que imitan al ESP32 (la mitad en texto y la
+# mitad en binario, a RATE_HZ muestras/s cada uno, enviando por lotes como
+# main.py) y los captura con collector.Collector durante unos segundos,
+# grabando a disco. Imprime las muestras recibidas y el uso de CPU.
+#
+# Uso (desde MAIN/): python benchmarks/bench_collector.py [dispositivos] [segundos] [Hz]
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import protocol
+from collector import Collector, Device, RecorderSink
+
+BATCH_INTERVAL_S = 0.1
+TEXT_LINE = ("Aceleración (m/s²) -> X: 0.123 Y: -0.456 Z: 9.789 | "
+             "Ángulos (grados) -> X: 1.2 Y: -3.4 Z: 5.6\n").encode("utf-8")
+
+
+def text_device(rate_hz):
+    async def serve(reader, writer):
+        per_batch = max(1, int(rate_hz * BATCH_INTERVAL_S))
+        try:
+            while True:
+                writer.write(TEXT_LINE * per_batch)
+                await writer.drain()
+                await asyncio.sleep(BATCH_INTERVAL_S)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+    return serve
+
+
+def binary_device(rate_hz):
+    async def serve(reader, writer):
+        per_batch = max(1, int(rate_hz * BATCH_INTERVAL_S))
+        raw = bytearray(14)
+        raw[4] = 0x40  # AcZ = 1 g con el rango de ±2 g
+        frames = bytearray(per_batch * protocol.FRAME_SIZE)
+        seq = 0
+        try:
+            writer.write(protocol.pack_header(0, 0, 1000000 // rate_hz))
+            while True:
+                for i in range(per_batch):
+                    protocol.pack_frame_into(frames, i * protocol.FRAME_SIZE, seq, seq * 1000000 // rate_hz, raw, 0, 0)
+                    seq += 1
+                writer.write(bytes(frames))
+                await writer.drain()
+                await asyncio.sleep(BATCH_INTERVAL_S)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+    return serve
+
+
+async def run(n_devices, seconds, rate_hz):
+    servers = []
+    devices = []
+    for i in range(n_devices):
+        handler = text_device(rate_hz) if i % 2 == 0 else binary_device(rate_hz)
+        server = await asyncio.start_server(handler, "127.0.0.1", 0)
+        servers.append(server)
+        devices.append(Device(f"dev{i:02d}", "127.0.0.1", server.sockets[0].getsockname()[1]))
+
+    directory = tempfile.mkdtemp(prefix="bench_collector_")
+    collector = Collector(devices, [RecorderSink(directory)])
+    cpu0 = time.process_time()
+    t0 = time.perf_counter()
+    await collector.run(seconds)
+    wall = time.perf_counter() - t0
+    cpu = time.process_time() - cpu0
+    for server in servers:
+        server.close()
+
+    stats = collector.stats()
+    total = sum(s["samples"] for s in stats.values())
+    print(f"{n_devices} dispositivos a {rate_hz} Hz durante {wall:.1f} s: {total:,} muestras "
+          f"({total / wall:,.0f} muestras/s), CPU {100 * cpu / wall:.0f} % de un núcleo")
+    print(f"Pausas por contrapresión: {sum(s['pauses'] for s in stats.values())}, "
+          f"reconexiones: {sum(s['reconnects'] for s in stats.values())}, grabaciones en {directory}")
+
+
+def main():
+    n_devices = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    rate_hz = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    asyncio.run(run(n_devices, seconds, rate_hz))
+
+
+if __name__ == "__main__":
+    main()
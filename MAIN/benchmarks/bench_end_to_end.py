@@ -0,0 +1,270 @@
+# Rendimiento de extremo a extremo: ESP32 simulado -> colector -> gráficos.
+#
+# Arranca en otro proceso el servidor de reproducción (sim/replay_server.py)
+# o main.py sobre el simulador (sim/run_device.py), lo captura con
+# collector.Collector y dibuja los seis gráficos de INTERFAZ.PY con
+# FrameRateLimitedRenderer, como la interfaz. Para cada frecuencia mide:
+#   - caudal sostenido (muestras/s recibidas frente a las esperadas)
+#   - tiempos por etapa (p50/p95/p99): decodificación (StreamDecoder.decode),
+#     buffer (SampleBuffer.extend_rows) y renderizado de un cuadro
+#   - latencia (solo binario, que lleva t_us): desde el instante de la
+#     muestra hasta que se decodifica y hasta que sale en un cuadro
+#   - pérdidas según seq (solo binario)
+#
+# Con --transport both se mide cada frecuencia por TCP y por UDP (siempre
+# binario) para comparar latencias; --loss y --reorder hacen que el
+# servidor de reproducción pierda o desordene datagramas.
+#
+# El simulador y este proceso comparten el reloj monotónico del PC, así que
+# t_us se puede comparar directamente con la hora de llegada.
+#
+# Uso (desde MAIN/):
+#   python benchmarks/bench_end_to_end.py --rates 100,1000,5000 --seconds 5 --format binary
+#   python benchmarks/bench_end_to_end.py --target device --rates 50,500 --format text
+#   python benchmarks/bench_end_to_end.py --transport both --rates 1000 --loss 0.01 --reorder 0.02
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+MAIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, MAIN_DIR)
+
+import protocol
+from collector import Collector, Device, Sink, StreamDecoder
+from renderer import PlotPanel, FrameRateLimitedRenderer
+from sample_buffer import SampleBuffer, T, ACCEL, ANGLES
+
+RENDER_MAX_FPS = 10
+PLOT_WINDOW_S = 30.0
+PLOTS = [("acc_x", ACCEL.start), ("acc_y", ACCEL.start + 1), ("acc_z", ACCEL.start + 2),
+         ("ang_x", ANGLES.start), ("ang_y", ANGLES.start + 1), ("ang_z", ANGLES.start + 2)]
+STAGES = [("decode", "Decodificación (ms/lote)"), ("buffer", "Buffer (ms/lote)"),
+          ("render", "Renderizado (ms/cuadro)"), ("arrival", "Latencia hasta decodificar (ms)"),
+          ("display", "Latencia hasta el cuadro (ms)")]
+START_TIMEOUT_S = 10.0
+
+
+def ticks_us_now():
+    """ticks_us del simulador (sim/micropython_time.py) en este instante."""
+    return (time.monotonic_ns() // 1000) & (protocol.TICKS_PERIOD - 1)
+
+
+def latency_ms(t_us):
+    return ((ticks_us_now() - np.asarray(t_us, dtype=np.int64)) % protocol.TICKS_PERIOD) / 1000
+
+
+class StageTimes:
+    """Muestras de tiempo por etapa; solo se guardan mientras `recording` es True."""
+
+    def __init__(self):
+        self.values = {name: [] for name, _ in STAGES}
+        self.values["decode_udp"] = []
+        self.recording = False
+        self.decoded_t_us = None  # t_us de la última trama decodificada
+        self._lock = threading.Lock()
+
+    def add(self, name, values):
+        if self.recording:
+            with self._lock:
+                self.values[name].extend(np.atleast_1d(values).tolist())
+
+    def timed(self, name, fn):
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            result = fn(*args, **kwargs)
+            self.add(name, (time.perf_counter() - t0) * 1000)
+            return result
+        return wrapper
+
+    def reset(self):
+        with self._lock:
+            for values in self.values.values():
+                values.clear()
+
+    def summary(self, name):
+        values = self.values[name]
+        if name == "decode":
+            # En UDP decode_frames es la decodificación; en TCP se llama dentro de decode
+            values = values or self.values["decode_udp"]
+        if not values:
+            return None
+        return len(values), np.percentile(values, [50, 95, 99])
+
+
+def instrument(stages):
+    """
+    Envuelve las etapas del colector con temporizadores. Se hace sobre las
+    clases porque Collector crea sus decodificadores y buffers internamente.
+    La decodificación de TCP es StreamDecoder.decode y la de UDP
+    StreamDecoder.decode_frames (tras el reordenado); la latencia se anota en
+    _binary_rows, por donde pasan las dos.
+    """
+    StreamDecoder.decode = stages.timed("decode", StreamDecoder.decode)
+    StreamDecoder.decode_frames = stages.timed("decode_udp", StreamDecoder.decode_frames)
+    SampleBuffer.extend_rows = stages.timed("buffer", SampleBuffer.extend_rows)
+    binary_rows = StreamDecoder._binary_rows
+
+    def binary_rows_and_stamp(self, frames):
+        stages.add("arrival", latency_ms(frames["t_us"]))
+        stages.decoded_t_us = int(frames["t_us"][-1])
+        return binary_rows(self, frames)
+
+    StreamDecoder._binary_rows = binary_rows_and_stamp
+
+
+class DisplaySink(Sink):
+    """Hace lo mismo que InterfaceSink de INTERFAZ.PY, sin Flet."""
+
+    def __init__(self, stages, capacity=20000):
+        self.stages = stages
+        self.samples = SampleBuffer(capacity)
+        self.renderer = None
+        self.buffered_t_us = None  # t_us de la muestra más nueva del buffer
+
+    def on_rows(self, device, rows, line):
+        self.samples.extend_rows(rows)
+        self.buffered_t_us = self.stages.decoded_t_us
+        self.renderer.notify(len(rows))
+
+
+def start_renderer(sink, stages, stop_event):
+    panels = {name: PlotPanel(name, name, PLOT_WINDOW_S) for name, _ in PLOTS}
+    shown = {}
+
+    def snapshot():
+        shown["t_us"] = sink.buffered_t_us
+        view = sink.samples.window_since(PLOT_WINDOW_S)
+        if len(view) == 0:
+            return {}
+        time_rel = view[:, T] - view[-1, T]
+        return {name: (time_rel, view[:, column]) for name, column in PLOTS}
+
+    def publish(images):
+        if shown.get("t_us") is not None:
+            stages.add("display", latency_ms(shown["t_us"]))
+        stages.add("render", sink.renderer.last_render_ms)
+
+    sink.renderer = FrameRateLimitedRenderer(panels, snapshot, publish, max_fps=RENDER_MAX_FPS)
+    return sink.renderer.start(stop_event)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_target(args, rate_hz, port, transport):
+    if args.target == "replay":
+        command = [os.path.join(MAIN_DIR, "sim", "replay_server.py"), "--port", str(port)]
+        if transport == "udp":
+            command += ["--transport", "udp", "--udp-target", f"127.0.0.1:{port}",
+                        "--loss", str(args.loss), "--reorder", str(args.reorder)]
+    else:
+        # main.py sigue sirviendo TCP; en UDP se le da otro puerto que no se usa
+        command = [os.path.join(MAIN_DIR, "sim", "run_device.py"), "--port", str(free_port() if transport == "udp" else port)]
+        if transport == "udp":
+            command += ["--transport", "udp", "--udp-target", "127.0.0.1", "--udp-port", str(port)]
+    command += ["--rate", str(rate_hz), "--format", "binary" if transport == "udp" else args.format,
+                "--source", args.source]
+    return subprocess.Popen([sys.executable] + command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_for_port(port):
+    deadline = time.monotonic() + START_TIMEOUT_S
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"El simulador no abrió el puerto {port}")
+
+
+async def measure(port, transport, stages, seconds, warmup_s):
+    stop_event = threading.Event()
+    sink = DisplaySink(stages)
+    render_thread = start_renderer(sink, stages, stop_event)
+    collector = Collector([Device("sim", "127.0.0.1", port, transport)], [sink])
+    task = asyncio.ensure_future(collector.run())
+    # Lo primero que llega puede ser lo guardado sin cliente (backlog.py): no se mide
+    await asyncio.sleep(warmup_s)
+    stages.reset()
+    samples0 = sum(s["samples"] for s in collector.stats().values())
+    lost0 = sum(s["lost"] for s in collector.stats().values())
+    stages.recording = True
+    cpu0 = time.process_time()
+    t0 = time.perf_counter()
+    await asyncio.sleep(seconds)
+    stages.recording = False
+    wall = time.perf_counter() - t0
+    cpu = time.process_time() - cpu0
+    stats = collector.stats()
+    collector.stop()
+    await task
+    stop_event.set()
+    render_thread.join()
+    samples = sum(s["samples"] for s in stats.values()) - samples0
+    lost = sum(s["lost"] for s in stats.values()) - lost0
+    return samples, lost, wall, cpu, stats["sim"]
+
+
+def report(rate_hz, transport, samples, lost, wall, cpu, stats, stages, binary):
+    expected = rate_hz * wall
+    print(f"\n{rate_hz:g} Hz por {transport.upper()}: {samples:,} muestras en {wall:.1f} s = {samples / wall:,.0f}/s "
+          f"({100 * samples / expected:.1f} % de lo esperado), CPU del colector {100 * cpu / wall:.0f} %")
+    if binary and samples + lost:
+        print(f"  Pérdidas según seq: {lost} ({100 * lost / (samples + lost):.2f} %)")
+    if transport == "udp":
+        print(f"  Datagramas: {stats['datagrams']:,}, desordenados {stats['reordered']}, tardíos {stats['late']}, "
+              f"huecos {stats['gaps']} ({stats['missing']} tramas)")
+    for name, title in STAGES:
+        summary = stages.summary(name)
+        if summary is None:
+            continue
+        n, (p50, p95, p99) = summary
+        print(f"  {title:34s} p50 {p50:8.2f}  p95 {p95:8.2f}  p99 {p99:8.2f}  (n={n})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de extremo a extremo con el ESP32 simulado.")
+    parser.add_argument("--target", choices=("replay", "device"), default="replay",
+                        help="replay: sim/replay_server.py; device: main.py en sim/run_device.py (hasta 1 kHz)")
+    parser.add_argument("--rates", default="100,1000,5000", help="Frecuencias en Hz separadas por comas")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--warmup", type=float, default=1.0, help="Segundos iniciales que no se miden")
+    parser.add_argument("--format", choices=("text", "binary"), default="binary")
+    parser.add_argument("--source", default="csv", help="'synthetic', 'bursts', 'csv' o la ruta de un CSV")
+    parser.add_argument("--transport", choices=("tcp", "udp", "both"), default="tcp",
+                        help="UDP siempre es binario; 'both' mide los dos para comparar")
+    parser.add_argument("--loss", type=float, default=0.0, help="UDP con --target replay: fracción de datagramas perdidos")
+    parser.add_argument("--reorder", type=float, default=0.0, help="UDP con --target replay: fracción desordenada")
+    args = parser.parse_args()
+
+    stages = StageTimes()
+    instrument(stages)
+    transports = ("tcp", "udp") if args.transport == "both" else (args.transport,)
+    for rate_hz in (float(r) for r in args.rates.split(",")):
+        for transport in transports:
+            port = free_port()
+            process = start_target(args, rate_hz, port, transport)
+            try:
+                if transport == "tcp":
+                    wait_for_port(port)
+                results = asyncio.run(measure(port, transport, stages, args.seconds, args.warmup))
+            finally:
+                process.terminate()
+                process.wait()
+            report(rate_hz, transport, *results, stages, transport == "udp" or args.format == "binary")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# Ahorro del modo evento (motion_trigger.py) en una sesión larga de vigilancia.
+#
+# Genera en memoria, sin esperar al reloj, las tramas que tomaría el ESP32
+# durante `--hours` a `--rate` Hz de un sensor en reposo que se sacude unos
+# segundos cada `--interval` s (sim/signals.py, fuente 'bursts'), y las pasa
+# por MotionTrigger con la configuración de main.py, en bloques como el bucle
+# de reparto. Compara lo que saldría por Wi-Fi y lo que se grabaría en disco
+# con el flujo continuo, comprueba que cada sacudida da un evento con su
+# contexto y mide el coste del filtro por trama (en CPython).
+#
+# Uso (desde MAIN/):
+#   python benchmarks/bench_event_mode.py --hours 1 --rate 100 --interval 300
+
+import argparse
+import os
+import sys
+import time
+
+MAIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, MAIN_DIR)
+sys.path.insert(0, os.path.join(MAIN_DIR, "sim"))
+
+import micropython_time
+
+micropython_time.install()
+
+import main as device
+import protocol
+from motion_trigger import MotionTrigger
+from recording import RECORD_SIZE
+from replay_server import ReplayServer
+from signals import BurstMotion
+
+ACC_SCALER = 16384.0  # ±2 g, como ReplayServer
+GYR_SCALER = 131.0    # ±250 °/s
+
+
+def run(rate_hz, seconds, source):
+    period_ms = 1000.0 / rate_hz
+    trigger = MotionTrigger(device.EVENT_ACCEL_TRIGGER_G, device.EVENT_ACCEL_RELEASE_G,
+                            device.EVENT_GYRO_TRIGGER_DPS, device.EVENT_GYRO_RELEASE_DPS,
+                            int(device.EVENT_PRE_MS // period_ms), max(1, int(device.EVENT_POST_MS // period_ms)),
+                            device.HEARTBEAT_INTERVAL_MS, device.EVENT_CHUNK_FRAMES)
+    replay = ReplayServer(source, rate_hz)
+    total = int(seconds * rate_hz)
+    chunk_frames = device.EVENT_CHUNK_FRAMES
+    out_seqs = []
+    out_t_us = []
+    filter_s = 0.0
+    for seq in range(0, total, chunk_frames):
+        n = min(chunk_frames, total - seq)
+        chunk = replay.frames(seq, n, 0.0)
+        now_ms = int((seq + n) * period_ms) & (protocol.TICKS_PERIOD - 1)
+        t0 = time.perf_counter()
+        view, m = trigger.filter(chunk, n, ACC_SCALER, GYR_SCALER, now_ms)
+        filter_s += time.perf_counter() - t0
+        for i in range(m):
+            base = i * protocol.FRAME_SIZE
+            out_seqs.append(int.from_bytes(view[base:base + 4], "big"))
+            out_t_us.append(int.from_bytes(view[base + 4:base + 8], "big"))
+    return trigger, total, out_seqs, out_t_us, filter_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ahorro de ancho de banda y disco del modo evento.")
+    parser.add_argument("--hours", type=float, default=1.0)
+    parser.add_argument("--rate", type=float, default=100.0, help="Muestras por segundo")
+    parser.add_argument("--interval", type=float, default=300.0, help="Segundos entre sacudidas")
+    parser.add_argument("--burst", type=float, default=3.0, help="Segundos que dura cada sacudida")
+    args = parser.parse_args()
+
+    seconds = args.hours * 3600
+    source = BurstMotion(interval_s=args.interval, burst_s=args.burst)
+    trigger, total, out_seqs, out_t_us, filter_s = run(args.rate, seconds, source)
+    stats = trigger.stats()
+    sent = stats["frames_out"]
+    expected_events = int(max(0.0, seconds - source.offset_s) // args.interval) + 1
+
+    print(f"Sesión de {args.hours:g} h a {args.rate:g} Hz, una sacudida de {args.burst:g} s cada {args.interval:g} s")
+    print(f"  Eventos: {stats['events']} (sacudidas: {expected_events}), latidos: {stats['heartbeats']}")
+    print(f"  Tramas enviadas: {sent:,} de {total:,} ({100 * sent / total:.1f} %, x{total / max(sent, 1):.1f} menos)")
+    print(f"  Wi-Fi: {sent * protocol.FRAME_SIZE / 1e6:.2f} MB frente a {total * protocol.FRAME_SIZE / 1e6:.2f} MB")
+    print(f"  Disco (.mpurec): {sent * RECORD_SIZE / 1e6:.2f} MB frente a {total * RECORD_SIZE / 1e6:.2f} MB")
+    print(f"  Filtro: {1e6 * filter_s / total:.2f} µs por trama en CPython")
+
+    # El PC no debe ver huecos de seq (pérdidas) y t_us debe avanzar siempre
+    gaps = sum(1 for a, b in zip(out_seqs, out_seqs[1:]) if b != a + 1)
+    backwards = sum(1 for a, b in zip(out_t_us, out_t_us[1:]) if (b - a) % protocol.TICKS_PERIOD > protocol.TICKS_PERIOD // 2)
+    print(f"  Huecos de seq: {gaps}, t_us hacia atrás: {backwards}")
+    assert gaps == 0 and backwards == 0, "El modo evento rompe la secuencia que espera el PC"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Mide en CPython el coste por muestra de la lectura del MPU6050:
+# lecturas separadas (read_accel_data + read_gyro_data) frente a la
+# lectura en ráfaga de 14 bytes (read_all_into) y la descarga de la FIFO.
+#
+# Uso (desde MAIN/): python benchmarks/bench_mpu6050.py [N]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "sim"))
+
+from MPU6050 import MPU6050
+from fake_mpu6050 import FakeMPU6050I2C
+
+
+def bench(label, fn, n, bus):
+    bus.reads = 0
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    dt = time.perf_counter() - t0
+    print(f"{label:<34} {n / dt:>12,.0f} muestras/s  {dt / n * 1e6:8.2f} us/muestra  "
+          f"{bus.reads / n:.0f} transacciones/muestra")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    bus = FakeMPU6050I2C()
+    bus.set_sample(accel=(1200, -340, 16000), temp=-1500, gyro=(25, -13, 7))
+    mpu = MPU6050(i2c=bus)
+    out = [0.0] * 7
+
+    def separate():
+        mpu.read_accel_data()
+        mpu.read_gyro_data()
+
+    bench("read_accel_data + read_gyro_data", separate, n, bus)
+    bench("read_all", mpu.read_all, n, bus)
+    bench("read_all_into (buffer reutilizado)", lambda: mpu.read_all_into(out), n, bus)
+
+    # FIFO: se encolan 80 tramas (~1 KB) por descarga, como a 1 kHz cada 80 ms
+    mpu.set_sample_rate(1000)
+    mpu.start_fifo()
+    batch = 80
+
+    def drain():
+        bus.push_frames(batch)
+        for _ in mpu.drain_fifo():
+            pass
+
+    bus.reads = 0
+    t0 = time.perf_counter()
+    for _ in range(n // batch):
+        drain()
+    dt = time.perf_counter() - t0
+    frames = (n // batch) * batch
+    print(f"{'drain_fifo (80 tramas/descarga)':<34} {frames / dt:>12,.0f} muestras/s  "
+          f"{dt / frames * 1e6:8.2f} us/muestra  {bus.reads / frames:.2f} transacciones/muestra")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# Rendimiento y concordancia de los filtros de orientation.py en el PC.
+#
+# Genera un movimiento sintético (giros lentos con ruido de sensor), lo pasa
+# por la versión por muestra (la misma que corre en el ESP32) y por la
+# versión por lotes con numpy, comprueba que ambas dan los mismos ángulos y
+# mide las muestras por segundo de cada una.
+#
+# Uso (desde MAIN/): python benchmarks/bench_orientation.py [N]
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from orientation import ComplementaryFilter, MadgwickFilter, complementary_batch, madgwick_batch
+
+RATE_HZ = 200
+CHECK_SAMPLES = 50000  # La versión por muestra se compara sobre este prefijo
+
+
+def synthetic_motion(n, seed=0):
+    """Acelerómetro (m/s²) y giroscopio (deg/s) de un sensor que oscila en X e Y."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / RATE_HZ
+    roll = np.radians(30.0) * np.sin(2 * np.pi * 0.2 * t)
+    pitch = np.radians(20.0) * np.sin(2 * np.pi * 0.13 * t)
+    g = 9.80665
+    accel = np.stack([-g * np.sin(pitch), g * np.sin(roll) * np.cos(pitch), g * np.cos(roll) * np.cos(pitch)], axis=1)
+    gyro = np.degrees(np.stack([np.gradient(roll, t), np.gradient(pitch, t), np.zeros(n)], axis=1))
+    accel += rng.normal(0.0, 0.3, accel.shape)
+    gyro += rng.normal(0.0, 0.5, gyro.shape)
+    return accel, gyro, np.full(n, 1.0 / RATE_HZ)
+
+
+def per_sample(filter_cls, accel, gyro, dt):
+    f = filter_cls()
+    update = f.update
+    return np.array([update(a[0], a[1], a[2], g[0], g[1], g[2], d)
+                     for a, g, d in zip(accel.tolist(), gyro.tolist(), dt.tolist())])
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    accel, gyro, dt = synthetic_motion(n)
+    m = min(n, CHECK_SAMPLES)
+
+    for name, filter_cls, batch in [("complementario", ComplementaryFilter, complementary_batch),
+                                    ("madgwick", MadgwickFilter, madgwick_batch)]:
+        t0 = time.perf_counter()
+        reference = per_sample(filter_cls, accel[:m], gyro[:m], dt[:m])
+        t_sample = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        angles, _ = batch(accel, gyro, dt)
+        t_batch = time.perf_counter() - t0
+
+        error = np.abs(angles[:m] - reference).max()
+        print(f"{name:<15} por muestra {m / t_sample:>12,.0f} muestras/s   "
+              f"por lotes {n / t_batch:>12,.0f} muestras/s   "
+              f"diferencia máx. {error:.2e} grados")
+        assert error < 1e-6, "Las dos versiones no coinciden"
+
+
+if __name__ == "__main__":
+    main()
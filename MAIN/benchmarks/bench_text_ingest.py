@@ -0,0 +1,110 @@
+# Micro-benchmark de la lectura del flujo de texto en el PC.
+#
+# Reproduce como líneas del ESP32 los datos grabados en
+# data_Examples/datos tomados.csv y los pasa, en trozos como los entrega el
+# socket, por el camino anterior (recv(128), concatenación de bytes, split
+# línea a línea y expresión regular) y por el nuevo (LineReader.recv_into +
+# parse_text_block por bloque).
+#
+# Uso (desde MAIN/): python benchmarks/bench_text_ingest.py [líneas] [bytes por trozo]
+
+import csv
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from ingest import LineReader, parse_text_block
+
+CSV_PATH = os.path.join(os.path.dirname(__file__), "..", "data_Examples", "datos tomados.csv")
+
+legacy_pattern = re.compile(
+    r"Aceleración \(m/s²\) -> X:\s*([+-]?\d+\.\d+)\s*Y:\s*([+-]?\d+\.\d+)\s*Z:\s*([+-]?\d+\.\d+)\s*\|"
+    r"\s*Ángulos \(grados\) -> X:\s*([+-]?\d+\.\d+)\s*Y:\s*([+-]?\d+\.\d+)\s*Z:\s*([+-]?\d+\.\d+)"
+)
+
+
+def recorded_lines():
+    """Las filas del CSV de ejemplo con el mismo formato que envía main.py."""
+    lines = []
+    with open(CSV_PATH, newline="") as file:
+        reader = csv.reader(file)
+        next(reader)
+        for row in reader:
+            ax, ay, az, gx, gy, gz = (float(v) for v in row[1:7])
+            lines.append(f"Aceleración (m/s²) -> X: {ax:.3f} Y: {ay:.3f} Z: {az:.3f} | "
+                         f"Ángulos (grados) -> X: {gx:.1f} Y: {gy:.1f} Z: {gz:.1f}\n")
+    return lines
+
+
+class ReplaySocket:
+    """Socket falso que entrega un flujo grabado en trozos de tamaño fijo."""
+
+    def __init__(self, data, chunk):
+        self.data = memoryview(data)
+        self.pos = 0
+        self.chunk = chunk
+
+    def recv(self, n):
+        n = min(n, self.chunk)
+        out = bytes(self.data[self.pos:self.pos + n])
+        self.pos += len(out)
+        return out
+
+    def recv_into(self, buf):
+        n = min(len(buf), self.chunk, len(self.data) - self.pos)
+        buf[:n] = self.data[self.pos:self.pos + n]
+        self.pos += n
+        return n
+
+
+def legacy_ingest(sock):
+    buffer = b''
+    count = 0
+    while True:
+        data = sock.recv(128)
+        if not data:
+            return count
+        buffer += data
+        while b'\n' in buffer:
+            line, buffer = buffer.split(b'\n', 1)
+            match = legacy_pattern.search(line.decode('utf-8').strip())
+            if match:
+                [float(match.group(i)) for i in range(1, 7)]
+                count += 1
+
+
+def new_ingest(sock):
+    reader = LineReader()
+    count = 0
+    while True:
+        try:
+            reader.recv(sock)
+        except ConnectionError:
+            return count
+        block = reader.take_lines()
+        if block:
+            values, _ = parse_text_block(block)
+            count += len(values)
+
+
+def main():
+    n_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    chunk = int(sys.argv[2]) if len(sys.argv) > 2 else 8192
+    base = recorded_lines()
+    lines = (base * (n_lines // len(base) + 1))[:n_lines]
+    data = "".join(lines).encode("utf-8")
+    print(f"{n_lines} líneas, {len(data) / 1e6:.1f} MB, trozos de {chunk} bytes")
+
+    for label, fn in (("anterior (recv 128 + regex)", legacy_ingest),
+                      ("nuevo (recv_into + bloque)", new_ingest)):
+        t0 = time.perf_counter()
+        count = fn(ReplaySocket(data, chunk))
+        dt = time.perf_counter() - t0
+        print(f"{label:<30} {count / dt:>12,.0f} líneas/s  ({count} muestras)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,794 @@
+# Colector asyncio de varios ESP32 a la vez, con o sin interfaz gráfica.
+#
+# Cada dispositivo tiene su conexión TCP (asyncio.BufferedProtocol que recibe
+# directamente en el buffer preasignado de un LineReader), su decodificador
+# de texto/binario y su buffer de muestras. Las muestras decodificadas se
+# reparten a los "sinks": la interfaz (INTERFAZ.PY) y las grabaciones .mpurec.
+#
+# - Reconexión con espera exponencial (con algo de azar) por dispositivo.
+# - Contrapresión: si el buffer de recepción se llena porque los sinks van
+#   atrasados, se pausa la lectura del socket y TCP frena al ESP32 (cuyas
+#   muestras de más se cuentan como perdidas en ring.py).
+# - Un solo hilo y un solo bucle de eventos para decenas de flujos.
+# - Cada etapa (recepción, decodificación, buffer, entrega) se anota en
+#   Collector.metrics (metrics.py); las estadísticas que envía el ESP32 se
+#   reparten a los sinks con on_device_stats().
+# - Opcionalmente por UDP ('udp://grupo:puerto'): sin conexión ni reintentos,
+#   los datagramas se reordenan por seq en una ventana corta y los huecos se
+#   dan por perdidos; prima la frescura sobre la completitud.
+#
+# Uso sin interfaz (desde MAIN/):
+#   python collector.py 192.168.137.108:8080 sala=192.168.137.109:8080 --out recordings --duration 3600
+#   python collector.py patio=udp://0.0.0.0:8081 --out recordings
+
+import argparse
+import asyncio
+import collections
+import ipaddress
+import os
+import random
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+import protocol
+from ingest import LineReader, parse_text_block
+from metrics import StageMetrics, format_device_stats
+from orientation import complementary_batch
+from recording import SessionRecorder, FILE_EXTENSION
+from sample_buffer import SampleBuffer, make_rows
+
+RECV_BUFFER_SIZE = 64 * 1024
+HIGH_WATER = 0.75            # Fracción del buffer de recepción a partir de la que se pausa el socket
+CONNECT_TIMEOUT_S = 5.0
+IDLE_TIMEOUT_S = 10.0        # Sin datos durante este tiempo se reconecta
+BACKOFF_INITIAL_S = 0.5
+BACKOFF_MAX_S = 30.0
+SINK_WAIT_S = 0.05           # Espera entre comprobaciones mientras un sink está ocupado
+DEVICE_BUFFER_CAPACITY = 20000
+# El texto no lleva marca de tiempo: las muestras de un bloque se reparten
+# entre la muestra anterior y la llegada del bloque, como mucho en este intervalo
+TEXT_BATCH_SPREAD_S = 1.0
+# UDP: datagramas que se esperan para recolocar uno desordenado, y espera máxima
+REORDER_WINDOW = 8
+REORDER_TIMEOUT_S = 0.05
+UDP_RECV_BUFFER_BYTES = 1 << 20
+MAX_PENDING_DATAGRAMS = 4096  # Si los sinks van atrasados se descartan los más antiguos
+# En modo evento las vueltas de ticks_us entre tramas se cuentan con el reloj
+# del PC; este margen cubre el retardo de entrega y la deriva entre relojes
+EVENT_WRAP_SLACK_S = 5.0
+_STATS_LINE_PREFIX = protocol.STATS_LINE_PREFIX.encode("utf-8")
+
+
+class Device:
+    """
+    Un ESP32: nombre para archivos y estado, dirección, puerto y transporte.
+    En UDP `host` es la dirección local en la que se escucha (0.0.0.0 para
+    unicast y broadcast) o el grupo multicast al que unirse.
+    """
+
+    def __init__(self, name, host, port, transport="tcp"):
+        self.name = name
+        self.host = host
+        self.port = port
+        self.transport = transport
+
+    @classmethod
+    def parse(cls, spec, default_port=8080):
+        """Acepta 'host', 'host:puerto' o 'nombre=host:puerto', con 'udp://' delante del host para UDP."""
+        name, _, address = spec.rpartition("=")
+        transport = "tcp"
+        if address.startswith("udp://"):
+            transport = "udp"
+            address = address[len("udp://"):]
+        host, _, port = address.partition(":")
+        host = host or "0.0.0.0"
+        port = int(port) if port else default_port
+        return cls(name or f"{host}_{port}", host, port, transport)
+
+    def __repr__(self):
+        scheme = "udp://" if self.transport == "udp" else ""
+        return f"{self.name} ({scheme}{self.host}:{self.port})"
+
+
+class StreamDecoder:
+    """
+    Convierte lo recibido por una conexión en bloques de filas (N, N_COLUMNS)
+    de sample_buffer. Detecta el formato por los primeros bytes (cabecera
+    binaria de protocol.py o texto), y en binario calcula los ángulos con el
+    filtro complementario de orientation.py.
+
+    `clock` devuelve los segundos de captura (reloj del PC) y fija el origen
+    de tiempos de cada conexión. reset() se llama al empezar una conexión.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.last_t = None   # Tiempo de la última muestra, se conserva entre conexiones
+        # (seq, t_us, tiempo) de la última trama binaria: al reconectar, lo que el
+        # ESP32 guardó sin cliente (backlog.py) se coloca a continuación por seq
+        self.anchor = None
+        self.lost = 0        # Tramas que faltan según seq
+        self.resent = 0      # Tramas repetidas tras reconectar (ya recibidas), descartadas
+        self.device_stats = []  # Estadísticas recibidas del ESP32, pendientes de repartir
+        self.reset()
+
+    def reset(self):
+        self.mode = None     # None, 'text' o 'binary'
+        self.binary = None
+        self.orientation = None  # (estado del filtro, tiempo de la última trama)
+        self.last_line = ""
+        self.rejected = 0
+
+    def detect(self, reader):
+        """Decide el formato con los primeros bytes. Devuelve True al decidirlo."""
+        if self.mode is not None or reader.fill < len(protocol.MAGIC):
+            return False
+        if reader.peek(len(protocol.MAGIC)) == protocol.MAGIC:
+            self.mode = 'binary'
+            self.binary = protocol.BinaryStreamDecoder()
+        else:
+            self.mode = 'text'
+        return True
+
+    def decode(self, reader):
+        """Consume lo recibido en `reader` y devuelve un bloque de filas (puede estar vacío)."""
+        if self.mode == 'binary':
+            return self.decode_frames(self.binary.feed(reader.take_all()))
+        if self.mode == 'text':
+            block = reader.take_lines()
+            return self._text_rows(block) if block else None
+        return None
+
+    def decode_frames(self, frames):
+        """Filas de un lote de tramas binarias ya separadas (TCP o UDP)."""
+        frames, stats = protocol.split_stats(frames)
+        self.device_stats.extend(stats)
+        frames = self._drop_resent(frames)
+        return self._binary_rows(frames) if len(frames) else None
+
+    def _drop_resent(self, frames):
+        """
+        Al reconectar, el ESP32 reenvía el último lote cuyo envío no llegó a
+        confirmar, y parte de él puede haber llegado ya. Se reconoce porque
+        contiene la última trama recibida, con el mismo seq y t_us; lo anterior
+        a ella se descarta. Si no la contiene (p. ej. el ESP32 se reinició) el
+        lote pasa entero.
+        """
+        if self.anchor is None or len(frames) == 0 or frames["seq"][0] > self.anchor[0]:
+            return frames
+        last_seq, last_tick, _ = self.anchor
+        match = np.flatnonzero((frames["seq"] == last_seq) & (frames["t_us"] == last_tick))
+        if len(match) == 0:
+            return frames
+        self.resent += int(match[0]) + 1
+        return frames[match[0] + 1:]
+
+    def start_datagrams(self, header):
+        """Pasa a binario con la cabecera de un datagrama UDP (no hay cabecera de conexión)."""
+        if self.mode is None:
+            self.mode = 'binary'
+            self.binary = protocol.BinaryStreamDecoder()
+        self.binary.header = header
+
+    def _binary_times(self, frames):
+        """
+        Tiempos de captura de un lote a partir del reloj del dispositivo. La
+        primera trama tras la anterior recibida (aunque sea de otra conexión)
+        se sitúa con su t_us, usando seq y el periodo de la cabecera para
+        saber cuántas vueltas dio ticks_us mientras no hubo conexión. En modo
+        evento seq no cuenta el reposo omitido y las vueltas se deducen del
+        reloj del PC: la última trama del lote no puede ser posterior a su llegada.
+        """
+        period = protocol.TICKS_PERIOD
+        ticks = frames["t_us"].astype(np.int64)
+        seqs = frames["seq"].astype(np.int64)
+        steps = np.empty(len(frames), dtype=np.int64)
+        steps[1:] = np.diff(ticks) % period
+        anchor = self.anchor
+        if anchor is None or seqs[0] <= anchor[0]:
+            # Sin referencia (o el ESP32 se reinició): la última trama es "ahora"
+            steps[0] = 0
+            elapsed_us = np.cumsum(steps)
+            t0 = self.clock() - elapsed_us[-1] / 1e6
+        else:
+            last_seq, last_tick, t0 = anchor
+            first = (ticks[0] - last_tick) % period
+            header = self.binary.header
+            if header["flags"] & protocol.FLAG_EVENTS:
+                arrived_us = (self.clock() - t0 + EVENT_WRAP_SLACK_S) * 1e6
+                span_us = int(steps[1:].sum())
+                first += max(0, int((arrived_us - first - span_us) // period)) * period
+            else:
+                expected_us = (seqs[0] - last_seq) * header["period_us"]
+                first += max(0, round((expected_us - first) / period)) * period
+            steps[0] = first
+            self.lost += int(seqs[0] - last_seq - 1)
+            elapsed_us = np.cumsum(steps)
+        self.lost += int(seqs[-1] - seqs[0] + 1 - len(seqs))
+        times = t0 + elapsed_us / 1e6
+        self.anchor = (int(seqs[-1]), int(ticks[-1]), float(times[-1]))
+        return times
+
+    def _binary_rows(self, frames):
+        times = self._binary_times(frames)
+        physical = protocol.frames_to_physical(frames)
+        accel = physical["accel"]
+        gyro = physical["gyro"]
+        state, last_t = self.orientation or (None, times[0])
+        dt = np.diff(times, prepend=last_t)
+        header = self.binary.header
+        if header["flags"] & protocol.FLAG_EVENTS:
+            # Modo evento: el giro no se integra sobre el hueco entre eventos
+            np.minimum(dt, 2e-6 * header["period_us"], out=dt)
+        angles, state = complementary_batch(accel, gyro, dt, state=state)
+        # Ang Z es la inclinación absoluta del acelerómetro, como en el formato de texto
+        angles[:, 2] = physical["angles"][:, 2]
+        self.orientation = (state, times[-1])
+        ax, ay, az = accel[-1]
+        gx, gy, gz = angles[-1]
+        self.last_line = (f"#{int(frames['seq'][-1])} Aceleración (m/s²) -> X: {ax:.3f} Y: {ay:.3f} Z: {az:.3f} | "
+                          f"Ángulos (grados) -> X: {gx:.1f} Y: {gy:.1f} Z: {gz:.1f}")
+        self.last_t = float(times[-1])
+        return make_rows(times, accel, gyro, angles)
+
+    def _text_rows(self, block):
+        if _STATS_LINE_PREFIX in block:
+            block = self._take_stats_lines(block)
+        values, rejected = parse_text_block(block)
+        self.rejected += rejected
+        n = len(values)
+        if n == 0:
+            return None
+        # Tiempos repartidos uniformemente hasta la llegada del bloque
+        now = self.clock()
+        previous = self.last_t
+        start = now - TEXT_BATCH_SPREAD_S if previous is None else max(previous, now - TEXT_BATCH_SPREAD_S)
+        times = np.linspace(start, now, n + 1)[1:]
+        self.last_t = float(times[-1])
+        # Solo se decodifica la última línea, para mostrarla
+        last = block.rstrip(b"\r\n").rsplit(b"\n", 1)[-1]
+        self.last_line = last.decode("utf-8", errors="replace").strip()
+        return make_rows(times, values[:, 0:3], angles=values[:, 3:6])
+
+    def _take_stats_lines(self, block):
+        # Las líneas de estadísticas no son muestras: se guardan y se quitan del bloque
+        lines = []
+        for line in block.splitlines(keepends=True):
+            if line.startswith(_STATS_LINE_PREFIX):
+                stats = protocol.parse_stats_line(line.decode("utf-8", errors="replace"))
+                if stats is not None:
+                    self.device_stats.append(stats)
+            else:
+                lines.append(line)
+        return b"".join(lines)
+
+
+class Sink:
+    """
+    Destino de las muestras del colector. Todos los métodos se llaman desde
+    el bucle de eventos y no deben bloquear; busy() True hace que el colector
+    espere antes de entregar más (y, si dura, pause los sockets).
+    """
+
+    def on_rows(self, device, rows, line):
+        pass
+
+    def on_metadata(self, device, **values):
+        pass
+
+    def on_status(self, device, text):
+        pass
+
+    def on_device_stats(self, device, stats):
+        """Estadísticas del propio ESP32 (campos de protocol.STATS_FIELDS)."""
+        pass
+
+    def busy(self):
+        return False
+
+    def close(self):
+        pass
+
+
+class RecorderSink(Sink):
+    """Graba cada dispositivo en su propio archivo .mpurec dentro de `directory`."""
+
+    MAX_PENDING_BLOCKS = 256  # Bloques encolados en un SessionRecorder antes de frenar
+
+    def __init__(self, directory, prefix=None):
+        self.directory = directory
+        self.prefix = prefix or time.strftime("sesion_%Y%m%d_%H%M%S")
+        self.recorders = {}
+
+    def recorder(self, device):
+        recorder = self.recorders.get(device.name)
+        if recorder is None:
+            path = os.path.join(self.directory, f"{self.prefix}_{device.name}{FILE_EXTENSION}")
+            recorder = SessionRecorder(path, {"source": f"{device.host}:{device.port}", "device": device.name})
+            self.recorders[device.name] = recorder
+        return recorder
+
+    def on_rows(self, device, rows, line):
+        self.recorder(device).write_rows(rows)
+
+    def on_metadata(self, device, **values):
+        self.recorder(device).update_metadata(**values)
+
+    def busy(self):
+        return any(r.pending() > self.MAX_PENDING_BLOCKS for r in self.recorders.values())
+
+    def close(self):
+        for recorder in self.recorders.values():
+            recorder.close()
+
+
+class PrintSink(Sink):
+    """Estado y contadores por consola, para capturas desatendidas."""
+
+    def __init__(self, interval_s=10.0):
+        self.interval_s = interval_s
+        self.counts = {}
+        self.device_stats = {}
+        self._last = time.monotonic()
+
+    def on_rows(self, device, rows, line):
+        self.counts[device.name] = self.counts.get(device.name, 0) + len(rows)
+        now = time.monotonic()
+        if now - self._last >= self.interval_s:
+            self._last = now
+            print("Muestras:", ", ".join(f"{name}: {n}" for name, n in sorted(self.counts.items())))
+            for name, stats in sorted(self.device_stats.items()):
+                print("  " + format_device_stats(name, stats))
+
+    def on_status(self, device, text):
+        print(f"[{device.name}] {text}")
+
+    def on_device_stats(self, device, stats):
+        self.device_stats[device.name] = stats
+
+
+class _ReceiveProtocol(asyncio.BufferedProtocol):
+    # Recibe directamente en el buffer del LineReader (recv_into sin copias)
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.connection.transport = transport  # Pueden llegar datos antes de que vuelva create_connection
+
+    def get_buffer(self, sizehint):
+        reader = self.connection.reader
+        if reader.fill == len(reader.buf):
+            reader._grow()
+        return reader.mv[reader.fill:]
+
+    def buffer_updated(self, nbytes):
+        self.connection.received(nbytes)
+
+    def eof_received(self):
+        return False  # Cierra el transporte
+
+    def connection_lost(self, exc):
+        self.connection.lost(exc)
+
+
+class DeviceConnection:
+    """Conexión de un dispositivo: reconexión, recepción, decodificación y reparto."""
+
+    def __init__(self, device, collector):
+        self.device = device
+        self.collector = collector
+        self.reader = LineReader(RECV_BUFFER_SIZE)
+        self.decoder = StreamDecoder(collector.capture_time)
+        self.samples = SampleBuffer(collector.buffer_capacity)
+        self.transport = None
+        self.paused = False
+        self.connected = False
+        self.bytes_received = 0
+        self.reconnects = 0
+        self.pauses = 0
+        self._data = asyncio.Event()
+        self._closed = asyncio.Event()
+        self._last_data = 0.0
+        self._pending_since = None  # perf_counter de la primera recepción aún sin procesar
+        self._pending_bytes = 0
+
+    # --- Llamados por el protocolo ---
+
+    def received(self, nbytes):
+        self.reader.fill += nbytes
+        self.bytes_received += nbytes
+        self._last_data = time.monotonic()
+        if self._pending_since is None:
+            self._pending_since = time.perf_counter()
+        self._pending_bytes += nbytes
+        if not self.paused and self.reader.fill >= HIGH_WATER * len(self.reader.buf):
+            # Contrapresión: el consumidor va atrasado, que TCP frene al ESP32
+            self.transport.pause_reading()
+            self.paused = True
+            self.pauses += 1
+        self._data.set()
+
+    def lost(self, exc):
+        self._closed.set()
+        self._data.set()
+
+    # --- Tareas ---
+
+    async def run(self):
+        backoff = BACKOFF_INITIAL_S
+        loop = asyncio.get_running_loop()
+        while not self.collector.stopping:
+            try:
+                self.status(f"Conectando a {self.device.host}:{self.device.port}...")
+                await asyncio.wait_for(
+                    loop.create_connection(lambda: _ReceiveProtocol(self), self.device.host, self.device.port),
+                    CONNECT_TIMEOUT_S)
+            except (OSError, asyncio.TimeoutError) as e:
+                delay = backoff * random.uniform(1.0, 1.1)
+                self.status(f"Error de conexión: {e}. Reintento en {delay:.1f} s")
+                backoff = min(backoff * 2, BACKOFF_MAX_S)
+                await self.collector.sleep(delay)
+                continue
+            self.connected = True
+            self.status(f"Conectado a {self.device.host}:{self.device.port}")
+            received_before = self.bytes_received
+            error = None
+            try:
+                await self._consume()
+            except Exception as e:
+                # Cabecera de otra versión, un sink que no puede abrir su archivo...:
+                # se corta esta conexión y se vuelve a intentar, sin terminar la tarea
+                error = e
+            finally:
+                self.connected = False
+                self.transport.close()
+                self.transport = None
+                self.reader.clear()
+                self.decoder.reset()
+                self.paused = False
+                self._closed.clear()
+            if self.collector.stopping:
+                break
+            self.reconnects += 1
+            if error is not None:
+                delay = backoff * random.uniform(1.0, 1.1)
+                self.status(f"Error al procesar los datos: {error}. Reintento en {delay:.1f} s")
+                backoff = min(backoff * 2, BACKOFF_MAX_S)
+                await self.collector.sleep(delay)
+                continue
+            if self.bytes_received > received_before:
+                backoff = BACKOFF_INITIAL_S  # La conexión funcionó: empezar de nuevo la espera
+            self.status("Conexión perdida. Reintentando...")
+
+    async def _consume(self):
+        self._last_data = time.monotonic()
+        while not self.collector.stopping and not self._closed.is_set():
+            try:
+                await asyncio.wait_for(self._data.wait(), IDLE_TIMEOUT_S)
+            except asyncio.TimeoutError:
+                if time.monotonic() - self._last_data >= IDLE_TIMEOUT_S:
+                    self.status(f"Sin datos durante {IDLE_TIMEOUT_S:.0f} s")
+                    return
+                continue
+            self._data.clear()
+            await self._process()
+        await self._process()  # Lo que quedara en el buffer al cerrarse
+
+    async def _process(self):
+        decoder = self.decoder
+        metrics = self.collector.metrics
+        t0 = time.perf_counter()
+        if self._pending_since is not None:
+            # Recepción: lo que esperaron los datos en el buffer hasta procesarse
+            metrics.record("recv", t0 - self._pending_since, self._pending_bytes)
+            self._pending_since = None
+            self._pending_bytes = 0
+        if decoder.detect(self.reader):
+            self.collector.metadata(self.device, wire_format=decoder.mode,
+                                    source=f"{self.device.host}:{self.device.port}")
+        had_header = decoder.binary is not None and decoder.binary.header is not None
+        rows = decoder.decode(self.reader)
+        t1 = time.perf_counter()
+        metrics.record("parse", t1 - t0, 0 if rows is None else len(rows))
+        if decoder.device_stats:
+            for stats in decoder.device_stats:
+                self.collector.device_stats(self.device, stats)
+            decoder.device_stats.clear()
+        if decoder.binary is not None and not had_header and decoder.binary.header is not None:
+            header = decoder.binary.header
+            self.collector.metadata(self.device, accel_range=header["accel_range"],
+                                    gyro_range=header["gyro_range"], rate_hz=header["rate_hz"],
+                                    event_mode=bool(header["flags"] & protocol.FLAG_EVENTS))
+        if rows is not None and len(rows):
+            self.samples.extend_rows(rows)
+            metrics.record("buffer", time.perf_counter() - t1, len(rows))
+            await self.collector.deliver(self.device, rows, decoder.last_line)
+        if self.paused and self.transport is not None:
+            self.paused = False
+            self.transport.resume_reading()
+
+    def wake(self):
+        """Despierta al consumidor (p. ej. para que vea que hay que parar)."""
+        self._data.set()
+
+    def status(self, text):
+        self.collector.status(self.device, text)
+
+    def stats(self):
+        return {"connected": self.connected, "samples": self.samples.total, "bytes": self.bytes_received,
+                "reconnects": self.reconnects, "pauses": self.pauses, "rejected": self.decoder.rejected,
+                "lost": self.decoder.lost, "resent": self.decoder.resent}
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def datagram_received(self, data, addr):
+        self.connection.received(data, addr)
+
+    def error_received(self, exc):
+        self.connection.status(f"Error UDP: {exc}")
+
+
+def open_udp_socket(host, port):
+    """
+    Socket UDP que recibe en `port` lo enviado por unicast o broadcast y, si
+    `host` es un grupo multicast, también lo enviado a ese grupo.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RECV_BUFFER_BYTES)
+    except OSError:
+        pass
+    multicast = ipaddress.ip_address(host).is_multicast
+    sock.bind(("", port) if multicast else (host, port))
+    if multicast:
+        membership = struct.pack("4s4s", socket.inet_aton(host), socket.inet_aton("0.0.0.0"))
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+    sock.setblocking(False)
+    return sock
+
+
+class UdpConnection:
+    """
+    Recepción UDP de un dispositivo. No hay conexión que reabrir: se escucha
+    hasta que se pide parar. Los datagramas se decodifican, se reordenan por
+    seq (protocol.DatagramReorderer) y siguen el mismo camino que los de TCP.
+    """
+
+    def __init__(self, device, collector):
+        self.device = device
+        self.collector = collector
+        self.decoder = StreamDecoder(collector.capture_time)
+        self.reorderer = protocol.DatagramReorderer(REORDER_WINDOW, REORDER_TIMEOUT_S)
+        self.samples = SampleBuffer(collector.buffer_capacity)
+        self.connected = False  # Recibiendo datagramas (en los últimos IDLE_TIMEOUT_S)
+        self.datagrams = 0
+        self.bytes_received = 0
+        self.invalid = 0
+        self.overruns = 0       # Datagramas descartados porque los sinks iban atrasados
+        self._queue = collections.deque()
+        self._data = asyncio.Event()
+        self._last_data = 0.0
+
+    def received(self, data, addr):
+        if len(self._queue) >= MAX_PENDING_DATAGRAMS:
+            self._queue.popleft()
+            self.overruns += 1
+        self._queue.append((time.perf_counter(), data))
+        self.datagrams += 1
+        self.bytes_received += len(data)
+        self._last_data = time.monotonic()
+        self._data.set()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        try:
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: _DatagramProtocol(self), sock=open_udp_socket(self.device.host, self.device.port))
+        except (OSError, ValueError) as e:
+            self.status(f"No se pudo escuchar en UDP {self.device.host}:{self.device.port}: {e}")
+            return
+        self.status(f"Escuchando UDP en {self.device.host}:{self.device.port}")
+        try:
+            while not self.collector.stopping:
+                try:
+                    await asyncio.wait_for(self._data.wait(), REORDER_TIMEOUT_S)
+                except asyncio.TimeoutError:
+                    pass
+                self._data.clear()
+                try:
+                    await self._process()
+                except Exception as e:
+                    # Sin conexión que reiniciar: se informa y se sigue escuchando
+                    self.status(f"Error al procesar los datagramas: {e}")
+                    self.decoder.reset()
+                receiving = time.monotonic() - self._last_data < IDLE_TIMEOUT_S
+                if receiving != self.connected:
+                    self.connected = receiving
+                    self.status("Recibiendo datagramas" if receiving else f"Sin datos durante {IDLE_TIMEOUT_S:.0f} s")
+        finally:
+            transport.close()
+
+    async def _process(self):
+        decoder = self.decoder
+        metrics = self.collector.metrics
+        queue = self._queue
+        t0 = time.perf_counter()
+        if queue:
+            metrics.record("recv", t0 - queue[0][0], sum(len(data) for _, data in queue))
+        while queue:
+            _, data = queue.popleft()
+            try:
+                header, frames = protocol.unpack_datagram(data)
+            except ValueError:
+                self.invalid += 1
+                continue
+            if decoder.mode is None:
+                self.collector.metadata(self.device, wire_format="binary", transport="udp",
+                                        source=f"udp://{self.device.host}:{self.device.port}",
+                                        accel_range=header["accel_range"], gyro_range=header["gyro_range"],
+                                        rate_hz=header["rate_hz"],
+                                        event_mode=bool(header["flags"] & protocol.FLAG_EVENTS))
+            decoder.start_datagrams(header)
+            # Las estadísticas no necesitan orden: se entregan ya
+            frames, stats = protocol.split_stats(frames)
+            for values in stats:
+                self.collector.device_stats(self.device, values)
+            self.reorderer.push(frames, t0)
+        ready = self.reorderer.pop_ready(time.perf_counter())
+        if not ready:
+            return
+        rows = decoder.decode_frames(ready[0] if len(ready) == 1 else np.concatenate(ready))
+        t1 = time.perf_counter()
+        metrics.record("parse", t1 - t0, 0 if rows is None else len(rows))
+        if rows is not None and len(rows):
+            self.samples.extend_rows(rows)
+            metrics.record("buffer", time.perf_counter() - t1, len(rows))
+            await self.collector.deliver(self.device, rows, decoder.last_line)
+
+    def wake(self):
+        self._data.set()
+
+    def status(self, text):
+        self.collector.status(self.device, text)
+
+    def stats(self):
+        stats = {"connected": self.connected, "samples": self.samples.total, "bytes": self.bytes_received,
+                 "datagrams": self.datagrams, "invalid": self.invalid, "overruns": self.overruns,
+                 "lost": self.decoder.lost}
+        stats.update(self.reorderer.stats())
+        return stats
+
+
+class Collector:
+    """
+    Conecta a todos los `devices` a la vez y reparte sus muestras a `sinks`.
+
+    run() es la corrutina principal; start_in_thread() la ejecuta en un hilo
+    propio (para la interfaz) y stop() la detiene desde cualquier hilo.
+    """
+
+    def __init__(self, devices, sinks=(), buffer_capacity=DEVICE_BUFFER_CAPACITY, metrics=None):
+        self.devices = list(devices)
+        self.sinks = list(sinks)
+        self.buffer_capacity = buffer_capacity
+        self.metrics = metrics or StageMetrics()
+        self.connections = {}
+        self.t0 = time.monotonic()
+        self.stopping = False
+        self._loop = None
+        self._stop = None
+        self._thread = None
+
+    def capture_time(self):
+        """Segundos desde el inicio de la captura, en el reloj del PC (común a todos los dispositivos)."""
+        return time.monotonic() - self.t0
+
+    async def run(self, duration_s=None):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        if self.stopping:
+            self._stop.set()  # stop() llegó antes de arrancar
+        self.t0 = time.monotonic()
+        self.connections = {d.name: (UdpConnection if d.transport == "udp" else DeviceConnection)(d, self)
+                            for d in self.devices}
+        tasks = [asyncio.ensure_future(c.run()) for c in self.connections.values()]
+        try:
+            if duration_s is None:
+                await self._stop.wait()
+            else:
+                await asyncio.wait_for(self._stop.wait(), duration_s)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self.stopping = True
+            self._stop.set()
+            for connection in self.connections.values():
+                connection.wake()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for sink in self.sinks:
+                sink.close()
+
+    async def sleep(self, seconds):
+        """Espera `seconds` o hasta que se pida parar."""
+        try:
+            await asyncio.wait_for(self._stop.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    def stop(self):
+        """Pide parar; seguro desde cualquier hilo."""
+        self.stopping = True
+        if self._loop is not None and self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+
+    def start_in_thread(self):
+        self._thread = threading.Thread(target=lambda: asyncio.run(self.run()), daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    async def deliver(self, device, rows, line):
+        # Contrapresión: mientras un sink esté ocupado no se le entrega nada más
+        while any(sink.busy() for sink in self.sinks) and not self.stopping:
+            await asyncio.sleep(SINK_WAIT_S)
+        t0 = time.perf_counter()
+        for sink in self.sinks:
+            try:
+                sink.on_rows(device, rows, line)
+            except Exception as e:
+                print(f"Error en {type(sink).__name__} con {device}: {e}")
+        self.metrics.record("deliver", time.perf_counter() - t0, len(rows))
+
+    def metadata(self, device, **values):
+        for sink in self.sinks:
+            sink.on_metadata(device, **values)
+
+    def status(self, device, text):
+        for sink in self.sinks:
+            sink.on_status(device, text)
+
+    def device_stats(self, device, stats):
+        for sink in self.sinks:
+            sink.on_device_stats(device, stats)
+
+    def stats(self):
+        return {name: c.stats() for name, c in self.connections.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Captura desatendida de varios ESP32 con MPU6050.")
+    parser.add_argument("devices", nargs="+",
+                        help="Dispositivos como host, host:puerto o nombre=host:puerto (udp://host:puerto para UDP)")
+    parser.add_argument("--port", type=int, default=8080, help="Puerto por defecto (8080)")
+    parser.add_argument("--out", default="recordings", help="Directorio de las grabaciones .mpurec")
+    parser.add_argument("--duration", type=float, default=None, help="Segundos de captura (sin límite por defecto)")
+    parser.add_argument("--stats", type=float, default=10.0, help="Segundos entre líneas de contadores")
+    args = parser.parse_args(argv)
+
+    devices = [Device.parse(spec, args.port) for spec in args.devices]
+    collector = Collector(devices, [RecorderSink(args.out), PrintSink(args.stats)])
+    try:
+        asyncio.run(collector.run(args.duration))
+    except KeyboardInterrupt:
+        pass  # asyncio.run cancela las tareas; las grabaciones se cierran en run()
+    for name, stats in collector.stats().items():
+        print(name, stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,91 @@
+import os
+
 import matplotlib.pyplot as plt
-import csv
+
+from decimation import Pyramid
+from loader import cache_dir, cache_is_valid, load_csv
+
+# Columns used from the CSV: time and acceleration X, Y, Z
+USE_COLUMNS = [0, 1, 2, 3]
+
+
+def load_pyramid(filename, t, values):
+    """
+    Returns the min/max pyramid for the file, building it only when the
+    cached one is missing or older than the CSV.
+    """
+    path = os.path.join(cache_dir(filename), "pyramid.npz")
+    if cache_is_valid(filename, "pyramid.npz"):
+        return Pyramid.load(path)
+    pyramid = Pyramid.build(t, values)
+    if os.path.isdir(cache_dir(filename)):
+        pyramid.save(path)
+    return pyramid
+
+
+class DecimatedLine:
+    """
+    Line that only draws about one min/max pair per pixel of its axis and
+    redraws from the pyramid whenever the visible time range changes.
+    """
+
+    def __init__(self, ax, t, y, pyramid, channel, **kwargs):
+        self.ax = ax
+        self.t = t
+        self.y = y
+        self.pyramid = pyramid
+        self.channel = channel
+        (self.line,) = ax.plot([], [], **kwargs)
+        # Matplotlib keeps only weak references to bound methods; the lambda keeps this object alive
+        ax.callbacks.connect('xlim_changed', lambda ax: self.update())
+
+    def update(self):
+        t_start, t_end = self.ax.get_xlim()
+        pixels = max(int(self.ax.get_window_extent().width), 1)
+        envelope = self.pyramid.query(t_start, t_end, self.channel, pixels)
+        if envelope is None:
+            # Few samples in range: draw the raw data
+            i0 = max(self.t.searchsorted(t_start) - 1, 0)
+            i1 = self.t.searchsorted(t_end) + 1
+            envelope = (self.t[i0:i1], self.y[i0:i1])
+        self.line.set_data(*envelope)
+
 
 def plot_acceleration_from_csv(filename="sensor_data_wifi.csv"):
     """
     Reads acceleration data from a CSV file and plots it.
+
+    The file is parsed in vectorized chunks and cached next to it; the plots
+    are decimated to the screen resolution, so long recordings stay responsive.
     """
-    time = []
-    acc_x = []
-    acc_y = []
-    acc_z = []
-
-    with open(filename, mode='r') as file:
-        reader = csv.reader(file)
-        header = next(reader)  # Skip the header row
-        for row in reader:
-            try:
-                t, x, y, z, _, _, _ = row  # Unpack the row, ignore angles
-                time.append(float(t))
-                acc_x.append(float(x))
-                acc_y.append(float(y))
-                acc_z.append(float(z))
-            except ValueError as e:
-                print(f"Error processing row: {row} - {e}")
-                continue
+    _, data = load_csv(filename)
+    data = data[:, USE_COLUMNS]
+    time = data[:, 0]
+    pyramid = load_pyramid(filename, time, data[:, 1:])
 
     # Create the plots
-    fig, axes = plt.subplots(1, 3, figsize=(15, 5))
-
-    axes[0].plot(time, acc_x, label='Acc X')
-    axes[0].set_xlabel('Tiempo (s)')
-    axes[0].set_ylabel('Aceleración (m/s^2)')
-    axes[0].set_title('Aceleración en X')
-    axes[0].legend()
-    axes[0].grid(True)
-
-    axes[1].plot(time, acc_y, label='Acc Y', color='orange')
-    axes[1].set_xlabel('Tiempo (s)')
-    axes[1].set_ylabel('Aceleración (m/s^2)')
-    axes[1].set_title('Aceleración en Y')
-    axes[1].legend()
-    axes[1].grid(True)
-
-    axes[2].plot(time, acc_z, label='Acc Z', color='green')
-    axes[2].set_xlabel('Tiempo (s)')
-    axes[2].set_ylabel('Aceleración (m/s^2)')
-    axes[2].set_title('Aceleración en Z')
-    axes[2].legend()
-    axes[2].grid(True)
+    fig, axes = plt.subplots(1, 3, figsize=(15, 5), sharex=True)
+
+    lines = []
+    for channel, (ax, axis, color) in enumerate(zip(axes, "XYZ", [None, 'orange', 'green'])):
+        lines.append(DecimatedLine(ax, time, data[:, channel + 1], pyramid, channel,
+                                   label=f'Acc {axis}', color=color))
+        ax.set_xlabel('Tiempo (s)')
+        ax.set_ylabel('Aceleración (m/s^2)')
+        ax.set_title(f'Aceleración en {axis}')
+        ax.legend()
+        ax.grid(True)
+        if len(time):
+            ax.set_xlim(time[0], time[-1])
+            low, high = pyramid.levels[-1][2][:, channel].min(), pyramid.levels[-1][3][:, channel].max()
+            margin = 0.05 * (high - low) or 1.0
+            ax.set_ylim(low - margin, high + margin)
 
     plt.tight_layout()  # Adjust layout to prevent overlapping plots
+    for line in lines:
+        line.update()  # Pixel widths are final after tight_layout
     plt.show()
 
+
 if __name__ == "__main__":
     plot_acceleration_from_csv()
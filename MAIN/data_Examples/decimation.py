@@ -0,0 +1,90 @@
+import os
+
+import numpy as np
+
+
+class Pyramid:
+    """
+    Min/max envelopes of a multi-channel signal at several zoom levels.
+
+    Level k groups base * factor**k samples per bucket and stores, for each
+    bucket, its first time and the min and max of every channel. Plotting a
+    range at a given pixel width only touches the level with about one
+    bucket per pixel, so a 10M-sample recording draws as fast as a short one.
+    """
+
+    def __init__(self, levels):
+        # levels: list of (bucket_size, t, ymin, ymax) from finest to coarsest
+        self.levels = levels
+
+    @classmethod
+    def build(cls, t, values, base=16, factor=8, min_buckets=512):
+        t = np.asarray(t)
+        values = np.asarray(values, dtype=float)
+        if values.ndim == 1:
+            values = values[:, None]
+        levels = []
+        size = base
+        # The first level comes from the raw data, the next ones from the previous level
+        ymin, ymax, bt = _reduce(values, values, t, base)
+        while True:
+            levels.append((size, bt, ymin, ymax))
+            if len(bt) <= min_buckets:
+                break
+            ymin, _, _ = _reduce(ymin, ymin, bt, factor)
+            _, ymax, bt = _reduce(ymax, ymax, bt, factor)
+            size *= factor
+        return cls(levels)
+
+    def query(self, t_start, t_end, channel, pixels):
+        """
+        Returns (x, y) for the envelope of `channel` between t_start and t_end,
+        from the finest level with at most `pixels` buckets in range, or None
+        when the raw samples in range are few enough to draw them directly.
+        """
+        for k, (size, bt, ymin, ymax) in enumerate(self.levels):
+            i0 = max(np.searchsorted(bt, t_start, side='right') - 1, 0)
+            i1 = np.searchsorted(bt, t_end, side='right')
+            if k == 0 and (i1 - i0) * size <= 2 * pixels:
+                return None
+            if i1 - i0 <= pixels or k == len(self.levels) - 1:
+                return _envelope(bt[i0:i1], ymin[i0:i1, channel], ymax[i0:i1, channel])
+
+    def save(self, path):
+        arrays = {}
+        for k, (size, bt, ymin, ymax) in enumerate(self.levels):
+            arrays[f"size_{k}"] = np.array(size)
+            arrays[f"t_{k}"] = bt
+            arrays[f"min_{k}"] = ymin
+            arrays[f"max_{k}"] = ymax
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            n_levels = sum(1 for key in data.files if key.startswith("size_"))
+            return cls([(int(data[f"size_{k}"]), data[f"t_{k}"], data[f"min_{k}"], data[f"max_{k}"])
+                        for k in range(n_levels)])
+
+
+def _reduce(lo_values, hi_values, t, size):
+    # Min of lo_values and max of hi_values over consecutive groups of `size` rows
+    n = len(t)
+    n_full = n // size
+    cut = n_full * size
+    channels = lo_values.shape[1]
+    ymin = np.fmin.reduce(lo_values[:cut].reshape(n_full, size, channels), axis=1)
+    ymax = np.fmax.reduce(hi_values[:cut].reshape(n_full, size, channels), axis=1)
+    bt = t[:cut:size]
+    if cut < n:
+        ymin = np.vstack([ymin, np.fmin.reduce(lo_values[cut:], axis=0)])
+        ymax = np.vstack([ymax, np.fmax.reduce(hi_values[cut:], axis=0)])
+        bt = np.append(bt, t[cut])
+    return ymin, ymax, bt
+
+
+def _envelope(bt, lo, hi):
+    # Each bucket becomes a vertical segment from its min to its max
+    return np.repeat(bt, 2), np.column_stack([lo, hi]).ravel()
@@ -0,0 +1,234 @@
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from loader import CHUNK_BYTES, cache_dir, cache_is_valid, iter_csv_chunks, prepare_cache
+
+# Columns of the CSV files written by INTERFAZ.PY: time and acceleration X, Y, Z
+TIME_COLUMN = 0
+ACCEL_COLUMNS = [1, 2, 3]
+
+WINDOW_S = 2.0
+HOP_S = 0.5
+# Frequency bands (Hz) of the FFT band energies; bands above Nyquist come out as 0
+BANDS_HZ = ((0.0, 1.0), (1.0, 3.0), (3.0, 6.0), (6.0, 12.0), (12.0, 25.0))
+# Samples processed at once by the vectorized window code (windows x window length)
+BLOCK_SAMPLES = 1 << 19
+# Rows at the start of a recording used to estimate its sample period
+RATE_ESTIMATE_ROWS = 1000
+FEATURES_FILE = "features.npz"
+
+
+def feature_names(bands=BANDS_HZ):
+    """
+    Names of the feature columns, in order. Dynamic quantities (RMS, peak,
+    spectrum) are computed after removing each window's mean, so gravity does
+    not dominate them; "mag" is the norm of the acceleration vector.
+    """
+    names = [f"rms_{axis}" for axis in "xyz"] + ["rms_mag"]
+    names += [f"peak_{axis}" for axis in "xyz"] + ["peak_mag"]
+    names += ["jerk_rms", "jerk_peak"]
+    names += [f"band_{low:g}_{high:g}hz" for low, high in bands]
+    names += ["dominant_hz"]
+    names += ["tilt_mean", "tilt_std", "tilt_min", "tilt_max", "roll_mean", "pitch_mean"]
+    return names
+
+
+def window_features(windows, dt, bands=BANDS_HZ):
+    """
+    Features of a block of acceleration windows with shape (n, length, 3) in
+    m/s^2, sampled every dt seconds. Returns an array (n, len(feature_names())).
+    """
+    n, length, _ = windows.shape
+    dynamic = windows - windows.mean(axis=1, keepdims=True)
+    magnitude = np.linalg.norm(windows, axis=2)
+    magnitude_dynamic = magnitude - magnitude.mean(axis=1, keepdims=True)
+
+    rms = np.sqrt(np.mean(dynamic * dynamic, axis=1))
+    rms_mag = np.sqrt(np.mean(magnitude_dynamic * magnitude_dynamic, axis=1))
+    peak = np.abs(dynamic).max(axis=1)
+    peak_mag = np.abs(magnitude_dynamic).max(axis=1)
+
+    jerk = np.linalg.norm(np.diff(windows, axis=1), axis=2) / dt
+    jerk_rms = np.sqrt(np.mean(jerk * jerk, axis=1))
+    jerk_peak = jerk.max(axis=1)
+
+    # Power spectrum of the magnitude with a Hann window, energy per band
+    power = np.abs(np.fft.rfft(magnitude_dynamic * np.hanning(length), axis=1)) ** 2 / length
+    freqs = np.fft.rfftfreq(length, dt)
+    band_energy = np.stack([power[:, (freqs >= low) & (freqs < high)].sum(axis=1) for low, high in bands], axis=1)
+    dominant = freqs[1:][power[:, 1:].argmax(axis=1)] if len(freqs) > 1 else np.zeros(n)
+
+    # Tilt: angle between the acceleration and the sensor Z axis, in degrees
+    ax, ay, az = windows[:, :, 0], windows[:, :, 1], windows[:, :, 2]
+    tilt = np.degrees(np.arccos(np.clip(az / np.maximum(magnitude, 1e-9), -1.0, 1.0)))
+    roll = np.degrees(np.arctan2(ay, np.sqrt(ax * ax + az * az)))
+    pitch = np.degrees(np.arctan2(-ax, np.sqrt(ay * ay + az * az)))
+
+    return np.column_stack([
+        rms, rms_mag, peak, peak_mag, jerk_rms, jerk_peak, band_energy, dominant,
+        tilt.mean(axis=1), tilt.std(axis=1), tilt.min(axis=1), tilt.max(axis=1),
+        roll.mean(axis=1), pitch.mean(axis=1),
+    ])
+
+
+def iter_rows(filename, chunk_bytes=CHUNK_BYTES):
+    """
+    Yields (time, accel) chunks of the file. Reuses the parsed data cached by
+    loader.load_csv when it is valid, otherwise parses the CSV chunk by chunk.
+    """
+    columns = [TIME_COLUMN] + ACCEL_COLUMNS
+    if cache_is_valid(filename):
+        data = np.load(os.path.join(cache_dir(filename), "data.npy"), mmap_mode='r')
+        step = max(1, chunk_bytes // (8 * data.shape[1]))
+        chunks = (np.asarray(data[start:start + step, columns]) for start in range(0, len(data), step))
+    else:
+        chunks = iter_csv_chunks(filename, chunk_bytes, usecols=columns)
+    for chunk in chunks:
+        if len(chunk):
+            yield chunk[:, 0], chunk[:, 1:4]
+
+
+def stream_features(chunks, window_s=WINDOW_S, hop_s=HOP_S, bands=BANDS_HZ):
+    """
+    Sliding-window features over a stream of (time, accel) chunks. Windows
+    start every hop_s seconds and span window_s seconds; the sample period is
+    the median time step of the first RATE_ESTIMATE_ROWS rows. Rows that a
+    window still needs are carried over to the next chunk, so the result does
+    not depend on how the stream is split. Returns (window center times,
+    features, sample rate in Hz).
+    """
+    times_out = []
+    features_out = []
+    carry_t = np.empty(0)
+    carry_a = np.empty((0, 3))
+    dt = length = hop = None
+    for t, accel in itertools.chain(chunks, [(None, None)]):
+        end = t is None
+        if end:
+            t, accel = carry_t, carry_a
+        else:
+            t = np.concatenate([carry_t, t])
+            accel = np.concatenate([carry_a, accel])
+        if dt is None:
+            if len(t) < RATE_ESTIMATE_ROWS and not end:
+                carry_t, carry_a = t, accel
+                continue
+            steps = np.diff(t[:RATE_ESTIMATE_ROWS])
+            steps = steps[steps > 0]
+            if len(steps) == 0:
+                break
+            dt = float(np.median(steps))
+            length = max(2, int(round(window_s / dt)))
+            hop = max(1, int(round(hop_s / dt)))
+        n_windows = (len(t) - length) // hop + 1 if len(t) >= length else 0
+        if n_windows > 0:
+            views = sliding_window_view(accel, length, axis=0)[::hop][:n_windows]
+            per_block = max(1, BLOCK_SAMPLES // length)
+            for start in range(0, n_windows, per_block):
+                block = views[start:start + per_block].transpose(0, 2, 1)
+                features_out.append(window_features(block, dt, bands))
+            starts = np.arange(n_windows) * hop
+            times_out.append((t[starts] + t[starts + length - 1]) / 2)
+        keep = n_windows * hop
+        carry_t, carry_a = t[keep:], accel[keep:]
+    if not features_out:
+        return np.empty(0), np.empty((0, len(feature_names(bands)))), (1.0 / dt if dt else 0.0)
+    return np.concatenate(times_out), np.concatenate(features_out), 1.0 / dt
+
+
+def _params(window_s, hop_s, bands):
+    return json.dumps({"window_s": window_s, "hop_s": hop_s, "bands": [list(b) for b in bands],
+                       "columns": feature_names(bands)})
+
+
+def file_features(filename, window_s=WINDOW_S, hop_s=HOP_S, bands=BANDS_HZ, use_cache=True):
+    """
+    Features of one recording as a dict with "t" (window centers), "rate_hz"
+    and one array per name in feature_names(). The result is cached in
+    cache_dir(filename) and reused while the file and the parameters are the
+    same; editing the CSV makes the next call recompute it.
+    """
+    params = _params(window_s, hop_s, bands)
+    path = os.path.join(cache_dir(filename), FEATURES_FILE)
+    if use_cache and cache_is_valid(filename, FEATURES_FILE):
+        with np.load(path) as cached:
+            if str(cached["params"]) == params:
+                return _as_dict(cached["t"], cached["features"], float(cached["rate_hz"]), bands)
+    t, features, rate_hz = stream_features(iter_rows(filename), window_s, hop_s, bands)
+    if use_cache:
+        np.savez(os.path.join(prepare_cache(filename), FEATURES_FILE),
+                 t=t, features=features, rate_hz=rate_hz, params=params)
+    return _as_dict(t, features, rate_hz, bands)
+
+
+def _as_dict(t, features, rate_hz, bands):
+    result = {"t": t, "rate_hz": rate_hz}
+    result.update(zip(feature_names(bands), features.T))
+    return result
+
+
+def _file_features_job(args):
+    filename, window_s, hop_s, bands, use_cache = args
+    return filename, file_features(filename, window_s, hop_s, bands, use_cache)
+
+
+def extract_many(filenames, window_s=WINDOW_S, hop_s=HOP_S, bands=BANDS_HZ, use_cache=True, workers=None):
+    """
+    Computes file_features() for many recordings with a process pool (one file
+    per task; workers=None uses every CPU, workers=1 runs in this process).
+    Returns {filename: features} in the order of `filenames`.
+    """
+    filenames = list(dict.fromkeys(filenames))
+    jobs = [(filename, window_s, hop_s, bands, use_cache) for filename in filenames]
+    if workers == 1 or len(jobs) <= 1:
+        return dict(map(_file_features_job, jobs))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(pool.map(_file_features_job, jobs))
+
+
+def write_features_csv(results, filename, bands=BANDS_HZ):
+    """Writes the features of every recording to one CSV with a "file" column."""
+    names = feature_names(bands)
+    with open(filename, mode='w', newline='') as file:
+        file.write(",".join(["file", "t"] + names) + "\n")
+        for source, result in results.items():
+            table = np.column_stack([result["t"]] + [result[name] for name in names])
+            label = os.path.basename(source).replace(",", " ")
+            for row in table:
+                file.write(label + "," + ",".join(f"{v:.6g}" for v in row) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Windowed motion features for recorded CSV sessions.")
+    parser.add_argument("files", nargs="+", help="CSV files written by INTERFAZ.PY")
+    parser.add_argument("--window", type=float, default=WINDOW_S, help="Window length in seconds")
+    parser.add_argument("--hop", type=float, default=HOP_S, help="Seconds between window starts")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: all CPUs)")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute and do not write the cache")
+    parser.add_argument("--out", default=None, help="Write all features to this CSV file")
+    args = parser.parse_args()
+
+    results = extract_many(args.files, args.window, args.hop, use_cache=not args.no_cache, workers=args.workers)
+    for source, result in results.items():
+        n = len(result["t"])
+        if n == 0:
+            print(f"{source}: too short for a {args.window:g} s window")
+            continue
+        print(f"{source}: {n} windows at {result['rate_hz']:.1f} Hz, "
+              f"RMS {np.median(result['rms_mag']):.3f} m/s^2 (median), "
+              f"peak {result['peak_mag'].max():.3f} m/s^2, "
+              f"dominant {np.median(result['dominant_hz']):.2f} Hz (median), "
+              f"tilt {result['tilt_mean'].mean():.1f} deg (mean)")
+    if args.out:
+        write_features_csv(results, args.out)
+        print(f"Features written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
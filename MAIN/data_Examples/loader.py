@@ -0,0 +1,153 @@
+import json
+import os
+
+import numpy as np
+
+try:
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow is optional; the NumPy parser below is used instead
+    pa_csv = None
+
+CHUNK_BYTES = 16 * 1024 * 1024
+CACHE_SUFFIX = ".cache"
+
+
+def read_header(filename):
+    """
+    Returns the column names from the first line of a CSV file.
+    """
+    with open(filename, mode='r', encoding='utf-8') as file:
+        return [name.strip() for name in file.readline().split(',')]
+
+
+def _parse_rows_slow(block, n_cols):
+    # Row by row, skipping malformed rows like the original loader did
+    rows = []
+    for line in block.splitlines():
+        fields = line.split(b',')
+        if len(fields) != n_cols:
+            if line.strip():
+                print(f"Error processing row: {line!r} - expected {n_cols} columns")
+            continue
+        try:
+            rows.append([float(v) for v in fields])
+        except ValueError as e:
+            print(f"Error processing row: {line!r} - {e}")
+    return np.array(rows, dtype=np.float64).reshape(-1, n_cols)
+
+
+def _parse_block(block, n_cols):
+    # Fast path: one split over the whole block and a single float conversion
+    n_lines = block.count(b'\n')
+    tokens = block.replace(b',', b' ').split()
+    if n_lines and len(tokens) == n_lines * n_cols:
+        try:
+            return np.array(tokens, dtype=np.float64).reshape(n_lines, n_cols)
+        except ValueError:
+            pass
+    return _parse_rows_slow(block, n_cols)
+
+
+def _iter_numpy_chunks(filename, chunk_bytes):
+    with open(filename, mode='rb') as file:
+        n_cols = len(file.readline().split(b','))
+        rest = b''
+        while True:
+            block = file.read(chunk_bytes)
+            if not block:
+                if rest.strip():
+                    yield _parse_block(rest + b'\n', n_cols)
+                return
+            block = rest + block
+            cut = block.rfind(b'\n') + 1
+            rest = block[cut:]
+            if cut:
+                yield _parse_block(block[:cut], n_cols)
+
+
+def _iter_arrow_chunks(filename, chunk_bytes):
+    n_cols = len(read_header(filename))
+    reader = pa_csv.open_csv(
+        filename,
+        read_options=pa_csv.ReadOptions(block_size=chunk_bytes),
+        parse_options=pa_csv.ParseOptions(invalid_row_handler=lambda row: 'skip'),
+    )
+    for batch in reader:
+        yield np.column_stack([batch.column(i).to_numpy(zero_copy_only=False).astype(np.float64)
+                               for i in range(n_cols)])
+
+
+def iter_csv_chunks(filename, chunk_bytes=CHUNK_BYTES, usecols=None):
+    """
+    Reads a numeric CSV file (with a header row) in chunks of about chunk_bytes.
+    Yields float64 arrays of shape (rows, columns); usecols selects columns.
+    Uses pyarrow when it is installed, otherwise a vectorized NumPy parser.
+    """
+    chunks = _iter_arrow_chunks(filename, chunk_bytes) if pa_csv is not None else _iter_numpy_chunks(filename, chunk_bytes)
+    for chunk in chunks:
+        yield chunk if usecols is None else chunk[:, usecols]
+
+
+def cache_dir(filename):
+    """
+    Directory next to the source file where parsed columns and pyramids are cached.
+    """
+    return filename + CACHE_SUFFIX
+
+
+def _source_signature(filename):
+    stat = os.stat(filename)
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def cache_is_valid(filename, name="data.npy"):
+    """
+    True if the cached file `name` exists and the source CSV has not changed since.
+    """
+    directory = cache_dir(filename)
+    try:
+        with open(os.path.join(directory, "source.json"), mode='r') as file:
+            signature = json.load(file)
+    except (OSError, ValueError):
+        return False
+    return signature == _source_signature(filename) and os.path.exists(os.path.join(directory, name))
+
+
+def prepare_cache(filename):
+    """
+    Returns cache_dir(filename), created for the current version of the file.
+    If the file changed since the cache was written, everything cached for the
+    older version (data, pyramids, features) is removed first.
+    """
+    directory = cache_dir(filename)
+    signature = _source_signature(filename)
+    try:
+        with open(os.path.join(directory, "source.json"), mode='r') as file:
+            if json.load(file) == signature:
+                return directory
+    except (OSError, ValueError):
+        pass
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        os.remove(os.path.join(directory, name))
+    with open(os.path.join(directory, "source.json"), mode='w') as file:
+        json.dump(signature, file)
+    return directory
+
+
+def load_csv(filename, use_cache=True):
+    """
+    Loads a numeric CSV file as (header, data) where data has shape (rows, columns).
+
+    The parsed array is cached as data.npy in cache_dir(filename) and reopened
+    with a memory map the next time, as long as the CSV is unchanged.
+    """
+    header = read_header(filename)
+    if use_cache and cache_is_valid(filename):
+        return header, np.load(os.path.join(cache_dir(filename), "data.npy"), mmap_mode='r')
+
+    chunks = list(iter_csv_chunks(filename))
+    data = np.concatenate(chunks) if chunks else np.empty((0, len(header)))
+    if use_cache:
+        np.save(os.path.join(prepare_cache(filename), "data.npy"), data)
+    return header, data
@@ -0,0 +1,155 @@
+# Eventos de una grabación hecha con el ESP32 en modo evento.
+#
+# Con EVENT_MODE = True (main.py, motion_trigger.py) el ESP32 solo envía las
+# ventanas con movimiento, cada una con su contexto previo y posterior, y una
+# muestra de latido de vez en cuando mientras está en reposo. El colector las
+# guarda tal cual en un solo .mpurec, con huecos entre ellas; aquí se separan
+# por esos huecos en un .mpurec por evento (más uno con los latidos), en el
+# mismo formato de recording.py, y se resume el ahorro frente a grabar el
+# flujo continuo.
+#
+# Necesita una grabación en binario: en modo texto el tiempo de cada muestra
+# es el de llegada y los huecos entre eventos no se distinguen.
+#
+# Uso (desde MAIN/):
+#   python events.py recordings/sesion_20250101_120000_sim.mpurec --out eventos
+#   python events.py recordings/*.mpurec --summary
+
+import argparse
+import os
+
+import numpy as np
+
+import protocol
+from recording import FILE_EXTENSION, RECORD_SIZE, SessionRecorder, open_recording
+from sample_buffer import T
+
+# Un hueco de más de estos periodos de muestreo separa dos tramos
+GAP_PERIODS = 5
+# Los tramos con menos muestras son latidos, no eventos
+MIN_EVENT_SAMPLES = 2
+
+
+def recording_rate_hz(recording):
+    """Frecuencia de la cabecera o, si no está, la mediana entre muestras."""
+    rate_hz = recording.metadata.get("rate_hz")
+    if rate_hz:
+        return float(rate_hz)
+    steps = np.diff(recording.time[:100000])
+    steps = steps[steps > 0]
+    if len(steps) == 0:
+        raise ValueError(f"{recording.path}: no se puede deducir la frecuencia de muestreo")
+    return 1.0 / float(np.median(steps))
+
+
+def find_runs(times, rate_hz, gap_periods=GAP_PERIODS):
+    """(inicio, fin) de cada tramo de muestras sin huecos de más de gap_periods periodos."""
+    if len(times) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(times) > gap_periods / rate_hz) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [len(times)]))
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def split_events(recording, rate_hz=None, gap_periods=GAP_PERIODS, min_samples=MIN_EVENT_SAMPLES):
+    """
+    Separa la grabación en eventos y latidos. Devuelve (eventos, latidos):
+    listas de (inicio, fin) de índices de recording.data.
+    """
+    rate_hz = rate_hz or recording_rate_hz(recording)
+    events = []
+    heartbeats = []
+    for start, end in find_runs(recording.time, rate_hz, gap_periods):
+        (events if end - start >= min_samples else heartbeats).append((start, end))
+    return events, heartbeats
+
+
+def write_events(recording, directory, rate_hz=None, gap_periods=GAP_PERIODS, heartbeats=True):
+    """
+    Escribe cada evento de `recording` como <nombre>_evento_NNN.mpurec en
+    `directory` y, si `heartbeats`, los latidos en <nombre>_latidos.mpurec.
+    La cabecera de cada archivo es la de la grabación original más el número
+    de evento y su intervalo. Devuelve las rutas escritas.
+    """
+    events, beats = split_events(recording, rate_hz, gap_periods)
+    stem = os.path.splitext(os.path.basename(recording.path))[0]
+    data = recording.data
+    paths = []
+    for number, (start, end) in enumerate(events, 1):
+        path = os.path.join(directory, f"{stem}_evento_{number:03d}{FILE_EXTENSION}")
+        metadata = dict(recording.metadata, source_recording=os.path.basename(recording.path), event=number,
+                        event_start=float(data[start, T]), event_end=float(data[end - 1, T]))
+        recorder = SessionRecorder(path, metadata)
+        recorder.write_rows(data[start:end])
+        recorder.close()
+        paths.append(path)
+    if heartbeats and beats:
+        path = os.path.join(directory, f"{stem}_latidos{FILE_EXTENSION}")
+        recorder = SessionRecorder(path, dict(recording.metadata, source_recording=os.path.basename(recording.path)))
+        recorder.write_rows(data[np.concatenate([np.arange(s, e) for s, e in beats])])
+        recorder.close()
+        paths.append(path)
+    return paths
+
+
+def summarize(recording, rate_hz=None, gap_periods=GAP_PERIODS):
+    """
+    Resumen de la sesión: eventos, latidos y muestras frente a las que habría
+    enviado y grabado el flujo continuo durante el mismo tiempo.
+    """
+    rate_hz = rate_hz or recording_rate_hz(recording)
+    events, beats = split_events(recording, rate_hz, gap_periods)
+    samples = len(recording)
+    duration_s = float(recording.time[-1] - recording.time[0]) + 1.0 / rate_hz if samples else 0.0
+    continuous = duration_s * rate_hz
+    return {
+        "duration_s": duration_s,
+        "rate_hz": rate_hz,
+        "events": len(events),
+        "event_s": sum(float(recording.time[e - 1] - recording.time[s]) for s, e in events),
+        "heartbeats": sum(e - s for s, e in beats),
+        "samples": samples,
+        "continuous_samples": continuous,
+        "wire_bytes": samples * protocol.FRAME_SIZE,
+        "continuous_wire_bytes": continuous * protocol.FRAME_SIZE,
+        "disk_bytes": samples * RECORD_SIZE,
+        "continuous_disk_bytes": continuous * RECORD_SIZE,
+        "reduction": continuous / samples if samples else 0.0,
+    }
+
+
+def format_summary(path, summary):
+    return (f"{path}: {summary['duration_s']:.1f} s a {summary['rate_hz']:g} Hz, "
+            f"{summary['events']} eventos ({summary['event_s']:.1f} s), {summary['heartbeats']} latidos\n"
+            f"  Muestras: {summary['samples']:,} de {summary['continuous_samples']:,.0f} en continuo "
+            f"(x{summary['reduction']:.1f} menos); por Wi-Fi {summary['wire_bytes'] / 1024:,.1f} KiB "
+            f"frente a {summary['continuous_wire_bytes'] / 1024:,.1f} KiB, en disco "
+            f"{summary['disk_bytes'] / 1024:,.1f} KiB frente a {summary['continuous_disk_bytes'] / 1024:,.1f} KiB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Separa en eventos las grabaciones .mpurec hechas en modo evento.")
+    parser.add_argument("recordings", nargs="+", help="Archivos .mpurec")
+    parser.add_argument("--out", default="eventos", help="Directorio de los .mpurec por evento")
+    parser.add_argument("--rate", type=float, default=None, help="Hz si la grabación no lo indica")
+    parser.add_argument("--gap", type=float, default=GAP_PERIODS,
+                        help="Periodos de muestreo sin datos que separan dos eventos")
+    parser.add_argument("--summary", action="store_true", help="Solo muestra el resumen, sin escribir archivos")
+    args = parser.parse_args(argv)
+
+    for path in args.recordings:
+        recording = open_recording(path)
+        if len(recording) == 0:
+            print(f"{path}: vacía")
+            continue
+        if not recording.metadata.get("event_mode"):
+            print(f"Aviso: {path} no se grabó en modo evento")
+        print(format_summary(path, summarize(recording, args.rate, args.gap)))
+        if not args.summary:
+            for written in write_events(recording, args.out, args.rate, args.gap):
+                print("  ->", written)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# Lectura rápida del flujo de texto del ESP32 en el PC.
+#
+# LineReader recibe con recv_into sobre un bytearray preasignado y entrega
+# de una vez todas las líneas completas del bloque recibido, sin concatenar
+# bytes inmutables ni partir línea a línea. parse_text_block convierte ese
+# bloque a un array (N, 6) sin expresiones regulares: el formato del ESP32 es
+# fijo, así que basta con quitar las etiquetas y convertir los números.
+
+import re
+
+import numpy as np
+
+# "Aceleración (m/s²) -> X: a Y: b Z: c | Ángulos (grados) -> X: d Y: e Z: f"
+# Sin "->" y sin ningún byte que no pueda formar parte de un número quedan
+# exactamente los 6 valores de cada línea.
+_NON_NUMERIC = bytes(c for c in range(256) if c not in b"0123456789.-+ \t\r\n")
+
+# Separado por espacios da siempre 19 tokens; los números están en estas posiciones
+_TOKENS_PER_LINE = 19
+_VALUE_COLUMNS = [4, 6, 8, 14, 16, 18]
+_CHECK_COLUMNS = {3: b"X:", 5: b"Y:", 7: b"Z:", 9: b"|", 13: b"X:", 15: b"Y:", 17: b"Z:"}
+
+# Respaldo para líneas con espacios irregulares; mismo patrón que usaba INTERFAZ.PY
+data_pattern = re.compile(
+    r"Aceleración \(m/s²\) -> X:\s*([+-]?\d+\.\d+)\s*Y:\s*([+-]?\d+\.\d+)\s*Z:\s*([+-]?\d+\.\d+)\s*\|"
+    r"\s*Ángulos \(grados\) -> X:\s*([+-]?\d+\.\d+)\s*Y:\s*([+-]?\d+\.\d+)\s*Z:\s*([+-]?\d+\.\d+)".encode("utf-8")
+)
+
+
+class LineReader:
+    """
+    Buffer de recepción de tamaño fijo (crece solo si una línea no cabe).
+
+    recv(sock) llena el buffer con sock.recv_into; take_lines() devuelve un
+    bloque bytes con todas las líneas completas y deja el resto pendiente.
+    """
+
+    def __init__(self, size=1 << 16):
+        self.buf = bytearray(size)
+        self.mv = memoryview(self.buf)
+        self.fill = 0
+
+    def recv(self, sock):
+        """Recibe del socket; lanza ConnectionError si el otro extremo cerró."""
+        if self.fill == len(self.buf):
+            self._grow()
+        n = sock.recv_into(self.mv[self.fill:])
+        if n == 0:
+            raise ConnectionError("Conexión perdida con ESP32.")
+        self.fill += n
+        return n
+
+    def _grow(self):
+        self.mv.release()
+        self.buf.extend(bytes(len(self.buf)))
+        self.mv = memoryview(self.buf)
+
+    def peek(self, n):
+        return bytes(self.mv[:min(n, self.fill)])
+
+    def take_all(self):
+        """Devuelve y vacía todo lo recibido (para el modo binario)."""
+        data = bytes(self.mv[:self.fill])
+        self.fill = 0
+        return data
+
+    def take_lines(self):
+        """Devuelve el bloque de líneas completas (termina en b'\\n'), o b'' si no hay."""
+        end = self.buf.rfind(b"\n", 0, self.fill) + 1
+        if end == 0:
+            return b""
+        block = bytes(self.mv[:end])
+        rest = self.fill - end
+        self.buf[:rest] = bytes(self.mv[end:self.fill])  # Solo la línea incompleta
+        self.fill = rest
+        return block
+
+    def clear(self):
+        self.fill = 0
+
+
+def _parse_lines_slow(lines):
+    """Línea a línea: tokens si el formato es el esperado, si no la expresión regular."""
+    rows = []
+    rejected = 0
+    for line in lines:
+        tokens = line.split()
+        if not tokens:
+            continue
+        if len(tokens) == _TOKENS_PER_LINE and all(tokens[i] == v for i, v in _CHECK_COLUMNS.items()):
+            values = [tokens[i] for i in _VALUE_COLUMNS]
+        else:
+            match = data_pattern.search(line)
+            if not match:
+                rejected += 1
+                continue
+            values = match.groups()
+        try:
+            rows.append([float(v) for v in values])
+        except ValueError:
+            rejected += 1
+    return np.array(rows, dtype=np.float64).reshape(-1, 6), rejected
+
+
+def parse_text_block(block):
+    """
+    Convierte un bloque de líneas completas a un array (N, 6):
+    Acc X, Acc Y, Acc Z (m/s²), Ang X, Ang Y, Ang Z (grados).
+    Devuelve (valores, líneas rechazadas).
+
+    Camino rápido: se comprueba la estructura contando separadores, se
+    borran de una vez todas las etiquetas (bytes.replace/translate, en C) y
+    los números restantes se convierten a float en una sola llamada a numpy.
+    Si algo no encaja se cae al análisis línea a línea.
+    """
+    n = block.count(b"\n")
+    if n and block.count(b"|") == n and block.count(b"X:") == 2 * n:
+        numbers = block.replace(b"->", b"").translate(None, _NON_NUMERIC).split()
+        if len(numbers) == 6 * n:
+            try:
+                return np.array(numbers, dtype=np.float64).reshape(n, 6), 0
+            except ValueError:
+                pass
+    return _parse_lines_slow(block.splitlines())
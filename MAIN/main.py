@@ -4,16 +4,107 @@
 
 from MPU6050 import MPU6050 # Asegúrate de que esta librería (MPU6050.py) esté en tu ESP32
 from machine import Pin      # Aunque no se use directamente para I2C, se mantiene por si es necesario
-from time import sleep_ms
-import math                  # Para funciones matemáticas como atan2 y degrees
+from machine import Timer
+from time import sleep_ms, ticks_us, ticks_ms, ticks_diff
 import network
+import gc
 import socket
+import struct
+try:
+    import uasyncio as asyncio # MicroPython anterior a 1.21
+except ImportError:
+    import asyncio
 
 # --- Configuración de Wi-Fi ---
 # ¡IMPORTANTE! Reemplaza con los datos de tu red compartida por la PC
 SSID = 'NAME_SSID' # Tu SSID de la red compartida (Ej. 'MiHotspot')
 PASSWORD = 'PASSWORD_NETWORK' # Tu Contraseña de la red compartida
 PORT = 8080 # Puerto TCP para la comunicación, debe ser el mismo en el cliente de PC
+# Formato de envío: 'text' (líneas legibles, compatible con versiones anteriores)
+# o 'binary' (tramas compactas de protocol.py)
+WIRE_FORMAT = 'text'
+
+# --- Configuración de muestreo y envío ---
+# El muestreo lo dispara un temporizador por hardware y guarda cada muestra en un
+# buffer circular (ring.py). Una tarea de uasyncio reparte las muestras a la cola
+# de cada cliente y otra tarea por cliente las envía por lotes, así que un
+# cliente lento nunca detiene el muestreo ni a los demás clientes.
+# Requiere subir también protocol.py, ring.py, backlog.py, orientation.py y
+# motion_trigger.py al ESP32.
+SAMPLE_PERIOD_MS = 500   # Periodo de muestreo (cada trama lleva su t_us, la interfaz no lo asume)
+SEND_BATCH = 20          # Envía en cuanto haya este número de muestras...
+SEND_INTERVAL_MS = 1000  # ...o cuando pase este tiempo desde el último envío
+RING_CAPACITY = 256      # Muestras que caben en el buffer mientras se reparten
+STATS_INTERVAL_MS = 10000 # Cada cuánto se imprimen los contadores por el puerto serie
+
+# --- Configuración de clientes ---
+MAX_CLIENTS = 4            # Visores y grabadores suscritos a la vez
+CLIENT_QUEUE_FRAMES = 128  # Cola de cada cliente (tramas); se reserva al conectarse
+FANOUT_INTERVAL_MS = 20    # Cada cuánto se reparten las muestras nuevas a los clientes
+# Un cliente con la cola por encima de 3/4 recibe una de cada 2 muestras (luego
+# 1 de cada 4, ...) hasta que baja de 1/4; si sigue llena este tiempo, o un envío
+# (también de lo guardado) tarda este tiempo en completarse, se desconecta
+CLIENT_STALL_MS = 5000
+MAX_STRIDE = 8
+
+# --- Almacenamiento sin cliente (store-and-forward) ---
+# Sin ningún cliente conectado las muestras se guardan en RAM y, si se llena,
+# en un archivo de la flash. El primer cliente que se conecta recibe todo lo
+# guardado a la máxima velocidad del enlace y después el flujo en vivo; con
+# WIRE_FORMAT = 'binary' el seq de cada trama permite a la interfaz colocarlas
+# en su sitio. En modo texto llegan en orden, pero sin su tiempo original.
+BACKLOG_RAM_FRAMES = 512            # ~11 KB de RAM
+BACKLOG_FILE = 'backlog.bin'
+BACKLOG_MAX_FILE_BYTES = 512 * 1024 # Unas 3 h a 2 Hz (22 bytes por muestra)
+BACKLOG_CHUNK_FRAMES = 64           # Tramas por escritura al enviar lo guardado
+
+# --- Transporte UDP (opcional) ---
+# Con TRANSPORT = 'udp' las muestras se envían además en datagramas (formato
+# binario de protocol.py, varias tramas por datagrama) a UDP_TARGET: la IP de
+# la PC, la de broadcast de la red (p. ej. '192.168.137.255', con
+# UDP_BROADCAST = True) o un grupo multicast (p. ej. '239.1.2.3'). No hay conexión ni reenvío: un datagrama
+# perdido es un hueco en seq que la interfaz cuenta, pero ningún cliente lento
+# puede frenar el envío. Los clientes TCP se siguen atendiendo y, en este
+# modo, no se guardan muestras mientras no haya ninguno.
+TRANSPORT = 'tcp'
+UDP_TARGET = '192.168.137.1'
+UDP_PORT = 8081
+UDP_BROADCAST = False # True si UDP_TARGET es una dirección de broadcast
+# Tramas por datagrama, como mucho protocol.UDP_MAX_FRAMES (60); a 2 Hz sale
+# un datagrama por muestra, porque se envía en cuanto hay tramas nuevas
+UDP_FRAMES_PER_DATAGRAM = 16
+
+# --- Modo evento (opcional) ---
+# Con EVENT_MODE = True solo se envían (y guardan sin cliente) las ventanas con
+# movimiento, más una muestra de latido cada HEARTBEAT_INTERVAL_MS, en lugar
+# del flujo continuo (ver motion_trigger.py). Un evento empieza cuando el
+# módulo de la aceleración se aleja de 1 g o el del giro supera su umbral de
+# disparo, y acaba tras EVENT_POST_MS por debajo de los umbrales de liberación;
+# cada evento lleva además los EVENT_PRE_MS anteriores al disparo. Con
+# WIRE_FORMAT = 'binary' la interfaz coloca cada evento en su instante real
+# (events.py los separa de la grabación); en modo texto llegan sin su tiempo.
+EVENT_MODE = False
+EVENT_ACCEL_TRIGGER_G = 0.15   # Desviación de 1 g que dispara un evento
+EVENT_ACCEL_RELEASE_G = 0.08   # ...y por debajo de la que se considera reposo
+EVENT_GYRO_TRIGGER_DPS = 30.0
+EVENT_GYRO_RELEASE_DPS = 15.0
+EVENT_PRE_MS = 1000            # Contexto antes del disparo (22 bytes por muestra en RAM)
+EVENT_POST_MS = 2000           # Reposo seguido necesario para cerrar el evento
+HEARTBEAT_INTERVAL_MS = 5000
+EVENT_CHUNK_FRAMES = 32        # Tramas filtradas por vuelta del reparto
+
+# --- Instrumentación ---
+# Se mide la lectura I2C, el cálculo de ángulos, el bucle de reparto y cada
+# envío; cada STATS_FRAME_INTERVAL_MS se envía a los clientes una trama de
+# estadísticas (protocol.STATS_FIELDS) que la interfaz muestra en su panel.
+STATS_FRAME_INTERVAL_MS = 1000
+SEND_STALL_MS = 100 # Un envío (write + drain) más largo que esto cuenta como atasco
+
+import protocol
+from ring import FrameRing
+from backlog import Backlog
+from orientation import ComplementaryFilter, tilt_angle, DEG
+from motion_trigger import MotionTrigger
 
 # Inicializar el objeto MPU6050.
 # Esta librería (MPU6050.py) debería manejar la inicialización I2C internamente.
@@ -23,8 +114,99 @@ mpu = MPU6050()
 
 # Variables de conexión globales
 sta_if = None
-server_sock = None # Este será el socket que escucha las conexiones
-client_sock = None # Este será el socket de la conexión activa con un cliente
+server = None  # Servidor de uasyncio (acepta clientes en su propia tarea)
+clients = []   # Clientes conectados (Client)
+
+# Buffers reutilizables para el muestreo (sin reservas de memoria por muestra)
+raw_buf = bytearray(14)
+raw_mv = memoryview(raw_buf)
+# Las muestras se guardan como tramas de protocol.py (cuentas crudas + seq + t_us)
+ring = FrameRing(RING_CAPACITY, protocol.FRAME_SIZE)
+seq = 0 # Número de secuencia de la muestra
+read_errors = 0 # Muestras perdidas porque falló la lectura I2C
+sample_timer = None
+# Muestras tomadas sin cliente, pendientes de enviar (ver backlog.py)
+backlog = Backlog(BACKLOG_RAM_FRAMES, protocol.FRAME_SIZE, BACKLOG_FILE, BACKLOG_MAX_FILE_BYTES)
+backlog_buf = bytearray(BACKLOG_CHUNK_FRAMES * protocol.FRAME_SIZE)
+backlog_client = None # Cliente que está recibiendo lo guardado
+stored_seq = -1 # seq de la última trama añadida a lo guardado
+trigger = None # MotionTrigger si EVENT_MODE
+
+class StageTiming:
+    """Duraciones de una etapa acumuladas entre dos tramas de estadísticas."""
+
+    def __init__(self):
+        self.total = 0
+        self.count = 0
+        self.max = 0
+
+    def add(self, elapsed, n=1):
+        self.total += elapsed
+        self.count += n
+        if elapsed > self.max:
+            self.max = elapsed
+
+    def take(self):
+        """Devuelve (media por unidad, máximo) y empieza un intervalo nuevo."""
+        mean = self.total // self.count if self.count else 0
+        peak = self.max
+        self.total = self.count = self.max = 0
+        return mean, peak
+
+read_timing = StageTiming()  # µs por lectura I2C (en sample_tick)
+angle_timing = StageTiming() # µs por muestra convertida a texto con ángulos
+loop_timing = StageTiming()  # ms entre vueltas del bucle de reparto
+send_timing = StageTiming()  # ms por envío (write + drain)
+send_stalls = 0
+stats_buf = bytearray(protocol.FRAME_SIZE)
+
+class UdpSender:
+    """Envía tramas en datagramas de hasta UDP_FRAMES_PER_DATAGRAM, sin reservar memoria por envío."""
+
+    def __init__(self, target, port, broadcast=False):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if broadcast:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        self.addr = socket.getaddrinfo(target, port)[0][-1]
+        self.frames_per_datagram = min(UDP_FRAMES_PER_DATAGRAM, protocol.UDP_MAX_FRAMES)
+        self.buf = bytearray(protocol.HEADER_SIZE + self.frames_per_datagram * protocol.FRAME_SIZE)
+        self.mv = memoryview(self.buf)
+        self.datagrams = 0
+        self.frames = 0
+        self.errors = 0
+
+    def send(self, frames, n):
+        global send_stalls
+        size = protocol.FRAME_SIZE
+        protocol.pack_datagram_header_into(self.buf, mpu._accel_range, mpu._gyro_range,
+                                           SAMPLE_PERIOD_MS * 1000, header_flags())
+        for start in range(0, n, self.frames_per_datagram):
+            count = min(self.frames_per_datagram, n - start)
+            end = protocol.HEADER_SIZE + count * size
+            self.buf[protocol.HEADER_SIZE:end] = frames[start * size:(start + count) * size]
+            t0 = ticks_ms()
+            try:
+                self.sock.sendto(self.mv[:end], self.addr)
+                self.datagrams += 1
+                self.frames += count
+            except OSError:
+                self.errors += 1 # Sin memoria para el paquete o red caída: se pierde
+            elapsed = ticks_diff(ticks_ms(), t0)
+            send_timing.add(elapsed)
+            if elapsed >= SEND_STALL_MS:
+                send_stalls += 1
+
+    def stats(self):
+        return {"datagrams": self.datagrams, "sent": self.frames, "errors": self.errors}
+
+udp = None # UdpSender si TRANSPORT == 'udp'
+
+def header_flags():
+    return protocol.FLAG_STATS | (protocol.FLAG_EVENTS if trigger is not None else 0)
+
+def mem_free_kb():
+    # gc.mem_free solo existe en MicroPython
+    return gc.mem_free() // 1024 if hasattr(gc, 'mem_free') else 0
 
 def connect_wifi():
     """Intenta conectar el ESP32 a la red Wi-Fi especificada."""
@@ -51,10 +233,9 @@ def connect_wifi():
 def setup():
     """
     Función de configuración inicial, similar a setup() en Arduino.
-    Configura Wi-Fi, verifica el MPU6050 e inicia el servidor TCP.
+    Configura Wi-Fi, verifica el MPU6050 e inicia el muestreo.
+    El servidor TCP lo arranca serve() dentro de uasyncio.
     """
-    global server_sock # Declarar que modificaremos la variable global
-
     if not connect_wifi():
         print("No se pudo establecer la conexión Wi-Fi. Reinicia el ESP32.")
         while True: # Bucle infinito para detener la ejecución si no hay Wi-Fi
@@ -72,93 +253,386 @@ def setup():
         while True: # Bucle infinito para indicar que el sensor no está disponible
             sleep_ms(1000)
 
-    # --- Crear y bindear el socket del servidor UNA SOLA VEZ ---
+    start_sampling()
+    print("Listo para leer datos y servir por Wi-Fi.")
+
+def sample_tick(timer):
+    """Callback del temporizador: lee el sensor y guarda la muestra en el buffer circular."""
+    global seq, read_errors
+    offset = ring.reserve()
+    if offset < 0:
+        seq += 1 # Buffer lleno: se pierde la muestra, el hueco queda en la secuencia
+        return
+    t0 = ticks_us()
+    if not mpu.read_raw_into(raw_mv):
+        seq += 1 # Lectura fallida: se pierde como con el buffer lleno
+        read_errors += 1
+        return
+    t1 = ticks_us()
+    read_timing.add(ticks_diff(t1, t0))
+    protocol.pack_frame_into(ring.buf, offset, seq, t1, raw_mv, mpu._accel_range, mpu._gyro_range)
+    seq += 1
+    ring.commit()
+
+def start_sampling():
+    """Arranca el temporizador de muestreo con periodo SAMPLE_PERIOD_MS."""
+    global sample_timer, trigger
+    if EVENT_MODE:
+        trigger = MotionTrigger(EVENT_ACCEL_TRIGGER_G, EVENT_ACCEL_RELEASE_G,
+                                EVENT_GYRO_TRIGGER_DPS, EVENT_GYRO_RELEASE_DPS,
+                                EVENT_PRE_MS // SAMPLE_PERIOD_MS, max(1, EVENT_POST_MS // SAMPLE_PERIOD_MS),
+                                HEARTBEAT_INTERVAL_MS, EVENT_CHUNK_FRAMES)
+    sample_timer = Timer(0)
+    sample_timer.init(period=SAMPLE_PERIOD_MS, mode=Timer.PERIODIC, callback=sample_tick)
+
+class Client:
+    """
+    Un cliente suscrito: su cola acotada de tramas, su submuestreo y, en
+    modo texto, su propio filtro de orientación (cada cliente puede recibir
+    muestras distintas si se le submuestrea).
+    """
+
+    def __init__(self, reader, writer, addr):
+        self.reader = reader
+        self.writer = writer
+        self.addr = addr
+        # En modo evento cabe además el pre-disparo, que llega de golpe al disparar
+        capacity = CLIENT_QUEUE_FRAMES + (trigger.pre_frames if trigger is not None else 0)
+        self.queue = FrameRing(capacity, protocol.FRAME_SIZE)
+        self.stride = 1        # Se envía una de cada `stride` muestras
+        self.skip = 0
+        self.full_since = None # ticks_ms desde que la cola está llena
+        self.drain_since = None # ticks_ms desde que espera en drain()
+        self.closed = False
+        self.task = None       # Tarea de client_writer, para cancelarla si se atasca
+        self.orientation_filter = ComplementaryFilter()
+        self.last_frame_us = None # t_us de la última trama convertida, para el dt del filtro
+
+    def offer(self, frame):
+        """Encola una trama respetando el submuestreo; la cuenta como perdida si no cabe."""
+        queue = self.queue
+        self.skip += 1
+        if self.skip < self.stride:
+            queue.discarded += 1
+            return
+        self.skip = 0
+        if queue.push(frame):
+            self.full_since = None
+        elif self.full_since is None:
+            self.full_since = ticks_ms()
+
+    def adapt(self):
+        """Ajusta el submuestreo según lo llena que esté la cola (una vez por reparto)."""
+        pending = len(self.queue)
+        capacity = self.queue.capacity
+        if pending >= (3 * capacity) // 4:
+            if self.stride < MAX_STRIDE:
+                self.stride *= 2
+        elif pending <= capacity // 4:
+            self.stride = 1
+
+    def stalled(self, now):
+        for since in (self.full_since, self.drain_since):
+            if since is not None and ticks_diff(now, since) >= CLIENT_STALL_MS:
+                return True
+        return False
+
+    def stats(self):
+        stats = self.queue.stats()
+        stats["stride"] = self.stride
+        return stats
+
+def format_text_lines(client, frames, n):
+    """
+    Convierte n tramas crudas al formato de texto legible, en un solo bloque de bytes.
+    Los ángulos salen del filtro complementario (orientation.py) del cliente, que
+    combina el acelerómetro con el giroscopio usando el tiempo de cada trama.
+    Las tramas de estadísticas se convierten en su línea de texto.
+    """
+    t0 = ticks_us()
+    acc_scaler = 9.80665 / mpu._acc_scaler
+    gyr_scaler = 1.0 / mpu._gyr_scaler
+    period_s = SAMPLE_PERIOD_MS / 1000
+    orientation_filter = client.orientation_filter
+    lines = []
+    for i in range(n):
+        base = i * protocol.FRAME_SIZE
+        if protocol.is_stats_frame(frames, base):
+            lines.append(protocol.format_stats_line(frames, base))
+            continue
+        values = []
+        for j in range(6):
+            k = base + 8 + 2 * j
+            v = (frames[k] << 8) | frames[k + 1]
+            if v & 0x8000:
+                v -= 0x10000
+            values.append(v * (acc_scaler if j < 3 else gyr_scaler))
+        ax_ms2, ay_ms2, az_ms2, gx, gy, gz = values
+
+        t_us = (frames[base + 4] << 24) | (frames[base + 5] << 16) | (frames[base + 6] << 8) | frames[base + 7]
+        dt = period_s if client.last_frame_us is None else ticks_diff(t_us, client.last_frame_us) / 1000000
+        client.last_frame_us = t_us
+        if trigger is not None and dt > 2 * period_s:
+            dt = period_s # Hueco entre eventos: no se integra el giro sobre él
+        ang_x_deg, ang_y_deg, _ = orientation_filter.update(ax_ms2, ay_ms2, az_ms2, gx, gy, gz, dt)
+        # Z sigue siendo la inclinación absoluta (sin deriva), no el yaw del filtro
+        ang_z_deg = tilt_angle(ax_ms2, ay_ms2, az_ms2) / DEG
+
+        # Formatear el mensaje:
+        lines.append(f"Aceleración (m/s²) -> X: {ax_ms2:.3f} Y: {ay_ms2:.3f} Z: {az_ms2:.3f} | "
+                     f"Ángulos (grados) -> X: {ang_x_deg:.1f} Y: {ang_y_deg:.1f} Z: {ang_z_deg:.1f}\n")
+    angle_timing.add(ticks_diff(ticks_us(), t0), n)
+    return "".join(lines).encode('utf-8')
+
+async def drain(client):
+    """Espera a que se envíe lo escrito al cliente, midiendo el tiempo y los atascos."""
+    global send_stalls
+    t0 = ticks_ms()
+    client.drain_since = t0
+    await client.writer.drain()
+    client.drain_since = None
+    elapsed = ticks_diff(ticks_ms(), t0)
+    send_timing.add(elapsed)
+    if elapsed >= SEND_STALL_MS:
+        send_stalls += 1
+
+async def client_writer(client):
+    """
+    Tarea de cada cliente: envía su cola por lotes cuando hay SEND_BATCH
+    muestras o han pasado SEND_INTERVAL_MS desde el último envío. Si el
+    cliente no lee, drain() espera aquí sin afectar al muestreo ni a los demás.
+    """
+    queue = client.queue
+    last_flush_ms = ticks_ms()
     try:
-        server_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        # Permite reusar la dirección rápidamente. Importante para evitar EADDRINUSE después de reinicios.
-        server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        server_sock.bind(('', PORT)) # Escucha en todas las interfaces en el puerto especificado
-        server_sock.listen(1) # Solo una conexión entrante a la vez (cola de 1)
-        print(f"Servidor TCP iniciado en el puerto {PORT}. Esperando conexiones...")
+        if WIRE_FORMAT == 'binary':
+            client.writer.write(protocol.pack_header(mpu._accel_range, mpu._gyro_range, SAMPLE_PERIOD_MS * 1000,
+                                                     header_flags()))
+            await client.writer.drain()
+        await send_backlog(client)
+        while not client.closed:
+            pending = len(queue)
+            now = ticks_ms()
+            if pending == 0 or (pending < SEND_BATCH and ticks_diff(now, last_flush_ms) < SEND_INTERVAL_MS):
+                await asyncio.sleep(FANOUT_INTERVAL_MS / 1000)
+                continue
+            last_flush_ms = now
+            while pending > 0:
+                chunk, n = queue.peek(pending)
+                if WIRE_FORMAT == 'binary':
+                    client.writer.write(bytes(chunk))
+                else:
+                    client.writer.write(format_text_lines(client, chunk, n))
+                await drain(client)
+                # Solo se da por enviado tras drain(): si falla, requeue() lo recupera
+                queue.consume(n)
+                pending -= n
     except OSError as e:
-        print(f"ERROR al iniciar el servidor TCP: {e}. El puerto puede estar ocupado. Reiniciando...")
-        sleep_ms(5000) # Pausa antes de un posible reinicio
-        import machine
-        machine.reset() # Reinicio forzado si el bind falla
+        print(f"Error al enviar datos a {client.addr}: {e}. Cliente desconectado.")
+    finally:
+        disconnect(client)
+        await close_stream(client.writer)
 
-    print("Listo para leer datos y servir por Wi-Fi.")
+def disconnect(client):
+    """Quita al cliente del reparto; se puede llamar varias veces."""
+    if client.closed:
+        return
+    client.closed = True
+    if client in clients:
+        clients.remove(client)
+    release_backlog(client)
+    if udp is None and not clients:
+        requeue(client) # Era el último: lo que no llegó a enviarse no se pierde
 
-def loop():
-    global client_sock, server_sock # Acceder a las variables globales
-
-    # Si no hay cliente conectado, intenta aceptar una nueva conexión.
-    # El accept es no-bloqueante debido al timeout para que el loop pueda continuar.
-    if client_sock is None:
-        try:
-            # print("Esperando nueva conexión de cliente...") # Descomenta para depuración
-            server_sock.settimeout(0.1) # Espera 100ms por una conexión
-            client_sock, addr = server_sock.accept()
-            print(f'Cliente conectado desde: {addr}')
-            # Si la conexión fue exitosa, podemos restablecer el timeout a None para el server_sock
-            # o mantenerlo con timeout si quieres que el servidor pueda hacer otras cosas.
-            # Aquí lo ponemos a None para que el accept bloquee en futuras ocasiones si es necesario.
-            # Si tu ESP32 hace otras cosas que no deben bloquear, considera dejar un timeout bajo
-            # en el server_sock o hacerlo completamente no-bloqueante y usar select.
-            server_sock.settimeout(None)
-        except OSError as e:
-            # Manejo de errores de accept (ej. timeout EWOULDBLOCK o ETIMEDOUT)
-            # AHORA INCLUIMOS 116 (ETIMEDOUT) AQUÍ
-            if e.args[0] == 110 or e.args[0] == 116: # EWOULDBLOCK (110) o ETIMEDOUT (116)
-                # print("No hay cliente conectado aún, esperando...") # Puedes descomentar para depurar
-                pass # No hay cliente, no es un error crítico para el server_sock
-            else:
-                # Esto es un error crítico para el server_sock, por ejemplo, puerto ya en uso.
-                print(f"Error al aceptar conexión (crítico): {e}")
-                if server_sock:
-                    server_sock.close()
-                server_sock = None # Marcar como roto para un posible reinicio en setup()
-                sleep_ms(1000)
-            return # Si no hay cliente conectado EN ESTE MOMENTO (o error en accept), no enviar datos.
+def requeue(client):
+    """
+    Pasa a lo guardado (backlog.py) las tramas de la cola del cliente que no
+    llegaron a escribirse, p. ej. al caerse el Wi-Fi, para que el siguiente
+    cliente las reciba sin hueco. Las que ya estaban guardadas (se siguió
+    guardando mientras otro cliente recibía lo guardado) no se repiten.
+    """
+    size = protocol.FRAME_SIZE
+    queue = client.queue
+    pending = len(queue)
+    while pending > 0:
+        chunk, n = queue.peek(pending)
+        for i in range(n):
+            base = i * size
+            if protocol.is_stats_frame(chunk, base) or struct.unpack_from('>I', chunk, base)[0] <= stored_seq:
+                continue
+            store(chunk[base:base + size], 1)
+        queue.consume(n)
+        pending -= n
 
-    # Si llegamos aquí, client_sock NO ES None, lo que significa que tenemos un cliente para enviar datos.
+async def close_stream(writer):
+    """
+    Cierra el socket de verdad: en MicroPython Stream.close() no hace nada y
+    solo wait_closed() lo cierra. En CPython (sim/) se aborta la conexión para
+    no esperar a que un cliente que no lee vacíe lo pendiente.
+    """
+    try:
+        transport = getattr(writer, 'transport', None)
+        if transport is not None:
+            transport.abort()
+        else:
+            writer.close()
+        await writer.wait_closed()
+    except OSError:
+        pass
 
-    # ... (El resto del código de lectura del MPU6050 y envío de datos permanece igual) ...
+async def send_backlog(client):
+    """
+    Si este cliente se quedó con las muestras guardadas (claim_backlog), se las
+    envía por bloques, sin esperar a SEND_BATCH. Mientras tanto el reparto
+    sigue añadiendo las muestras nuevas al final de lo guardado, de modo que
+    este cliente las recibe todas en orden antes de pasar a su cola en vivo.
+    Cada bloque solo sale de lo guardado cuando drain() confirma el envío: si
+    se corta, el siguiente cliente lo recibe (en binario el PC descarta lo repetido).
+    """
+    if backlog_client is not client:
+        return
+    print(f"Enviando {len(backlog)} muestras guardadas a {client.addr}")
+    mv = memoryview(backlog_buf)
+    while not client.closed and len(backlog) > 0:
+        n = backlog.peek_into(backlog_buf)
+        if WIRE_FORMAT == 'binary':
+            client.writer.write(bytes(mv[:n * protocol.FRAME_SIZE]))
+        else:
+            client.writer.write(format_text_lines(client, mv, n))
+        await drain(client)
+        backlog.consume(n)
+    release_backlog(client)
 
-    # Leer valores del acelerómetro (ya están en ms^-2 según la librería)
-    accel = mpu.read_accel_data()
-    ax_ms2 = accel["x"]
-    ay_ms2 = accel["y"]
-    az_ms2 = accel["z"]
+def store(frames, n):
+    """Añade n tramas contiguas a lo guardado y recuerda el seq de la última."""
+    global stored_seq
+    backlog.add(frames, n)
+    stored_seq = struct.unpack_from('>I', frames, (n - 1) * protocol.FRAME_SIZE)[0]
 
-    ax_g = ax_ms2 / 9.81
-    ay_g = ay_ms2 / 9.81
-    az_g = az_ms2 / 9.81
+def claim_backlog(client):
+    """Asigna lo guardado al cliente si hay algo y nadie lo está recibiendo."""
+    global backlog_client
+    if backlog_client is None and len(backlog) > 0:
+        backlog_client = client
 
-    ang_x_rad = math.atan2(ay_g, math.sqrt(ax_g*ax_g + az_g*az_g))
-    ang_y_rad = math.atan2(-ax_g, math.sqrt(ay_g*ay_g + az_g*az_g))
-    ang_z_rad = math.atan2(math.sqrt(ax_g*ax_g + ay_g*ay_g), az_g)
+def release_backlog(client):
+    global backlog_client
+    if backlog_client is client:
+        backlog_client = None
 
-    ang_x_deg = math.degrees(ang_x_rad)
-    ang_y_deg = math.degrees(ang_y_rad)
-    ang_z_deg = math.degrees(ang_z_rad)
+async def accept_client(reader, writer):
+    """Callback del servidor de uasyncio para cada conexión nueva."""
+    addr = writer.get_extra_info('peername')
+    if len(clients) >= MAX_CLIENTS:
+        print(f"Cliente rechazado desde {addr}: ya hay {MAX_CLIENTS} conectados.")
+        await close_stream(writer)
+        return
+    client = Client(reader, writer, addr)
+    claim_backlog(client) # Antes de que el reparto le ofrezca muestras en vivo
+    clients.append(client)
+    print(f'Cliente conectado desde: {addr} ({len(clients)} en total)')
+    client.task = asyncio.create_task(client_writer(client))
 
-    # Formatear el mensaje:
-    msg = (f"Aceleración (m/s²) -> X: {ax_ms2:.3f} Y: {ay_ms2:.3f} Z: {az_ms2:.3f} | "
-           f"Ángulos (grados) -> X: {ang_x_deg:.1f} Y: {ang_y_deg:.1f} Z: {ang_z_deg:.1f}\n")
+async def fanout_task():
+    """
+    Reparte las tramas nuevas del buffer de muestreo a la cola de cada
+    cliente. Sin clientes, o mientras se envía lo guardado, se añaden a lo
+    guardado (backlog.py) en lugar de perderse. En modo evento solo se
+    reparte lo que deja pasar el MotionTrigger.
+    """
+    last_us = ticks_us()
+    while True:
+        now_us = ticks_us()
+        loop_timing.add(ticks_diff(now_us, last_us) // 1000)
+        last_us = now_us
+        pending = len(ring)
+        while pending > 0:
+            if trigger is None:
+                chunk, n = ring.peek(pending)
+                taken = n
+            else:
+                chunk, taken = ring.peek(min(pending, EVENT_CHUNK_FRAMES))
+                chunk, n = trigger.filter(chunk, taken, mpu._acc_scaler, mpu._gyr_scaler, ticks_ms())
+            if n > 0:
+                if udp is not None:
+                    udp.send(chunk, n)
+                # Se guarda sin clientes o mientras uno recibe lo guardado. Si este
+                # se desconecta y quedan otros, se deja de guardar (ellos lo reciben
+                # en vivo) y lo que quede espera al siguiente cliente que se conecte.
+                # `clients` solo tiene clientes vivos: disconnect() quita al instante a los caídos
+                storing = udp is None and (not clients or backlog_client is not None)
+                if storing:
+                    store(chunk, n)
+                for client in clients:
+                    if storing and client is backlog_client:
+                        continue # Las recibirá al final de lo guardado
+                    for i in range(n):
+                        client.offer(chunk[i * protocol.FRAME_SIZE:(i + 1) * protocol.FRAME_SIZE])
+            ring.consume(taken)
+            pending -= taken
+        now = ticks_ms()
+        for client in clients[:]:
+            client.adapt()
+            if client.stalled(now):
+                print(f"Cliente {client.addr} sin leer durante {CLIENT_STALL_MS} ms. Desconectado.")
+                disconnect(client)
+                client.task.cancel() # Sale de drain(); su finally cierra el socket
+        await asyncio.sleep(FANOUT_INTERVAL_MS / 1000)
+
+async def stats_task():
+    """Imprime periódicamente los contadores de muestras guardadas, enviadas y perdidas."""
+    while True:
+        await asyncio.sleep(STATS_INTERVAL_MS / 1000)
+        print("Muestras:", ring.stats(), "lecturas fallidas:", read_errors)
+        print("Guardadas sin cliente:", backlog.stats())
+        if udp is not None:
+            print("UDP:", udp.stats())
+        if trigger is not None:
+            print("Modo evento:", trigger.stats())
+        for client in clients:
+            print("  Cliente", client.addr, client.stats())
+
+async def stats_frame_task():
+    """
+    Envía a cada cliente una trama de estadísticas (protocol.STATS_FIELDS) cada
+    STATS_FRAME_INTERVAL_MS. Va directa a su cola, sin submuestreo ni pasar por
+    lo guardado sin cliente.
+    """
+    while True:
+        await asyncio.sleep(STATS_FRAME_INTERVAL_MS / 1000)
+        read_us = read_timing.take()[0]
+        angle_us = angle_timing.take()[0]
+        loop_ms = loop_timing.take()[1]
+        send_ms = send_timing.take()[1]
+        if not clients and udp is None:
+            continue
+        protocol.pack_stats_into(stats_buf, 0, ticks_us(), (
+            read_us, angle_us, loop_ms, send_ms,
+            mpu._failCount & 0xFFFF, send_stalls & 0xFFFF, mem_free_kb()))
+        if udp is not None:
+            udp.send(stats_buf, 1)
+        for client in clients:
+            client.queue.push(stats_buf)
 
+async def serve():
+    """Arranca el servidor TCP (y el envío UDP si se eligió) y las tareas de reparto y estadísticas."""
+    global server, udp
+    if TRANSPORT == 'udp':
+        udp = UdpSender(UDP_TARGET, UDP_PORT, UDP_BROADCAST)
+        print(f"Enviando por UDP a {UDP_TARGET}:{UDP_PORT}")
     try:
-        client_sock.sendall(msg.encode('utf-8'))
-        # print(f"DEBUG: Dato enviado: {msg.strip()[:50]}...") # Para depuración en serial
+        server = await asyncio.start_server(accept_client, '0.0.0.0', PORT, backlog=MAX_CLIENTS)
+        print(f"Servidor TCP iniciado en el puerto {PORT}. Esperando conexiones...")
     except OSError as e:
-        print(f"Error al enviar datos: {e}. Cliente desconectado.")
-        if client_sock:
-            client_sock.close()
-        client_sock = None # Marcar que no hay cliente conectado para que acepte uno nuevo en la próxima iteración
-
-    sleep_ms(500) # Pausa entre envíos de datos
+        print(f"ERROR al iniciar el servidor TCP: {e}. El puerto puede estar ocupado. Reiniciando...")
+        sleep_ms(5000) # Pausa antes de un posible reinicio
+        import machine
+        machine.reset() # Reinicio forzado si el bind falla
+    asyncio.create_task(stats_task())
+    asyncio.create_task(stats_frame_task())
+    await fanout_task()
 
-# Ejecutar la función de configuración una vez, y luego el bucle principal continuamente.
+# Ejecutar la función de configuración una vez, y luego las tareas de uasyncio.
 if __name__ == "__main__":
     setup()
-    while True:
-        loop()
+    asyncio.run(serve())
@@ -0,0 +1,123 @@
+# Métricas del camino caliente en el PC y registro exportable.
+#
+# El colector (recepción, decodificación, buffer, reparto a los sinks) y el
+# renderizador anotan cuánto tarda cada etapa con StageMetrics.record(). La
+# interfaz toma un snapshot() por segundo para su panel de estadísticas y lo
+# guarda, junto con las tramas de estadísticas de cada ESP32 (protocol.py),
+# en un MetricsLog que se puede exportar a CSV. Así se ve qué etapa limita la
+# frecuencia de muestreo: la de mayor porcentaje de ocupación.
+
+import collections
+import csv
+import threading
+import time
+
+# Etapas anotadas por collector.py y renderer.py, en el orden del flujo
+STAGES = ("recv", "parse", "buffer", "deliver", "render")
+STAGE_NAMES = {
+    "recv": "Recepción (espera en buffer)",
+    "parse": "Decodificación",
+    "buffer": "Buffer de muestras",
+    "deliver": "Entrega a sinks",
+    "render": "Renderizado",
+}
+LOG_MAX_ROWS = 200000
+
+
+class StageMetrics:
+    """
+    Tiempos por etapa acumulados entre dos snapshot(). record() solo hace
+    unas sumas bajo un lock, así que se puede llamar desde cualquier hilo y
+    en cada lote sin notarse.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._since = time.perf_counter()
+
+    def record(self, stage, seconds, items=1):
+        """Anota una llamada a `stage` que tardó `seconds` y procesó `items` (muestras o bytes)."""
+        with self._lock:
+            acc = self._stages.get(stage)
+            if acc is None:
+                acc = self._stages[stage] = [0, 0, 0.0, 0.0]
+            acc[0] += 1
+            acc[1] += items
+            acc[2] += seconds
+            if seconds > acc[3]:
+                acc[3] = seconds
+
+    def snapshot(self):
+        """
+        Devuelve {etapa: {calls, items, items_per_s, mean_ms, max_ms, busy_pct}}
+        desde el snapshot anterior y empieza un intervalo nuevo. busy_pct es el
+        porcentaje del tiempo real que se pasó en la etapa.
+        """
+        now = time.perf_counter()
+        with self._lock:
+            stages = self._stages
+            self._stages = {}
+            elapsed = max(now - self._since, 1e-9)
+            self._since = now
+        return {stage: {"calls": calls, "items": items, "items_per_s": items / elapsed,
+                        "mean_ms": 1000 * total / calls, "max_ms": 1000 * peak,
+                        "busy_pct": 100 * total / elapsed}
+                for stage, (calls, items, total, peak) in stages.items()}
+
+
+class MetricsLog:
+    """
+    Historial en memoria (como mucho `max_rows` filas) de las métricas del PC
+    y de los ESP32, en formato largo: tiempo, origen, etapa, campo, valor.
+    """
+
+    COLUMNS = ("time", "source", "stage", "field", "value")
+
+    def __init__(self, max_rows=LOG_MAX_ROWS):
+        self.rows = collections.deque(maxlen=max_rows)
+        self._lock = threading.Lock()
+
+    def add_stages(self, snapshot, source="pc", t=None):
+        t = time.time() if t is None else t
+        with self._lock:
+            for stage, values in snapshot.items():
+                for field, value in values.items():
+                    self.rows.append((t, source, stage, field, value))
+
+    def add_device(self, device_name, stats, t=None):
+        t = time.time() if t is None else t
+        with self._lock:
+            for field, value in stats.items():
+                self.rows.append((t, device_name, "device", field, value))
+
+    def to_csv(self, path):
+        """Escribe el historial en `path`. Devuelve el número de filas."""
+        with self._lock:
+            rows = list(self.rows)
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(self.COLUMNS)
+            writer.writerows(rows)
+        return len(rows)
+
+
+def format_stages(snapshot):
+    """Líneas legibles de un snapshot, para el panel de la interfaz o la consola."""
+    lines = []
+    for stage in STAGES:
+        values = snapshot.get(stage)
+        if values is None:
+            continue
+        unit = "bytes/s" if stage == "recv" else "muestras/s"
+        lines.append(f"{STAGE_NAMES[stage]}: {values['items_per_s']:,.0f} {unit}, "
+                     f"media {values['mean_ms']:.2f} ms, máx {values['max_ms']:.1f} ms, "
+                     f"ocupación {values['busy_pct']:.1f} %")
+    return lines
+
+
+def format_device_stats(device_name, stats):
+    return (f"{device_name}: I2C {stats['read_us']} µs/muestra, ángulos {stats['angle_us']} µs/muestra, "
+            f"bucle máx {stats['loop_ms']} ms, envío máx {stats['send_ms']} ms, "
+            f"reintentos I2C {stats['i2c_retries']}, envíos atascados {stats['send_stalls']}, "
+            f"memoria libre {stats['mem_free_kb']} KiB")
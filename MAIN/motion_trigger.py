@@ -0,0 +1,153 @@
+# Modo evento del ESP32: solo se envían las ventanas con movimiento.
+#
+# MotionTrigger filtra las tramas (protocol.py) que salen del buffer de
+# muestreo. El movimiento se mide como en MPU6050.read_accel_abs (módulo
+# del vector de aceleración, aquí su desviación de 1 g) y con el módulo del
+# giroscopio, calculados sobre las cuentas crudas de cada trama, sin volver a
+# leer el sensor:
+#   - En reposo, las tramas pasan por un buffer circular de "pre-disparo" y
+#     no se envían; cada `heartbeat_ms` sale una sola trama de latido (la más
+#     antigua del pre-disparo, para no quitarle contexto al siguiente evento).
+#   - Al superar un umbral de disparo se envía el pre-disparo (contexto previo)
+#     y todo lo que sigue, hasta que el movimiento queda por debajo de los
+#     umbrales de liberación (más bajos: histéresis) durante `post_frames`.
+#
+# Las tramas enviadas se renumeran: seq solo salta donde el ESP32 perdió
+# muestras de verdad, no donde se omitieron por reposo, así la detección de
+# pérdidas del PC sigue sirviendo. Su t_us no cambia, y con él el PC coloca
+# cada trama en su instante real (events.py separa después cada evento).
+#
+# Funciona en MicroPython y en el simulador (sim/), que aporta ticks_diff.
+
+from math import sqrt
+import struct
+from time import ticks_diff
+
+import protocol
+from ring import FrameRing
+
+
+class MotionTrigger:
+    """
+    filter() recibe como mucho `max_frames` tramas por llamada y devuelve
+    (vista, m) con las m tramas a enviar, en un buffer propio reservado al
+    crearlo (cabe el pre-disparo completo más lo que pueda generar la llamada).
+    """
+
+    def __init__(self, accel_trigger_g, accel_release_g, gyro_trigger_dps, gyro_release_dps,
+                 pre_frames, post_frames, heartbeat_ms, max_frames):
+        self.accel_trigger_g = accel_trigger_g
+        self.accel_release_g = accel_release_g
+        self.gyro_trigger_dps = gyro_trigger_dps
+        self.gyro_release_dps = gyro_release_dps
+        self.post_frames = post_frames
+        self.heartbeat_ms = heartbeat_ms
+        self.max_frames = max_frames
+        self.pre = FrameRing(max(1, pre_frames), protocol.FRAME_SIZE)
+        self.pre_frames = pre_frames
+        self.out = bytearray((pre_frames + max_frames) * protocol.FRAME_SIZE)
+        self.out_mv = memoryview(self.out)
+        self.active = False
+        self.quiet = 0              # Tramas seguidas por debajo de la liberación
+        self.last_output_ms = None  # ticks_ms de la última trama enviada
+        self.out_seq = 0            # seq de las tramas enviadas
+        self.last_in_seq = None     # seq original de la última trama enviada
+        self.skipped = False        # Se omitió alguna trama desde la última enviada
+        # Contadores
+        self.events = 0
+        self.heartbeats = 0
+        self.frames_in = 0
+        self.frames_out = 0
+
+    def motion(self, frames, base, acc_scaler, gyr_scaler):
+        """(desviación de 1 g en g, giro en °/s) de la trama en frames[base:]."""
+        v = []
+        for j in range(6):
+            k = base + 8 + 2 * j
+            x = (frames[k] << 8) | frames[k + 1]
+            v.append(x - 0x10000 if x & 0x8000 else x)
+        accel_g = sqrt(v[0] * v[0] + v[1] * v[1] + v[2] * v[2]) / acc_scaler
+        gyro_dps = sqrt(v[3] * v[3] + v[4] * v[4] + v[5] * v[5]) / gyr_scaler
+        return abs(accel_g - 1.0), gyro_dps
+
+    def _emit(self, frames, base, m):
+        # Copia la trama a la salida con su seq renumerado
+        size = protocol.FRAME_SIZE
+        seq = struct.unpack_from(">I", frames, base)[0]
+        if self.last_in_seq is None or self.skipped:
+            self.out_seq += 1
+        else:
+            self.out_seq += (seq - self.last_in_seq) & 0xFFFFFFFF
+        self.last_in_seq = seq
+        self.skipped = False
+        offset = m * size
+        self.out[offset:offset + size] = frames[base:base + size]
+        struct.pack_into(">I", self.out, offset, self.out_seq & 0xFFFFFFFF)
+        return m + 1
+
+    def _heartbeat_due(self, now_ms):
+        return self.last_output_ms is None or ticks_diff(now_ms, self.last_output_ms) >= self.heartbeat_ms
+
+    def _idle(self, frames, base, m, now_ms):
+        # En reposo: la trama entra al pre-disparo y sale la más antigua, que
+        # se envía como latido si toca o se omite
+        size = protocol.FRAME_SIZE
+        pre = self.pre
+        if self.pre_frames == 0:
+            if self._heartbeat_due(now_ms):
+                self.heartbeats += 1
+                self.last_output_ms = now_ms
+                return self._emit(frames, base, m)
+            self.skipped = True
+            return m
+        if pre.free() == 0:
+            if self._heartbeat_due(now_ms):
+                oldest, _ = pre.peek(1)
+                m = self._emit(oldest, 0, m)
+                self.heartbeats += 1
+                self.last_output_ms = now_ms
+            else:
+                self.skipped = True
+            pre.consume(1, sent=False)
+        pre.push(frames[base:base + size])
+        return m
+
+    def filter(self, frames, n, acc_scaler, gyr_scaler, now_ms):
+        size = protocol.FRAME_SIZE
+        m = 0
+        self.frames_in += n
+        for i in range(n):
+            base = i * size
+            accel_dev, gyro = self.motion(frames, base, acc_scaler, gyr_scaler)
+            if not self.active:
+                if accel_dev >= self.accel_trigger_g or gyro >= self.gyro_trigger_dps:
+                    # Disparo: primero el contexto previo, en orden
+                    self.active = True
+                    self.quiet = 0
+                    self.events += 1
+                    pending = len(self.pre)
+                    while pending > 0:
+                        chunk, k = self.pre.peek(pending)
+                        for j in range(k):
+                            m = self._emit(chunk, j * size, m)
+                        self.pre.consume(k)
+                        pending -= k
+                    m = self._emit(frames, base, m)
+                else:
+                    m = self._idle(frames, base, m, now_ms)
+                continue
+            m = self._emit(frames, base, m)
+            if accel_dev < self.accel_release_g and gyro < self.gyro_release_dps:
+                self.quiet += 1
+                if self.quiet >= self.post_frames:
+                    self.active = False  # Fin del evento tras el post-disparo
+            else:
+                self.quiet = 0
+        if m:
+            self.last_output_ms = now_ms
+        self.frames_out += m
+        return self.out_mv, m
+
+    def stats(self):
+        return {"active": self.active, "events": self.events, "heartbeats": self.heartbeats,
+                "frames_in": self.frames_in, "frames_out": self.frames_out}
@@ -0,0 +1,291 @@
+# Estimación de la orientación fusionando acelerómetro y giroscopio.
+#
+# Dos filtros con la misma interfaz:
+#   - ComplementaryFilter: integra el giroscopio y lo corrige poco a poco con
+#     los ángulos del acelerómetro (las mismas fórmulas que main.py).
+#   - MadgwickFilter: cuaternión corregido por descenso de gradiente
+#     (Madgwick, 2010, versión IMU de 6 ejes).
+#
+# Cada filtro existe en dos versiones que dan los mismos números:
+#   - Por muestra (clases): solo usa math, corre en MicroPython en el ESP32.
+#   - Por lotes (funciones *_batch): arrays numpy (N, 3), para el PC; sirven
+#     para grabaciones completas o para lotes recibidos en vivo, encadenando
+#     el estado que devuelven.
+#
+# Unidades: aceleración en cualquier unidad (solo importa la dirección),
+# giroscopio en deg/s, dt en segundos y ángulos devueltos en grados:
+# X (roll), Y (pitch) y Z (yaw, solo giroscopio: deriva sin magnetómetro).
+#
+# El "Ang Z" del formato de texto y de la interfaz no es el yaw de los filtros
+# sino la inclinación absoluta del eje Z (tilt_angle), como antes de fusionar
+# el giroscopio; el yaw se obtiene con Recording.orientation().
+
+import math
+
+DEG = math.pi / 180.0
+
+COMPLEMENTARY_ALPHA = 0.98  # Peso del giroscopio en cada paso
+MADGWICK_BETA = 0.1         # Ganancia de la corrección del acelerómetro
+
+
+def accel_angles(ax, ay, az):
+    """Ángulos X e Y (radianes) de la gravedad medida, como en main.py."""
+    return (math.atan2(ay, math.sqrt(ax * ax + az * az)),
+            math.atan2(-ax, math.sqrt(ay * ay + az * az)))
+
+
+def tilt_angle(ax, ay, az):
+    """Ángulo Z (radianes): inclinación del eje Z respecto a la gravedad, como en main.py."""
+    return math.atan2(math.sqrt(ax * ax + ay * ay), az)
+
+
+def quaternion_from_angles(roll, pitch, yaw=0.0):
+    cr, sr = math.cos(roll / 2), math.sin(roll / 2)
+    cp, sp = math.cos(pitch / 2), math.sin(pitch / 2)
+    cy, sy = math.cos(yaw / 2), math.sin(yaw / 2)
+    return (cr * cp * cy + sr * sp * sy,
+            sr * cp * cy - cr * sp * sy,
+            cr * sp * cy + sr * cp * sy,
+            cr * cp * sy - sr * sp * cy)
+
+
+def quaternion_to_angles(q0, q1, q2, q3):
+    """Roll, pitch y yaw (radianes) de un cuaternión unitario."""
+    s = 2.0 * (q0 * q2 - q3 * q1)
+    s = 1.0 if s > 1.0 else (-1.0 if s < -1.0 else s)
+    return (math.atan2(2.0 * (q0 * q1 + q2 * q3), 1.0 - 2.0 * (q1 * q1 + q2 * q2)),
+            math.asin(s),
+            math.atan2(2.0 * (q0 * q3 + q1 * q2), 1.0 - 2.0 * (q2 * q2 + q3 * q3)))
+
+
+class ComplementaryFilter:
+    """
+    Filtro complementario por muestra. update() devuelve los ángulos X, Y, Z
+    en grados; la primera muestra inicializa X e Y con el acelerómetro.
+    """
+
+    def __init__(self, alpha=COMPLEMENTARY_ALPHA):
+        self.alpha = alpha
+        self.state = None  # (roll, pitch, yaw) en radianes
+
+    def reset(self):
+        self.state = None
+
+    def update(self, ax, ay, az, gx, gy, gz, dt):
+        acc_x, acc_y = accel_angles(ax, ay, az)
+        if self.state is None:
+            roll, pitch, yaw = acc_x, acc_y, 0.0
+        else:
+            a = self.alpha
+            roll, pitch, yaw = self.state
+            roll = a * (roll + gx * DEG * dt) + (1.0 - a) * acc_x
+            pitch = a * (pitch + gy * DEG * dt) + (1.0 - a) * acc_y
+            yaw = yaw + gz * DEG * dt
+        self.state = (roll, pitch, yaw)
+        return roll / DEG, pitch / DEG, yaw / DEG
+
+
+def _madgwick_step(q0, q1, q2, q3, ax, ay, az, gx, gy, gz, dt, beta):
+    # Un paso del filtro IMU de Madgwick; giroscopio en rad/s
+    qd0 = 0.5 * (-q1 * gx - q2 * gy - q3 * gz)
+    qd1 = 0.5 * (q0 * gx + q2 * gz - q3 * gy)
+    qd2 = 0.5 * (q0 * gy - q1 * gz + q3 * gx)
+    qd3 = 0.5 * (q0 * gz + q1 * gy - q2 * gx)
+    norm = math.sqrt(ax * ax + ay * ay + az * az)
+    if norm > 0.0:
+        ax /= norm
+        ay /= norm
+        az /= norm
+        q0q0, q1q1, q2q2, q3q3 = q0 * q0, q1 * q1, q2 * q2, q3 * q3
+        s0 = 4.0 * q0 * q2q2 + 2.0 * q2 * ax + 4.0 * q0 * q1q1 - 2.0 * q1 * ay
+        s1 = (4.0 * q1 * q3q3 - 2.0 * q3 * ax + 4.0 * q0q0 * q1 - 2.0 * q0 * ay - 4.0 * q1
+              + 8.0 * q1 * q1q1 + 8.0 * q1 * q2q2 + 4.0 * q1 * az)
+        s2 = (4.0 * q0q0 * q2 + 2.0 * q0 * ax + 4.0 * q2 * q3q3 - 2.0 * q3 * ay - 4.0 * q2
+              + 8.0 * q2 * q1q1 + 8.0 * q2 * q2q2 + 4.0 * q2 * az)
+        s3 = 4.0 * q1q1 * q3 - 2.0 * q1 * ax + 4.0 * q2q2 * q3 - 2.0 * q2 * ay
+        norm = math.sqrt(s0 * s0 + s1 * s1 + s2 * s2 + s3 * s3)
+        if norm > 0.0:
+            qd0 -= beta * s0 / norm
+            qd1 -= beta * s1 / norm
+            qd2 -= beta * s2 / norm
+            qd3 -= beta * s3 / norm
+    q0 += qd0 * dt
+    q1 += qd1 * dt
+    q2 += qd2 * dt
+    q3 += qd3 * dt
+    norm = math.sqrt(q0 * q0 + q1 * q1 + q2 * q2 + q3 * q3)
+    return q0 / norm, q1 / norm, q2 / norm, q3 / norm
+
+
+class MadgwickFilter:
+    """
+    Filtro de Madgwick por muestra. update() devuelve los ángulos X, Y, Z en
+    grados; la primera muestra orienta el cuaternión con el acelerómetro.
+    """
+
+    def __init__(self, beta=MADGWICK_BETA):
+        self.beta = beta
+        self.q = None
+
+    def reset(self):
+        self.q = None
+
+    def update(self, ax, ay, az, gx, gy, gz, dt):
+        if self.q is None:
+            self.q = quaternion_from_angles(*accel_angles(ax, ay, az))
+        else:
+            q0, q1, q2, q3 = self.q
+            self.q = _madgwick_step(q0, q1, q2, q3, ax, ay, az, gx * DEG, gy * DEG, gz * DEG, dt, self.beta)
+        roll, pitch, yaw = quaternion_to_angles(*self.q)
+        return roll / DEG, pitch / DEG, yaw / DEG
+
+
+# --- Versión por lotes en el PC (requiere numpy) ---
+
+# Longitud máxima de los bloques del barrido del filtro complementario. Dentro
+# de un bloque se divide por alpha**k, que no debe superar _SCAN_MAX_GAIN para
+# no perder precisión ni desbordarse: con alpha pequeño los bloques se acortan
+_SCAN_BLOCK = 256
+_SCAN_MAX_GAIN = 1e6
+
+
+def _linear_scan(u, alpha, x0):
+    """
+    x[k] = alpha * x[k-1] + u[k] con x[-1] = x0, vectorizado. Cada bloque se
+    resuelve con un cumsum escalado y luego se propaga el arrastre entre bloques.
+    """
+    import numpy as np
+    if alpha == 0.0:
+        return np.array(u, dtype=np.float64)
+    n = len(u)
+    block = _SCAN_BLOCK
+    if alpha < 1.0:
+        block = max(1, min(block, int(math.log(_SCAN_MAX_GAIN) / -math.log(alpha))))
+    block = min(block, n)
+    n_blocks = -(-n // block)
+    padded = np.zeros((n_blocks, block) + u.shape[1:])
+    padded.reshape((n_blocks * block,) + u.shape[1:])[:n] = u
+    powers = alpha ** np.arange(1, block + 1, dtype=np.float64)
+    shape = (1, block) + (1,) * (u.ndim - 1)
+    # Solución de cada bloque partiendo de 0: x[i] = sum_j alpha**(i-j) u[j]
+    local = np.cumsum(padded / (powers / alpha).reshape(shape), axis=1) * (powers / alpha).reshape(shape)
+    # Valor de x justo antes de cada bloque
+    carry = np.empty((n_blocks,) + u.shape[1:])
+    last = np.asarray(x0, dtype=np.float64)
+    decay = powers[-1]
+    for b in range(n_blocks):
+        carry[b] = last
+        last = decay * last + local[b, -1]
+    out = local + carry[:, None] * powers.reshape(shape)
+    return out.reshape((n_blocks * block,) + u.shape[1:])[:n]
+
+
+def _accel_angles_np(accel):
+    import numpy as np
+    ax, ay, az = accel[:, 0], accel[:, 1], accel[:, 2]
+    return np.stack([np.arctan2(ay, np.sqrt(ax * ax + az * az)),
+                     np.arctan2(-ax, np.sqrt(ay * ay + az * az))], axis=1)
+
+
+def _as_dt(dt, n):
+    import numpy as np
+    dt = np.asarray(dt, dtype=np.float64)
+    return np.broadcast_to(dt, (n,)) if dt.ndim == 0 else dt
+
+
+def complementary_batch(accel, gyro, dt, alpha=COMPLEMENTARY_ALPHA, state=None):
+    """
+    Filtro complementario sobre arrays accel y gyro (N, 3) y dt (N,) o escalar.
+    Devuelve (ángulos en grados (N, 3), estado) con el mismo resultado que
+    aplicar ComplementaryFilter muestra a muestra; el estado se pasa a la
+    siguiente llamada para procesar un flujo por lotes.
+    """
+    import numpy as np
+    if not 0.0 <= alpha <= 1.0:
+        raise ValueError("alpha debe estar entre 0 y 1")
+    accel = np.asarray(accel, dtype=np.float64)
+    gyro = np.asarray(gyro, dtype=np.float64)
+    n = len(accel)
+    if n == 0:
+        return np.empty((0, 3)), state
+    dt = _as_dt(dt, n)
+    ref = _accel_angles_np(accel)
+    rates = gyro * DEG * dt[:, None]
+    if state is None:
+        # La primera muestra solo inicializa, igual que en la versión por muestra
+        state = (ref[0, 0], ref[0, 1], 0.0)
+        head = np.array([state])
+        rates, ref = rates[1:], ref[1:]
+    else:
+        head = np.empty((0, 3))
+    angles = np.empty((len(ref), 3))
+    u = alpha * rates[:, :2] + (1.0 - alpha) * ref
+    angles[:, :2] = _linear_scan(u, alpha, state[:2]) if len(u) else u
+    angles[:, 2] = state[2] + np.cumsum(rates[:, 2])
+    angles = np.concatenate([head, angles])
+    return angles / DEG, tuple(float(v) for v in angles[-1])
+
+
+def _madgwick_kernel(q, accel, gyro, dt, beta, out):
+    # Bucle secuencial sobre listas: cada paso depende del anterior
+    q0, q1, q2, q3 = q
+    step = _madgwick_step
+    for i in range(len(out)):
+        a = accel[i]
+        g = gyro[i]
+        q0, q1, q2, q3 = step(q0, q1, q2, q3, a[0], a[1], a[2], g[0], g[1], g[2], dt[i], beta)
+        out[i] = (q0, q1, q2, q3)
+    return q0, q1, q2, q3
+
+
+def madgwick_batch(accel, gyro, dt, beta=MADGWICK_BETA, state=None):
+    """
+    Filtro de Madgwick sobre arrays accel y gyro (N, 3) y dt (N,) o escalar.
+    Devuelve (ángulos en grados (N, 3), cuaternión final) con el mismo
+    resultado que MadgwickFilter muestra a muestra.
+
+    La recursión del cuaternión no se puede vectorizar en el tiempo: el bucle
+    corre sobre listas de Python y solo la conversión a ángulos es numpy.
+    """
+    import numpy as np
+    accel = np.asarray(accel, dtype=np.float64)
+    gyro = np.asarray(gyro, dtype=np.float64)
+    n = len(accel)
+    if n == 0:
+        return np.empty((0, 3)), state
+    dt = _as_dt(dt, n)
+    quats = [None] * n
+    if state is None:
+        state = quaternion_from_angles(*accel_angles(*accel[0]))
+        quats[0] = state
+        start = 1
+    else:
+        start = 0
+    rest = quats[start:]
+    state = _madgwick_kernel(state, accel[start:].tolist(), (gyro[start:] * DEG).tolist(),
+                             dt[start:].tolist(), beta, rest)
+    quats[start:] = rest
+    return quaternions_to_angles(np.array(quats)), state
+
+
+def quaternions_to_angles(q):
+    """Ángulos X, Y, Z en grados de un array de cuaterniones (N, 4)."""
+    import numpy as np
+    q0, q1, q2, q3 = q[:, 0], q[:, 1], q[:, 2], q[:, 3]
+    return np.degrees(np.stack([
+        np.arctan2(2.0 * (q0 * q1 + q2 * q3), 1.0 - 2.0 * (q1 * q1 + q2 * q2)),
+        np.arcsin(np.clip(2.0 * (q0 * q2 - q3 * q1), -1.0, 1.0)),
+        np.arctan2(2.0 * (q0 * q3 + q1 * q2), 1.0 - 2.0 * (q2 * q2 + q3 * q3)),
+    ], axis=1))
+
+
+FILTERS = {"complementary": complementary_batch, "madgwick": madgwick_batch}
+
+
+def orientation_batch(accel, gyro, dt, method="complementary", **params):
+    """Aplica el filtro `method` ('complementary' o 'madgwick') y devuelve los ángulos (N, 3)."""
+    try:
+        run = FILTERS[method]
+    except KeyError:
+        raise ValueError("Filtro de orientación desconocido: {}".format(method))
+    return run(accel, gyro, dt, **params)[0]
@@ -0,0 +1,335 @@
+# Protocolo binario entre el ESP32 (main.py) y la interfaz (INTERFAZ.PY).
+#
+# Es opcional: el formato de texto "Aceleración (m/s²) -> ... | Ángulos ..."
+# sigue siendo el predeterminado. En modo binario el ESP32 envía, al aceptar
+# un cliente, una cabecera versionada seguida de tramas de tamaño fijo:
+#
+#   Cabecera (12 bytes, big-endian):
+#     magic "MPUB" | versión u8 | flags u8 | rango acel u8 | rango giro u8 | periodo µs u32
+#   Trama (22 bytes, big-endian):
+#     seq u32 | t_us u32 | AcX AcY AcZ GyX GyY GyZ int16 | rango acel u8 | rango giro u8
+#
+# Los valores son cuentas crudas del MPU6050 y los rangos son los valores de
+# los registros ACCEL_CONFIG/GYRO_CONFIG, de modo que el ESP32 no convierte
+# nada y el PC decodifica lotes completos con numpy.frombuffer. El periodo de
+# muestreo va en µs, exacto para cualquier SAMPLE_PERIOD_MS; el PC lo necesita
+# para saber cuántas vueltas dio ticks_us entre dos tramas separadas.
+#
+# Con FLAG_STATS en la cabecera, el flujo lleva además tramas de estadísticas
+# del ESP32, del mismo tamaño y con seq = STATS_SEQ:
+#     STATS_SEQ u32 | t_us u32 | 7 x u16 (STATS_FIELDS)
+# En modo texto van como una línea "Estadísticas -> campo: valor ...".
+#
+# Con FLAG_EVENTS el ESP32 está en modo evento: solo envía las ventanas con
+# movimiento y alguna trama de latido en reposo. seq no salta entre ellas
+# (solo donde se perdieron muestras), pero t_us sigue siendo el instante real.
+#
+# Por UDP (TRANSPORT = 'udp' en main.py) no hay conexión: cada datagrama lleva
+# una cabecera como la de TCP pero con magic "MPUD", seguida de hasta
+# UDP_MAX_FRAMES tramas consecutivas. El PC detecta huecos por seq y reordena
+# los datagramas dentro de una ventana corta (DatagramReorderer).
+#
+# La parte de empaquetado funciona en MicroPython; la de decodificación
+# (numpy) solo se usa en el PC.
+
+import struct
+
+MAGIC = b"MPUB"
+VERSION = 2  # 2: periodo de muestreo en µs (u32) en lugar de Hz enteros (u16)
+
+HEADER_FMT = ">4sBBBBI"
+HEADER_SIZE = struct.calcsize(HEADER_FMT)
+DATAGRAM_MAGIC = b"MPUD"
+# Cabecera + tramas dentro de un paquete Ethernet sin fragmentar (1472 bytes de datos UDP)
+UDP_MAX_FRAMES = 60
+FRAME_FMT = ">IIhhhhhhBB"
+FRAME_SIZE = struct.calcsize(FRAME_FMT)
+
+# time.ticks_us() de MicroPython da la vuelta a 2**30 en el ESP32
+TICKS_PERIOD = 1 << 30
+
+FLAG_STATS = 0x01
+FLAG_EVENTS = 0x02  # Modo evento (motion_trigger.py): solo eventos y latidos
+STATS_SEQ = 0xFFFFFFFF
+STATS_FMT = ">IIHHHHHHH"
+# Tiempos medios/máximos desde la trama anterior; los contadores son
+# acumulados desde el arranque (módulo 2**16)
+STATS_FIELDS = (
+    "read_us",      # Lectura I2C media por muestra (µs)
+    "angle_us",     # Cálculo de ángulos medio por muestra, solo en modo texto (µs)
+    "loop_ms",      # Periodo máximo del bucle de reparto (ms)
+    "send_ms",      # Envío (write + drain) más largo (ms)
+    "i2c_retries",  # Reintentos de lectura I2C (MPU6050._failCount)
+    "send_stalls",  # Envíos que superaron SEND_STALL_MS
+    "mem_free_kb",  # Memoria libre (KiB)
+)
+STATS_LINE_PREFIX = "Estadísticas ->"
+
+_GRAVITIY_MS2 = 9.80665
+# Escalas por rango, indexadas por (valor del registro >> 3)
+_ACC_SCALERS = (16384.0, 8192.0, 4096.0, 2048.0)
+_GYR_SCALERS = (131.0, 65.5, 32.8, 16.4)
+
+
+def pack_header(accel_range, gyro_range, period_us, flags=0):
+    """Devuelve la cabecera que el ESP32 envía al inicio de cada conexión."""
+    return struct.pack(HEADER_FMT, MAGIC, VERSION, flags, accel_range, gyro_range, _check_period(period_us))
+
+
+def pack_datagram_header_into(buf, accel_range, gyro_range, period_us, flags=0):
+    """Escribe en buf[0:HEADER_SIZE] la cabecera de un datagrama UDP."""
+    struct.pack_into(HEADER_FMT, buf, 0, DATAGRAM_MAGIC, VERSION, flags, accel_range, gyro_range,
+                     _check_period(period_us))
+
+
+def _check_period(period_us):
+    period_us = int(period_us)
+    if not 0 < period_us <= 0xFFFFFFFF:
+        raise ValueError("Periodo de muestreo fuera de rango: {} µs".format(period_us))
+    return period_us
+
+
+def unpack_header(buf, magic_expected=MAGIC):
+    """
+    Valida y decodifica una cabecera. Lanza ValueError si no es válida (también
+    con periodo 0: sin él no se pueden colocar las tramas tras un hueco).
+    """
+    if len(buf) < HEADER_SIZE:
+        raise ValueError("Cabecera incompleta")
+    magic, version, flags, accel_range, gyro_range, period_us = struct.unpack_from(HEADER_FMT, buf)
+    if magic != magic_expected:
+        raise ValueError("Cabecera binaria inválida: {!r}".format(bytes(magic)))
+    if version != VERSION:
+        raise ValueError("Versión de protocolo no soportada: {}".format(version))
+    if period_us == 0:
+        raise ValueError("Cabecera sin periodo de muestreo")
+    return {"version": version, "flags": flags, "accel_range": accel_range, "gyro_range": gyro_range,
+            "period_us": period_us, "rate_hz": 1e6 / period_us}
+
+
+def pack_frame_into(buf, offset, seq, t_us, raw, accel_range, gyro_range):
+    """
+    Escribe una trama en buf[offset:offset + FRAME_SIZE] sin reservar memoria.
+    raw son los 14 bytes leídos con MPU6050.read_raw_into (acel, temp, giro).
+    """
+    struct.pack_into(">II", buf, offset, seq & 0xFFFFFFFF, t_us & 0xFFFFFFFF)
+    buf[offset + 8:offset + 14] = raw[0:6]
+    buf[offset + 14:offset + 20] = raw[8:14]
+    buf[offset + 20] = accel_range
+    buf[offset + 21] = gyro_range
+
+
+def pack_stats_into(buf, offset, t_us, values):
+    """Escribe una trama de estadísticas con `values` en el orden de STATS_FIELDS."""
+    struct.pack_into(STATS_FMT, buf, offset, STATS_SEQ, t_us & 0xFFFFFFFF,
+                     *[min(int(v), 0xFFFF) if v > 0 else 0 for v in values])
+
+
+def format_stats_line(frame, offset=0):
+    """Línea de texto equivalente a la trama de estadísticas en frame[offset:]."""
+    values = struct.unpack_from(STATS_FMT, frame, offset)[2:]
+    return STATS_LINE_PREFIX + "".join(" {}: {}".format(k, v) for k, v in zip(STATS_FIELDS, values)) + "\n"
+
+
+def is_stats_frame(frame, offset=0):
+    return frame[offset] == 0xFF and frame[offset + 1] == 0xFF and frame[offset + 2] == 0xFF and frame[offset + 3] == 0xFF
+
+
+# --- Decodificación en el PC (requiere numpy) ---
+
+def frame_dtype():
+    import numpy as np
+    return np.dtype([
+        ("seq", ">u4"),
+        ("t_us", ">u4"),
+        ("accel", ">i2", (3,)),
+        ("gyro", ">i2", (3,)),
+        ("accel_range", "u1"),
+        ("gyro_range", "u1"),
+    ])
+
+
+def split_stats(frames):
+    """
+    Separa las tramas de estadísticas de las de datos. Devuelve (datos, lista
+    de diccionarios {campo: valor, "t_us": ...}).
+    """
+    mask = frames["seq"] == STATS_SEQ
+    if not mask.any():
+        return frames, []
+    stats = []
+    for frame in frames[mask]:
+        values = struct.unpack(STATS_FMT, frame.tobytes())
+        stats.append(dict(zip(STATS_FIELDS, values[2:]), t_us=values[1]))
+    return frames[~mask], stats
+
+
+def parse_stats_line(line):
+    """Diccionario {campo: valor} de una línea de estadísticas (str), o None si no lo es."""
+    if not line.startswith(STATS_LINE_PREFIX):
+        return None
+    tokens = line[len(STATS_LINE_PREFIX):].split()
+    try:
+        return {k.rstrip(":"): int(v) for k, v in zip(tokens[0::2], tokens[1::2])}
+    except ValueError:
+        return None
+
+
+def unpack_datagram(data):
+    """
+    Decodifica un datagrama UDP. Devuelve (cabecera, tramas). Lanza ValueError
+    si no es un datagrama válido (magic, versión o tamaño).
+    """
+    import numpy as np
+    header = unpack_header(data, DATAGRAM_MAGIC)
+    body = memoryview(data)[HEADER_SIZE:]
+    if len(body) % FRAME_SIZE:
+        raise ValueError("Datagrama truncado: {} bytes".format(len(data)))
+    return header, np.frombuffer(body, dtype=frame_dtype())
+
+
+def frames_to_physical(frames):
+    """
+    Convierte un array de tramas a unidades físicas con operaciones vectorizadas.
+    Devuelve un diccionario con accel (m/s²), gyro (deg/s) y angles (grados),
+    cada uno de forma (N, 3), usando las mismas fórmulas de ángulo que main.py.
+    """
+    import numpy as np
+    acc_scale = np.asarray(_ACC_SCALERS)[(frames["accel_range"] >> 3) & 0x03]
+    gyr_scale = np.asarray(_GYR_SCALERS)[(frames["gyro_range"] >> 3) & 0x03]
+    accel = frames["accel"].astype(np.float64) * (_GRAVITIY_MS2 / acc_scale)[:, None]
+    gyro = frames["gyro"].astype(np.float64) / gyr_scale[:, None]
+
+    ax, ay, az = accel[:, 0], accel[:, 1], accel[:, 2]
+    angles = np.degrees(np.stack([
+        np.arctan2(ay, np.sqrt(ax * ax + az * az)),
+        np.arctan2(-ax, np.sqrt(ay * ay + az * az)),
+        np.arctan2(np.sqrt(ax * ax + ay * ay), az),
+    ], axis=1))
+    return {"accel": accel, "gyro": gyro, "angles": angles}
+
+
+class BinaryStreamDecoder:
+    """
+    Decodifica el flujo binario recibido por el socket en lotes.
+
+    feed() acepta trozos de cualquier tamaño, guarda los bytes de una trama
+    incompleta para la siguiente llamada y devuelve un array estructurado con
+    todas las tramas completas. times_s() convierte los t_us del dispositivo
+    a segundos desde la primera trama, corrigiendo la vuelta de ticks_us.
+    """
+
+    def __init__(self):
+        import numpy as np
+        self._np = np
+        self.dtype = frame_dtype()
+        self.header = None
+        self._pending = bytearray()
+        self._last_tick = None
+        self._elapsed_us = 0
+
+    def feed(self, data):
+        np = self._np
+        self._pending += data
+        if self.header is None:
+            if len(self._pending) < HEADER_SIZE:
+                return np.empty(0, dtype=self.dtype)
+            self.header = unpack_header(self._pending)
+            del self._pending[:HEADER_SIZE]
+        n = len(self._pending) // FRAME_SIZE
+        if n == 0:
+            return np.empty(0, dtype=self.dtype)
+        # Copia única del bloque completo; el resto queda pendiente
+        frames = np.frombuffer(bytes(self._pending[:n * FRAME_SIZE]), dtype=self.dtype)
+        del self._pending[:n * FRAME_SIZE]
+        return frames
+
+    def times_s(self, frames):
+        """Segundos desde la primera trama recibida, corrigiendo la vuelta de ticks_us."""
+        np = self._np
+        if len(frames) == 0:
+            return np.empty(0)
+        ticks = frames["t_us"].astype(np.int64) % TICKS_PERIOD
+        prev = ticks[0] if self._last_tick is None else self._last_tick
+        steps = np.diff(np.concatenate(([prev], ticks))) % TICKS_PERIOD
+        elapsed = self._elapsed_us + np.cumsum(steps)
+        self._last_tick = int(ticks[-1])
+        self._elapsed_us = int(elapsed[-1])
+        return elapsed / 1e6
+
+
+class DatagramReorderer:
+    """
+    Reordena por seq los lotes de tramas de datagramas UDP, que pueden llegar
+    desordenados, duplicados o no llegar.
+
+    push() guarda un lote (tramas de datos consecutivas, sin estadísticas) y
+    pop_ready() devuelve, en orden, los que ya se pueden entregar: el que
+    continúa la secuencia, o el siguiente disponible si hay más de `window`
+    esperando o el más antiguo lleva `timeout_s` esperando (el hueco se da por
+    perdido). Los lotes que llegan después de darse por perdidos se descartan.
+    """
+
+    def __init__(self, window=8, timeout_s=0.05):
+        import heapq
+        self._heapq = heapq
+        self.window = window
+        self.timeout_s = timeout_s
+        self.next_seq = None
+        self._pending = []  # heap de (primer seq, llegada, orden, tramas)
+        self._count = 0
+        self._late_run = 0  # Lotes tardíos seguidos
+        self.reordered = 0  # Lotes que llegaron detrás de otro posterior y se recolocaron
+        self.late = 0       # Lotes descartados por llegar tarde o duplicados
+        self.gaps = 0       # Huecos de seq dados por perdidos
+        self.missing = 0    # Tramas que faltaban en esos huecos
+
+    def __len__(self):
+        return len(self._pending)
+
+    def push(self, frames, now):
+        if len(frames) == 0:
+            return
+        first = int(frames["seq"][0])
+        last = int(frames["seq"][-1])
+        if self.next_seq is not None and last < self.next_seq:
+            self._late_run += 1
+            if self._late_run <= self.window:
+                self.late += 1
+                return
+            # Más de una ventana seguida por detrás: el ESP32 se reinició (seq volvió a 0)
+            self.next_seq = None
+            self._pending.clear()
+        self._late_run = 0
+        if self._pending and first < max(item[0] for item in self._pending):
+            self.reordered += 1
+        self._count += 1
+        self._heapq.heappush(self._pending, (first, now, self._count, frames))
+
+    def pop_ready(self, now):
+        """Lista de lotes de tramas listos para entregar, en orden de seq."""
+        ready = []
+        pending = self._pending
+        while pending:
+            first, _, _, frames = pending[0]
+            waited = now - min(item[1] for item in pending)
+            if not (self.next_seq is None or first <= self.next_seq or len(pending) > self.window
+                    or waited >= self.timeout_s):
+                break
+            self._heapq.heappop(pending)
+            if self.next_seq is not None:
+                if first > self.next_seq:
+                    self.gaps += 1
+                    self.missing += first - self.next_seq
+                elif first < self.next_seq:
+                    # Solapado con lo ya entregado (duplicado parcial): solo lo nuevo
+                    frames = frames[frames["seq"] >= self.next_seq]
+                    if len(frames) == 0:
+                        self.late += 1
+                        continue
+            ready.append(frames)
+            self.next_seq = int(frames["seq"][-1]) + 1
+        return ready
+
+    def stats(self):
+        return {"reordered": self.reordered, "late": self.late, "gaps": self.gaps, "missing": self.missing}
@@ -0,0 +1,228 @@
+# Grabación continua de sesiones a disco y lectura con numpy.memmap.
+#
+# Formato del archivo (.mpurec), solo se añade al final:
+#   - Cabecera de HEADER_SIZE bytes: magic "MPUREC01", longitud u32 (little
+#     endian) y un JSON pequeño con las columnas, el rango y la frecuencia del
+#     dispositivo; el resto se rellena con espacios para poder reescribirla
+#     cuando llegan esos datos sin mover los registros.
+#   - Registros de ancho fijo: N_COLUMNS float64 little-endian por muestra,
+#     con las mismas columnas que sample_buffer (t, acc, gyro, ángulos).
+#
+# El escritor recibe bloques desde el hilo de lectura y los escribe y vuelca
+# a disco en su propio hilo, así la captura nunca espera al disco.
+
+import json
+import os
+import queue
+import struct
+import threading
+import time
+
+import numpy as np
+
+from orientation import FILTERS
+from sample_buffer import COLUMN_NAMES, N_COLUMNS, T, ACCEL, GYRO, ANGLES
+
+MAGIC = b"MPUREC01"
+HEADER_SIZE = 4096
+RECORD_DTYPE = np.dtype("<f8")
+RECORD_SIZE = N_COLUMNS * RECORD_DTYPE.itemsize
+FILE_EXTENSION = ".mpurec"
+# Marca en la cola del escritor: volcar el archivo en cuanto se llegue a ella
+_FLUSH = "flush"
+
+# Columnas del CSV, las mismas que escribía INTERFAZ.PY
+CSV_HEADER = ["Tiempo (s)", "Acc X (m/s^2)", "Acc Y (m/s^2)", "Acc Z (m/s^2)", "Ang X (deg)", "Ang Y (deg)", "Ang Z (deg)"]
+
+
+def _encode_header(metadata):
+    body = json.dumps(metadata, ensure_ascii=False).encode("utf-8")
+    header = MAGIC + struct.pack("<I", len(body)) + body
+    if len(header) > HEADER_SIZE:
+        raise ValueError("Metadatos de la grabación demasiado grandes")
+    return header.ljust(HEADER_SIZE, b" ")
+
+
+def _decode_header(raw):
+    if raw[:len(MAGIC)] != MAGIC:
+        raise ValueError("No es una grabación MPU6050 (.mpurec)")
+    (length,) = struct.unpack_from("<I", raw, len(MAGIC))
+    start = len(MAGIC) + 4
+    return json.loads(raw[start:start + length].decode("utf-8"))
+
+
+class SessionRecorder:
+    """
+    Escribe todas las muestras de una captura en un archivo .mpurec.
+
+    write_rows() solo encola el bloque (N, N_COLUMNS); un hilo lo escribe y
+    hace flush cada `flush_interval_s`. close() vacía la cola y sincroniza.
+    """
+
+    def __init__(self, path, metadata=None, flush_interval_s=1.0):
+        self.path = path
+        self.metadata = {
+            "format": "mpurec",
+            "version": 1,
+            "columns": COLUMN_NAMES,
+            "dtype": RECORD_DTYPE.str,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "accel_range": None,
+            "gyro_range": None,
+            "rate_hz": None,
+        }
+        self.metadata.update(metadata or {})
+        self.flush_interval_s = flush_interval_s
+        self.rows_written = 0
+        self._closed = False
+        self._queue = queue.Queue()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "wb")
+        self._file.write(_encode_header(self.metadata))
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write_rows(self, rows):
+        """Encola un bloque de muestras (N, N_COLUMNS) para escribirlo."""
+        if len(rows) and not self._closed:
+            self._queue.put(np.ascontiguousarray(rows, dtype=RECORD_DTYPE))
+
+    def update_metadata(self, **values):
+        """Actualiza la cabecera JSON (p. ej. rango y frecuencia al conocerlos)."""
+        if not self._closed:
+            self._queue.put(dict(values))
+
+    def pending(self):
+        """Bloques (o cambios de cabecera) encolados que aún no se han escrito."""
+        return self._queue.qsize()
+
+    def flush(self):
+        """
+        Espera a que todo lo encolado esté escrito y volcado en el archivo, de
+        modo que open_recording() lo vea sin cerrar la grabación.
+        """
+        if not self._closed:
+            self._queue.put(_FLUSH)
+        self._queue.join()
+
+    def close(self):
+        """Escribe lo pendiente y cierra el archivo. Lo que llegue después se ignora."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval_s)
+            except queue.Empty:
+                item = False  # Nada nuevo: solo toca volcar
+            try:
+                if item is None:
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                    self._file.close()
+                    return
+                if isinstance(item, dict):
+                    self.metadata.update(item)
+                    self._file.seek(0)
+                    self._file.write(_encode_header(self.metadata))
+                    self._file.seek(0, os.SEEK_END)
+                elif item is not False and item is not _FLUSH:
+                    self._file.write(item.tobytes())
+                    self.rows_written += len(item)
+                now = time.monotonic()
+                if item is _FLUSH or now - last_flush >= self.flush_interval_s:
+                    self._file.flush()
+                    last_flush = now
+            except Exception as e:
+                print(f"Error al escribir la grabación {self.path}: {e}")
+            finally:
+                if item is not False:
+                    self._queue.task_done()
+
+
+class Recording:
+    """
+    Grabación abierta con numpy.memmap: acceso aleatorio inmediato aunque
+    dure horas, sin cargarla en memoria. `data` tiene forma (N, N_COLUMNS);
+    un registro final incompleto (captura interrumpida) se ignora.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            self.metadata = _decode_header(file.read(HEADER_SIZE))
+        n = max(0, (os.path.getsize(path) - HEADER_SIZE) // RECORD_SIZE)
+        if n == 0:
+            self.data = np.empty((0, N_COLUMNS), dtype=RECORD_DTYPE)
+        else:
+            self.data = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(n, N_COLUMNS))
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def time(self):
+        return self.data[:, T]
+
+    @property
+    def accel(self):
+        return self.data[:, ACCEL]
+
+    @property
+    def angles(self):
+        return self.data[:, ANGLES]
+
+    @property
+    def gyro(self):
+        return self.data[:, GYRO]
+
+    def column(self, name):
+        return self.data[:, COLUMN_NAMES.index(name)]
+
+    def between(self, t_start, t_end):
+        """Vista de las muestras con t_start <= t < t_end (el tiempo es creciente)."""
+        t = self.time
+        return self.data[np.searchsorted(t, t_start):np.searchsorted(t, t_end)]
+
+    def orientation(self, method="complementary", chunk_rows=1000000, **params):
+        """
+        Recalcula los ángulos (N, 3) en grados fusionando acelerómetro y
+        giroscopio con el filtro `method` de orientation.py, por bloques para
+        no cargar la grabación entera. Sin giroscopio (modo texto) da NaN.
+        """
+        run = FILTERS[method]
+        out = np.empty((len(self.data), 3))
+        state = None
+        last_t = self.data[0, T] if len(self.data) else 0.0
+        for start in range(0, len(self.data), chunk_rows):
+            chunk = self.data[start:start + chunk_rows]
+            dt = np.diff(chunk[:, T], prepend=last_t)
+            out[start:start + len(chunk)], state = run(chunk[:, ACCEL], chunk[:, GYRO], dt, state=state, **params)
+            last_t = chunk[-1, T]
+        return out
+
+    def to_csv(self, filename, chunk_rows=100000):
+        """
+        Exporta a CSV con las mismas columnas que INTERFAZ.PY, con el tiempo
+        relativo a la primera muestra. Se escribe por bloques.
+        """
+        with open(filename, mode="w", newline="") as file:
+            file.write(",".join(CSV_HEADER) + "\n")
+            if len(self.data) == 0:
+                return
+            t0 = self.data[0, T]
+            for start in range(0, len(self.data), chunk_rows):
+                chunk = self.data[start:start + chunk_rows]
+                out = np.column_stack([chunk[:, T] - t0, chunk[:, ACCEL], chunk[:, ANGLES]])
+                np.savetxt(file, out, delimiter=",", fmt=["%.3f"] + ["%.3f"] * 3 + ["%.1f"] * 3)
+
+
+def open_recording(path):
+    return Recording(path)
@@ -0,0 +1,159 @@
+# Motor de renderizado para INTERFAZ.PY.
+#
+# Cada gráfico conserva su Figure/Axes/Line2D entre cuadros: solo se cambian
+# los datos de la línea con set_data y se repinta sobre el fondo guardado
+# (blitting). El fondo completo (ejes, etiquetas, rejilla) solo se redibuja
+# cuando cambian los límites del eje Y.
+#
+# El renderizado corre en su propio hilo a un máximo de cuadros por segundo,
+# independiente de la velocidad de llegada de datos: todas las muestras
+# recibidas desde el último cuadro se agrupan en uno solo.
+
+import base64
+import io
+import threading
+import time
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import matplotlib.image as mpimg
+
+# El eje Y se ajusta a los datos visibles con un margen: se amplía en cuanto se
+# salen y solo se reduce cuando el ajuste ocuparía menos de YLIM_SHRINK del
+# rango actual (histéresis, para no redibujar el fondo en cada cuadro)
+YLIM_MARGIN = 0.2
+YLIM_MIN_MARGIN = 0.5
+YLIM_SHRINK = 0.4
+
+class PlotPanel:
+    """Gráfico persistente de una sola señal, renderizado a PNG base64 para ft.Image."""
+
+    def __init__(self, title, y_label, window_s, x_label="Tiempo (s)", figsize=(4, 3), dpi=80, color=None):
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot(111)
+        self.ax.set_title(title)
+        self.ax.set_xlabel(x_label)
+        self.ax.set_ylabel(y_label)
+        self.ax.grid(True)
+        # El eje X es el tiempo relativo a la última muestra: sus límites no
+        # cambian entre cuadros, así que el fondo sigue siendo válido.
+        self.ax.set_xlim(-window_s, 0)
+        self.ax.set_ylim(-1, 1)
+        self.fig.tight_layout()
+        (self.line,) = self.ax.plot([], [], color=color, animated=True)
+        self._background = None
+        self.full_redraws = 0
+
+    def _fit_ylim(self, y):
+        """Ajusta el eje Y a los datos visibles `y`; devuelve True si cambió."""
+        finite = y[np.isfinite(y)]
+        if finite.size == 0:
+            return False
+        lo, hi = float(finite.min()), float(finite.max())
+        margin = max((hi - lo) * YLIM_MARGIN, YLIM_MIN_MARGIN)
+        cur_lo, cur_hi = self.ax.get_ylim()
+        inside = lo >= cur_lo and hi <= cur_hi
+        if inside and (hi - lo + 2 * margin) >= YLIM_SHRINK * (cur_hi - cur_lo):
+            return False
+        self.ax.set_ylim(lo - margin, hi + margin)
+        return True
+
+    def _full_draw(self):
+        self.canvas.draw()
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.full_redraws += 1
+
+    def render(self, x, y):
+        """Actualiza la línea con (x, y) y devuelve el cuadro como PNG en base64."""
+        y = np.asarray(y, dtype=float)
+        self.line.set_data(x, y)
+        if self._background is None or self._fit_ylim(y):
+            self._full_draw()
+        else:
+            self.canvas.restore_region(self._background)
+        self.ax.draw_artist(self.line)
+        buf = io.BytesIO()
+        # Compresión mínima: el PNG solo viaja de este proceso a la vista de Flet
+        mpimg.imsave(buf, np.asarray(self.canvas.buffer_rgba()), format="png",
+                     pil_kwargs={"compress_level": 1})
+        return base64.b64encode(buf.getvalue()).decode("utf-8")
+
+    def placeholder(self, text="Esperando datos..."):
+        """Imagen del gráfico vacío con un texto centrado."""
+        self.line.set_data([], [])
+        label = self.ax.text(0.5, 0.5, text, ha="center", va="center", transform=self.ax.transAxes)
+        self.canvas.draw()
+        label.remove()
+        self._background = None
+        buf = io.BytesIO()
+        self.fig.savefig(buf, format="png")
+        return base64.b64encode(buf.getvalue()).decode("utf-8")
+
+
+class FrameRateLimitedRenderer:
+    """
+    Hilo que renderiza los paneles como mucho `max_fps` veces por segundo.
+
+    snapshot() debe devolver {nombre: (x, y)} con los datos a dibujar y
+    publish() recibe {nombre: png_base64} para mostrarlos en la UI. El hilo
+    de lectura solo llama a notify() por cada lote recibido. Con `metrics`
+    (metrics.StageMetrics) cada cuadro se anota en la etapa "render".
+    """
+
+    def __init__(self, panels, snapshot, publish, max_fps=10, metrics=None):
+        self.panels = panels
+        self.metrics = metrics
+        self.snapshot = snapshot
+        self.publish = publish
+        self.max_fps = max_fps
+        self._lock = threading.Lock()
+        self._pending_samples = 0
+        self._thread = None
+        # Estadísticas del último cuadro y acumuladas
+        self.frames = 0
+        self.last_render_ms = 0.0
+        self.avg_render_ms = 0.0
+        self.last_coalesced = 0
+
+    def notify(self, n_samples=1):
+        """Indica que llegaron n_samples nuevas muestras desde el último cuadro."""
+        with self._lock:
+            self._pending_samples += n_samples
+
+    def render_frame(self):
+        """Renderiza un cuadro si hay datos nuevos. Devuelve True si dibujó."""
+        with self._lock:
+            pending = self._pending_samples
+            self._pending_samples = 0
+        if pending == 0:
+            return False
+        t0 = time.perf_counter()
+        data = self.snapshot()
+        images = {name: self.panels[name].render(x, y) for name, (x, y) in data.items()}
+        elapsed = time.perf_counter() - t0
+        self.last_render_ms = elapsed * 1000
+        if self.metrics is not None:
+            self.metrics.record("render", elapsed, pending)
+        self.frames += 1
+        self.last_coalesced = pending
+        # Media móvil exponencial del tiempo de renderizado
+        self.avg_render_ms += (self.last_render_ms - self.avg_render_ms) * (0.1 if self.frames > 1 else 1.0)
+        self.publish(images)
+        return True
+
+    def _run(self, stop_event):
+        period = 1.0 / self.max_fps
+        while not stop_event.is_set():
+            t0 = time.perf_counter()
+            try:
+                self.render_frame()
+            except Exception as e:
+                print(f"Error al renderizar: {e}")
+            stop_event.wait(max(0.0, period - (time.perf_counter() - t0)))
+
+    def start(self, stop_event):
+        self._thread = threading.Thread(target=self._run, args=(stop_event,), daemon=True)
+        self._thread.start()
+        return self._thread
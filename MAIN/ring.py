@@ -0,0 +1,81 @@
+# Buffer circular de tramas de tamaño fijo para el ESP32 (MicroPython).
+#
+# Desacopla el muestreo (productor: temporizador) del envío por Wi-Fi
+# (consumidor: bucle principal). Toda la memoria se reserva al crearlo.
+# Un solo productor escribe `written` y un solo consumidor escribe `read`,
+# así que no hace falta deshabilitar interrupciones entre ambos.
+
+
+class FrameRing:
+    """Cola circular de `capacity` tramas de `frame_size` bytes cada una."""
+
+    def __init__(self, capacity, frame_size):
+        self.capacity = capacity
+        self.frame_size = frame_size
+        self.buf = bytearray(capacity * frame_size)
+        self.mv = memoryview(self.buf)
+        self.written = 0  # Tramas guardadas desde el inicio (contador "buffered")
+        self.read = 0     # Tramas consumidas desde el inicio
+        self.sent = 0     # Tramas entregadas al cliente
+        # Pérdidas separadas por quien las cuenta, para no compartir contadores
+        self.overflow = 0   # Productor: buffer lleno al muestrear
+        self.discarded = 0  # Consumidor: descartadas sin enviar (p. ej. sin cliente)
+
+    def __len__(self):
+        return self.written - self.read
+
+    def free(self):
+        return self.capacity - (self.written - self.read)
+
+    def reserve(self):
+        """
+        Devuelve el desplazamiento en `buf` de la siguiente ranura libre, o -1
+        si el buffer está lleno (la muestra nueva se descarta y se cuenta en
+        overflow). Tras escribirla hay que llamar a commit().
+        """
+        if self.written - self.read >= self.capacity:
+            self.overflow += 1
+            return -1
+        return (self.written % self.capacity) * self.frame_size
+
+    def commit(self):
+        self.written += 1
+
+    def push(self, frame):
+        """Copia una trama ya empaquetada. Devuelve False (y cuenta overflow) si está lleno."""
+        offset = self.reserve()
+        if offset < 0:
+            return False
+        self.buf[offset:offset + self.frame_size] = frame
+        self.written += 1
+        return True
+
+    def peek(self, max_frames):
+        """
+        Devuelve (vista, n): hasta max_frames tramas pendientes contiguas en
+        memoria, sin consumirlas. Puede devolver menos si el bloque da la vuelta.
+        """
+        n = self.written - self.read
+        if n > max_frames:
+            n = max_frames
+        first = self.read % self.capacity
+        if first + n > self.capacity:
+            n = self.capacity - first
+        start = first * self.frame_size
+        return self.mv[start:start + n * self.frame_size], n
+
+    def consume(self, n, sent=True):
+        self.read += n
+        if sent:
+            self.sent += n
+        else:
+            self.discarded += n
+
+    def clear(self):
+        """Descarta todo lo pendiente (contado como perdido)."""
+        self.consume(self.written - self.read, sent=False)
+
+    def stats(self):
+        return {"buffered": self.written, "sent": self.sent,
+                "dropped": self.overflow + self.discarded,
+                "pending": self.written - self.read}
@@ -0,0 +1,141 @@
+# Buffer circular columnar de muestras para INTERFAZ.PY.
+#
+# Sustituye a los seis deques: un único array numpy preasignado guarda el
+# tiempo real de cada muestra y los canales de aceleración, giroscopio y
+# ángulos. Cada muestra se escribe dos veces (en i y en i + capacidad), de
+# modo que las últimas n muestras siempre están contiguas en memoria y se
+# pueden devolver como vista, sin copiar, aunque el buffer haya dado la vuelta.
+
+import threading
+
+import numpy as np
+
+# Columnas del array de muestras
+T = 0                  # Tiempo (s) desde el inicio de la captura
+ACCEL = slice(1, 4)    # Acc X, Y, Z (m/s²)
+GYRO = slice(4, 7)     # Gyro X, Y, Z (deg/s), NaN si el flujo no lo incluye
+ANGLES = slice(7, 10)  # Ang X, Y, Z (grados)
+N_COLUMNS = 10
+
+COLUMN_NAMES = ["t", "acc_x", "acc_y", "acc_z", "gyro_x", "gyro_y", "gyro_z", "ang_x", "ang_y", "ang_z"]
+
+
+def make_rows(t, accel, gyro=None, angles=None):
+    """
+    Arma un bloque (N, N_COLUMNS) a partir de t (N,) y accel/gyro/angles (N, 3).
+    Los canales que falten quedan en NaN.
+    """
+    t = np.asarray(t, dtype=float)
+    block = np.full((len(t), N_COLUMNS), np.nan)
+    block[:, T] = t
+    block[:, ACCEL] = accel
+    if gyro is not None:
+        block[:, GYRO] = gyro
+    if angles is not None:
+        block[:, ANGLES] = angles
+    return block
+
+
+class SampleBuffer:
+    """
+    Ring buffer de `capacity` muestras con append O(1), append por lotes y
+    ventanas como vistas sin copia. Seguro entre el hilo de lectura y el de
+    la UI: las escrituras y la obtención de ventanas van bajo un lock.
+
+    Una vista de n muestras sigue siendo válida mientras se añadan menos de
+    capacity - n muestras nuevas; para guardarla más tiempo usar snapshot().
+    Por eso las vistas tienen como mucho capacity - 1 muestras: con el buffer
+    lleno, la siguiente escritura pisaría la primera fila de la vista.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._data = np.full((2 * capacity, N_COLUMNS), np.nan)
+        self._head = 0   # Siguiente posición a escribir, en [0, capacity)
+        self._count = 0  # Muestras válidas, como mucho capacity
+        self.total = 0   # Muestras añadidas desde el último clear()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def append(self, t, accel, gyro=(np.nan, np.nan, np.nan), angles=(np.nan, np.nan, np.nan)):
+        """Añade una muestra."""
+        with self._lock:
+            i = self._head
+            for row in (self._data[i], self._data[i + self.capacity]):
+                row[T] = t
+                row[ACCEL] = accel
+                row[GYRO] = gyro
+                row[ANGLES] = angles
+            self._head = (i + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+            self.total += 1
+
+    def extend(self, t, accel, gyro=None, angles=None):
+        """
+        Añade un lote: t de forma (N,), accel/gyro/angles de forma (N, 3).
+        Si el lote no cabe, se conservan solo sus últimas `capacity` muestras.
+        """
+        if len(t):
+            self.extend_rows(make_rows(t, accel, gyro, angles))
+
+    def extend_rows(self, block):
+        """Añade un lote ya en formato de columnas (N, N_COLUMNS)."""
+        if len(block) == 0:
+            return
+        cap = self.capacity
+        with self._lock:
+            added = len(block)
+            if added > cap:
+                block = block[-cap:]
+            n = len(block)
+            start = self._head
+            first = min(n, cap - start)
+            # Primer tramo hasta el final, el resto desde el principio; siempre en ambas copias
+            for offset in (0, cap):
+                self._data[offset + start:offset + start + first] = block[:first]
+                self._data[offset:offset + n - first] = block[first:]
+            self._head = (start + n) % cap
+            self._count = min(self._count + n, cap)
+            self.total += added
+
+    def window(self, n=None):
+        """
+        Vista (sin copia) de las últimas n muestras (como mucho capacity - 1),
+        de la más antigua a la más nueva.
+        """
+        with self._lock:
+            count = min(self._count, self.capacity - 1)
+            if n is not None:
+                count = min(n, count)
+            end = self._head + self.capacity
+            return self._data[end - count:end]
+
+    def window_since(self, seconds):
+        """Vista de las muestras de los últimos `seconds` segundos respecto a la más nueva."""
+        view = self.window()
+        if len(view) == 0:
+            return view
+        t = view[:, T]
+        return view[np.searchsorted(t, t[-1] - seconds):]
+
+    def snapshot(self, n=None):
+        """Copia de las últimas n muestras, independiente de escrituras posteriores."""
+        with self._lock:
+            count = self._count if n is None else min(n, self._count)
+            end = self._head + self.capacity
+            return self._data[end - count:end].copy()
+
+    def last_time(self):
+        """Tiempo de la muestra más reciente, o None si está vacío."""
+        with self._lock:
+            if self._count == 0:
+                return None
+            return float(self._data[self._head + self.capacity - 1, T])
+
+    def clear(self):
+        with self._lock:
+            self._head = 0
+            self._count = 0
+            self.total = 0
@@ -0,0 +1,119 @@
+# Banco de registros del MPU6050 emulado en memoria.
+# Implementa la misma interfaz que machine.SoftI2C (readfrom_mem,
+# readfrom_mem_into, writeto_mem) para poder ejecutar MPU6050.py y medir
+# su rendimiento en CPython sin hardware.
+
+import struct
+
+_MPU6050_ADDRESS = 0x68
+_ACCEL_XOUT0 = 0x3B
+_GYRO_XOUT0 = 0x43
+_FIFO_EN = 0x23
+_INT_STATUS = 0x3A
+_USER_CTRL = 0x6A
+_FIFO_COUNTH = 0x72
+_FIFO_R_W = 0x74
+
+_FIFO_SIZE = 1024
+_FIFO_EN_ACCEL = 0x08
+_FIFO_EN_GYRO = 0x70
+_USER_CTRL_FIFO_EN = 0x40
+_USER_CTRL_FIFO_RESET = 0x04
+_INT_FIFO_OFLOW = 0x10
+_GYRO_CONFIG = 0x1B
+_ACCEL_CONFIG = 0x1C
+_TEMP_OUT0 = 0x41
+
+_GRAVITY_MS2 = 9.80665
+# Cuentas por unidad según el rango, indexadas por (registro >> 3) & 3
+_ACC_SCALERS = (16384.0, 8192.0, 4096.0, 2048.0)
+_GYR_SCALERS = (131.0, 65.5, 32.8, 16.4)
+
+
+class FakeMPU6050I2C:
+    """Bus I2C falso con un MPU6050 conectado en `addr`."""
+
+    def __init__(self, addr=_MPU6050_ADDRESS):
+        self.addr = addr
+        self.regs = bytearray(128)
+        self.reads = 0
+        self.writes = 0
+        self.fifo = bytearray()
+        # Si se asigna, source() devuelve (accel m/s², gyro deg/s) y se consulta
+        # en cada lectura de los registros de datos (ver sim/signals.py)
+        self.source = None
+        # Reposo: 1 g en Z con rango de ±2g
+        self.set_sample(accel=(0, 0, 16384))
+
+    def set_sample(self, accel=(0, 0, 0), temp=0, gyro=(0, 0, 0)):
+        """Carga cuentas int16 crudas en los registros ACCEL/TEMP/GYRO."""
+        struct.pack_into(">7h", self.regs, _ACCEL_XOUT0,
+                         accel[0], accel[1], accel[2], temp,
+                         gyro[0], gyro[1], gyro[2])
+
+    def set_physical(self, accel_ms2, gyro_dps=(0.0, 0.0, 0.0), temp_c=25.0):
+        """Carga valores en unidades físicas con los rangos configurados en el chip."""
+        acc_scale = _ACC_SCALERS[(self.regs[_ACCEL_CONFIG] >> 3) & 3] / _GRAVITY_MS2
+        gyr_scale = _GYR_SCALERS[(self.regs[_GYRO_CONFIG] >> 3) & 3]
+        self.set_sample(accel=[_clamp16(v * acc_scale) for v in accel_ms2],
+                        temp=_clamp16((temp_c - 36.53) * 340),
+                        gyro=[_clamp16(v * gyr_scale) for v in gyro_dps])
+
+    def push_frames(self, n=1):
+        """Simula n periodos de muestreo: encola en la FIFO la muestra actual."""
+        if not self.regs[_USER_CTRL] & _USER_CTRL_FIFO_EN:
+            return
+        mask = self.regs[_FIFO_EN]
+        frame = b""
+        if mask & _FIFO_EN_ACCEL:
+            frame += self.regs[_ACCEL_XOUT0:_ACCEL_XOUT0 + 6]
+        if mask & _FIFO_EN_GYRO:
+            frame += self.regs[_GYRO_XOUT0:_GYRO_XOUT0 + 6]
+        if not frame:
+            return
+        self.fifo += frame * n
+        if len(self.fifo) > _FIFO_SIZE:
+            # Como el chip: se descartan los bytes más antiguos y se marca el desborde
+            del self.fifo[:len(self.fifo) - _FIFO_SIZE]
+            self.regs[_INT_STATUS] |= _INT_FIFO_OFLOW
+
+    def _read(self, memaddr, n):
+        if memaddr == _FIFO_R_W:
+            data = bytes(self.fifo[:n])
+            del self.fifo[:n]
+            return data + bytes(n - len(data))
+        if memaddr == _FIFO_COUNTH:
+            count = len(self.fifo)
+            return bytes([count >> 8, count & 0xFF])[:n]
+        if self.source is not None and memaddr < _GYRO_XOUT0 + 6 and memaddr + n > _ACCEL_XOUT0:
+            self.set_physical(*self.source())
+        data = bytes(self.regs[memaddr:memaddr + n])
+        if memaddr <= _INT_STATUS < memaddr + n:
+            self.regs[_INT_STATUS] = 0  # INT_STATUS se limpia al leerse
+        return data
+
+    def _check(self, addr):
+        if addr != self.addr:
+            raise OSError(19)  # ENODEV, como SoftI2C sin ACK
+
+    def readfrom_mem(self, addr, memaddr, nbytes):
+        self._check(addr)
+        self.reads += 1
+        return self._read(memaddr, nbytes)
+
+    def readfrom_mem_into(self, addr, memaddr, buf):
+        self._check(addr)
+        self.reads += 1
+        buf[:] = self._read(memaddr, len(buf))
+
+    def writeto_mem(self, addr, memaddr, buf):
+        self._check(addr)
+        self.writes += 1
+        self.regs[memaddr:memaddr + len(buf)] = buf
+        if memaddr == _USER_CTRL and buf[0] & _USER_CTRL_FIFO_RESET:
+            self.fifo = bytearray()
+            self.regs[_USER_CTRL] &= ~_USER_CTRL_FIFO_RESET & 0xFF
+
+
+def _clamp16(v):
+    return max(-32768, min(32767, int(round(v))))
@@ -0,0 +1,88 @@
+# Sustituto del módulo machine de MicroPython para ejecutar MPU6050.py y
+# main.py sin modificar en CPython (ver sim/run_device.py).
+#
+# SoftI2C/I2C devuelven siempre el mismo bus falso (sim_bus) con un MPU6050
+# emulado; Timer llama a su callback desde un hilo con el periodo pedido,
+# como la interrupción del temporizador del ESP32.
+
+import threading
+import time
+
+from fake_mpu6050 import FakeMPU6050I2C
+
+sim_bus = FakeMPU6050I2C()
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    PULL_UP = 2
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self._value = value or 0
+
+    def value(self, v=None):
+        if v is None:
+            return self._value
+        self._value = v
+
+
+def SoftI2C(scl=None, sda=None, freq=400000, timeout=50000):
+    return sim_bus
+
+
+I2C = SoftI2C
+
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1):
+        self.id = id
+        self._stop = None
+        self.ticks = 0   # Veces que se ha llamado al callback
+        self.late = 0    # Periodos recuperados con retraso (el hilo no llegó a tiempo)
+
+    def init(self, mode=PERIODIC, period=-1, freq=-1, callback=None):
+        self.deinit()
+        if freq > 0:
+            period = 1000 / freq
+        self._stop = threading.Event()
+        thread = threading.Thread(target=self._run, args=(mode, period / 1000, callback, self._stop), daemon=True)
+        thread.start()
+
+    def _run(self, mode, period_s, callback, stop):
+        deadline = time.perf_counter() + period_s
+        while not stop.is_set():
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -period_s:
+                self.late += 1
+            if stop.is_set():
+                return
+            self.ticks += 1
+            callback(self)
+            if mode == Timer.ONE_SHOT:
+                return
+            # Plazos absolutos: el periodo medio se mantiene aunque un tick llegue tarde
+            deadline += period_s
+
+    def deinit(self):
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+
+
+def freq(hz=None):
+    return 240000000
+
+
+def reset():
+    raise SystemExit("machine.reset()")
+
+
+def unique_id():
+    return b"\x00SIM\x00\x01"
@@ -0,0 +1,40 @@
+# Funciones de tiempo de MicroPython que CPython no tiene (sleep_ms,
+# ticks_ms, ticks_us, ticks_diff, ticks_add). install() las añade al módulo
+# time para que "from time import sleep_ms, ticks_us, ..." funcione igual
+# que en el ESP32, incluida la vuelta de los ticks a 2**30.
+
+import time
+
+TICKS_PERIOD = 1 << 30
+_TICKS_MASK = TICKS_PERIOD - 1
+_TICKS_HALF = TICKS_PERIOD // 2
+
+
+def sleep_ms(ms):
+    time.sleep(ms / 1000)
+
+
+def sleep_us(us):
+    time.sleep(us / 1000000)
+
+
+def ticks_ms():
+    return (time.monotonic_ns() // 1000000) & _TICKS_MASK
+
+
+def ticks_us():
+    return (time.monotonic_ns() // 1000) & _TICKS_MASK
+
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & _TICKS_MASK
+
+
+def ticks_diff(end, start):
+    return ((end - start + _TICKS_HALF) & _TICKS_MASK) - _TICKS_HALF
+
+
+def install():
+    for fn in (sleep_ms, sleep_us, ticks_ms, ticks_us, ticks_add, ticks_diff):
+        if not hasattr(time, fn.__name__):
+            setattr(time, fn.__name__, fn)
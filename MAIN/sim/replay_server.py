@@ -0,0 +1,196 @@
+# Servidor TCP (o emisor UDP) que imita al ESP32 a frecuencias que el hardware no alcanza.
+#
+# Reproduce "datos tomados.csv" (o señales sintéticas) en el formato de texto
+# de main.py o en el binario de protocol.py, a la frecuencia pedida (hasta
+# varios kHz), enviando lotes cada BATCH_INTERVAL_S como hace main.py. Cada
+# cliente recibe su propio flujo desde seq 0.
+#
+# Con --transport udp envía datagramas (protocol.py) a --udp-target en lugar
+# de servir TCP, y puede perder o desordenar una fracción de ellos para probar
+# la detección de huecos y el reordenado del colector.
+#
+# En binario, t_us es el instante nominal de cada muestra en el reloj
+# monotónico del PC (en µs, con la vuelta a 2**30 de ticks_us), así que un
+# cliente en la misma máquina puede medir la latencia de extremo a extremo
+# (ver benchmarks/bench_end_to_end.py).
+#
+# Uso (desde MAIN/):
+#   python sim/replay_server.py --port 8080 --rate 1000 --format binary --source csv
+#   python sim/replay_server.py --transport udp --udp-target 127.0.0.1:8081 --rate 1000 --loss 0.01
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import sys
+import time
+
+SIM_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SIM_DIR))
+sys.path.insert(0, SIM_DIR)
+
+import protocol
+from signals import GRAVITY_MS2, make_source
+
+BATCH_INTERVAL_S = 0.01
+UDP_FRAMES_PER_DATAGRAM = 16
+ACCEL_RANGE = 0x00  # ±2 g
+GYRO_RANGE = 0x00   # ±250 °/s
+_ACC_COUNTS = 16384.0 / GRAVITY_MS2
+_GYR_COUNTS = 131.0
+
+
+def _counts(v, scale):
+    return max(-32768, min(32767, int(round(v * scale))))
+
+
+def pack_raw(raw, accel, gyro):
+    """Rellena los 14 bytes de read_raw_into (acel, temp, giro) con cuentas crudas."""
+    for j in range(3):
+        a = _counts(accel[j], _ACC_COUNTS)
+        g = _counts(gyro[j], _GYR_COUNTS)
+        raw[2 * j] = (a >> 8) & 0xFF
+        raw[2 * j + 1] = a & 0xFF
+        raw[8 + 2 * j] = (g >> 8) & 0xFF
+        raw[9 + 2 * j] = g & 0xFF
+
+
+def text_line(accel, angles):
+    return (f"Aceleración (m/s²) -> X: {accel[0]:.3f} Y: {accel[1]:.3f} Z: {accel[2]:.3f} | "
+            f"Ángulos (grados) -> X: {angles[0]:.1f} Y: {angles[1]:.1f} Z: {angles[2]:.1f}\n")
+
+
+def ticks_us_at(t):
+    """Valor de ticks_us (micropython_time) en el instante monotónico t."""
+    return int(t * 1000000) & (protocol.TICKS_PERIOD - 1)
+
+
+class ReplayServer:
+    """
+    Sirve la fuente `source` a `rate_hz` en `wire_format` ('text' o 'binary').
+    `sent` y `clients` son contadores para quien lo ejecute en el mismo proceso.
+    """
+
+    def __init__(self, source, rate_hz, wire_format="binary"):
+        self.source = source
+        self.rate_hz = rate_hz
+        self.wire_format = wire_format
+        self.sent = 0
+        self.clients = 0
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=0):
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+
+    def frames(self, seq, n, start):
+        """n tramas binarias desde seq; `start` es el instante monotónico de la muestra 0."""
+        raw = bytearray(14)
+        chunk = bytearray(n * protocol.FRAME_SIZE)
+        for i in range(n):
+            accel, gyro, _ = self.source.row(seq + i, self.rate_hz)
+            pack_raw(raw, accel, gyro)
+            t_us = ticks_us_at(start + (seq + i) / self.rate_hz)
+            protocol.pack_frame_into(chunk, i * protocol.FRAME_SIZE, seq + i, t_us, raw, ACCEL_RANGE, GYRO_RANGE)
+        return chunk
+
+    def lines(self, seq, n):
+        return "".join(text_line(accel, angles) for accel, _, angles in
+                       (self.source.row(seq + i, self.rate_hz) for i in range(n))).encode("utf-8")
+
+    async def due_batches(self):
+        """Genera (seq, n, start) cada BATCH_INTERVAL_S con las muestras cuyo instante ya pasó."""
+        seq = 0
+        start = time.monotonic()
+        while True:
+            # Todas las muestras cuyo instante nominal ya pasó, como el temporizador del ESP32
+            n = int((time.monotonic() - start) * self.rate_hz) + 1 - seq
+            if n > 0:
+                yield seq, n, start
+                seq += n
+                self.sent += n
+            await asyncio.sleep(BATCH_INTERVAL_S)
+
+    async def handle(self, reader, writer):
+        self.clients += 1
+        binary = self.wire_format == "binary"
+        try:
+            if binary:
+                writer.write(protocol.pack_header(ACCEL_RANGE, GYRO_RANGE, round(1e6 / self.rate_hz)))
+            async for seq, n, start in self.due_batches():
+                writer.write(self.frames(seq, n, start) if binary else self.lines(seq, n))
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def send_udp(self, host, port, loss=0.0, reorder=0.0):
+        """
+        Envía datagramas a host:port. Cada datagrama se pierde con probabilidad
+        `loss` o se retrasa hasta después del siguiente con probabilidad `reorder`.
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        header = bytearray(protocol.HEADER_SIZE)
+        protocol.pack_datagram_header_into(header, ACCEL_RANGE, GYRO_RANGE, round(1e6 / self.rate_hz))
+        held = None
+        self.datagrams = self.dropped = self.reordered = 0
+        async for seq, n, start in self.due_batches():
+            chunk = self.frames(seq, n, start)
+            step = UDP_FRAMES_PER_DATAGRAM * protocol.FRAME_SIZE
+            for offset in range(0, len(chunk), step):
+                datagram = bytes(header) + chunk[offset:offset + step]
+                if random.random() < loss:
+                    self.dropped += 1
+                    continue
+                if held is None and random.random() < reorder:
+                    held = datagram
+                    self.reordered += 1
+                    continue
+                sock.sendto(datagram, (host, port))
+                self.datagrams += 1
+                if held is not None:
+                    sock.sendto(held, (host, port))
+                    self.datagrams += 1
+                    held = None
+
+
+async def serve(args):
+    replay = ReplayServer(make_source(args.source), args.rate, args.format)
+    if args.transport == "udp":
+        host, _, port = args.udp_target.rpartition(":")
+        print(f"Reproduciendo '{args.source}' a {args.rate:g} Hz por UDP hacia {host}:{port}", flush=True)
+        await replay.send_udp(host, int(port), args.loss, args.reorder)
+        return
+    port = await replay.start(args.host, args.port)
+    print(f"Reproduciendo '{args.source}' a {args.rate:g} Hz ({args.format}) en {args.host}:{port}", flush=True)
+    async with replay.server:
+        await replay.server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor de reproducción que imita al ESP32.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080, help="0 para un puerto libre (se imprime al arrancar)")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Muestras por segundo")
+    parser.add_argument("--format", choices=("text", "binary"), default="binary")
+    parser.add_argument("--source", default="csv", help="'synthetic', 'bursts', 'csv' o la ruta de un CSV")
+    parser.add_argument("--transport", choices=("tcp", "udp"), default="tcp")
+    parser.add_argument("--udp-target", default="127.0.0.1:8081", help="host:puerto (IP, broadcast o multicast)")
+    parser.add_argument("--loss", type=float, default=0.0, help="Fracción de datagramas UDP que se pierden")
+    parser.add_argument("--reorder", type=float, default=0.0, help="Fracción de datagramas UDP que llegan desordenados")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
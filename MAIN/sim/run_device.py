@@ -0,0 +1,87 @@
+# Ejecuta main.py sin modificar en el PC, como si fuera el ESP32.
+#
+# machine, network y las funciones de tiempo de MicroPython se sustituyen por
+# las de esta carpeta; el MPU6050 es el de fake_mpu6050.py alimentado por una
+# fuente de signals.py. El servidor escucha en localhost, así que INTERFAZ.PY,
+# collector.py o los benchmarks se conectan a 127.0.0.1:<puerto>.
+#
+# Uso (desde MAIN/):
+#   python sim/run_device.py --port 8080 --rate 100 --format binary --source synthetic
+#   python sim/run_device.py --transport udp --udp-target 127.0.0.1 --udp-port 8081
+#   python sim/run_device.py --rate 100 --format binary --source bursts --event-mode
+#   python sim/run_device.py --rate 1000 --sndbuf 5744   # Buffer de envío como el del ESP32
+
+import argparse
+import os
+import socket
+import sys
+import tempfile
+import time
+
+SIM_DIR = os.path.dirname(os.path.abspath(__file__))
+MAIN_DIR = os.path.dirname(SIM_DIR)
+# sim/ va primero: sus machine y network sustituyen a los de MicroPython
+sys.path.insert(0, MAIN_DIR)
+sys.path.insert(0, SIM_DIR)
+
+import micropython_time
+
+micropython_time.install()
+
+import machine
+from signals import make_source
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ESP32 simulado: ejecuta main.py en el PC.")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--rate", type=float, default=2.0, help="Muestras por segundo (hasta 1000)")
+    parser.add_argument("--format", choices=("text", "binary"), default="text")
+    parser.add_argument("--source", default="synthetic", help="'synthetic', 'bursts', 'csv' o la ruta de un CSV")
+    parser.add_argument("--transport", choices=("tcp", "udp"), default="tcp")
+    parser.add_argument("--udp-target", default="127.0.0.1", help="IP, broadcast o grupo multicast para UDP")
+    parser.add_argument("--udp-port", type=int, default=8081)
+    parser.add_argument("--udp-broadcast", action="store_true", help="--udp-target es una dirección de broadcast")
+    parser.add_argument("--event-mode", action="store_true",
+                        help="Solo envía eventos con movimiento y latidos (EVENT_MODE de main.py)")
+    parser.add_argument("--sndbuf", type=int, default=None,
+                        help="Bytes del buffer de envío de cada cliente (lwIP en el ESP32: ~5744); "
+                             "por defecto el del sistema")
+    parser.add_argument("--workdir", default=None,
+                        help="Carpeta que hace de flash (backlog.bin); por defecto una temporal")
+    args = parser.parse_args(argv)
+
+    # main.py crea backlog.bin en la carpeta actual, como en la flash del ESP32
+    os.chdir(args.workdir or tempfile.mkdtemp(prefix="esp32_sim_"))
+    source = make_source(args.source)
+    t0 = time.monotonic()
+    machine.sim_bus.source = lambda: source.sample(time.monotonic() - t0)
+
+    import asyncio
+    import main as device
+
+    device.PORT = args.port
+    device.SAMPLE_PERIOD_MS = max(1, round(1000 / args.rate))
+    device.WIRE_FORMAT = args.format
+    device.TRANSPORT = args.transport
+    device.UDP_TARGET = args.udp_target
+    device.UDP_PORT = args.udp_port
+    device.UDP_BROADCAST = args.udp_broadcast
+    device.EVENT_MODE = args.event_mode
+    if args.sndbuf:
+        accept_client = device.accept_client
+
+        async def accept_with_sndbuf(reader, writer):
+            writer.get_extra_info('socket').setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, args.sndbuf)
+            await accept_client(reader, writer)
+
+        device.accept_client = accept_with_sndbuf
+    device.setup()
+    try:
+        asyncio.run(device.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# Fuentes de señal para el simulador: movimiento sintético, reposo con
+# sacudidas ocasionales (para el modo evento) o una captura real
+# (data_Examples/datos tomados.csv) repetida en bucle.
+#
+# Cada fuente tiene dos formas de consulta:
+#   sample(t) -> (accel m/s², gyro deg/s) en el instante t (segundos desde el
+#     inicio); la usa el MPU6050 simulado de sim/machine.py.
+#   row(i, rate_hz) -> (accel, gyro, ángulos en grados) de la muestra i de un
+#     flujo a rate_hz; la usa el servidor de reproducción (replay_server.py).
+
+import csv
+import math
+import os
+import random
+
+CSV_PATH = os.path.join(os.path.dirname(__file__), "..", "data_Examples", "datos tomados.csv")
+GRAVITY_MS2 = 9.80665
+
+
+class SyntheticMotion:
+    """
+    Sensor que se inclina lentamente en X e Y (senos de distinta frecuencia)
+    con ruido blanco; el giroscopio es la derivada exacta de la inclinación.
+    """
+
+    def __init__(self, roll_deg=30.0, pitch_deg=20.0, roll_hz=0.2, pitch_hz=0.13,
+                 accel_noise=0.05, gyro_noise=0.3, seed=0):
+        self.roll_deg = roll_deg
+        self.pitch_deg = pitch_deg
+        self.roll_hz = roll_hz
+        self.pitch_hz = pitch_hz
+        self.accel_noise = accel_noise
+        self.gyro_noise = gyro_noise
+        self.random = random.Random(seed)
+
+    def sample(self, t):
+        w_r = 2 * math.pi * self.roll_hz
+        w_p = 2 * math.pi * self.pitch_hz
+        roll = math.radians(self.roll_deg) * math.sin(w_r * t)
+        pitch = math.radians(self.pitch_deg) * math.sin(w_p * t)
+        gauss = self.random.gauss
+        accel = (-GRAVITY_MS2 * math.sin(pitch) + gauss(0, self.accel_noise),
+                 GRAVITY_MS2 * math.sin(roll) * math.cos(pitch) + gauss(0, self.accel_noise),
+                 GRAVITY_MS2 * math.cos(roll) * math.cos(pitch) + gauss(0, self.accel_noise))
+        gyro = (self.roll_deg * w_r * math.cos(w_r * t) + gauss(0, self.gyro_noise),
+                self.pitch_deg * w_p * math.cos(w_p * t) + gauss(0, self.gyro_noise),
+                gauss(0, self.gyro_noise))
+        return accel, gyro
+
+    def row(self, i, rate_hz):
+        t = i / rate_hz
+        accel, gyro = self.sample(t)
+        angles = (self.roll_deg * math.sin(2 * math.pi * self.roll_hz * t),
+                  self.pitch_deg * math.sin(2 * math.pi * self.pitch_hz * t),
+                  0.0)
+        return accel, gyro, angles
+
+
+class BurstMotion:
+    """
+    Sensor en reposo (plano, con ruido) que cada `interval_s` se sacude
+    durante `burst_s`: vibración de `shake_hz` con `shake_g` de amplitud en
+    X y giro de `shake_dps` en Z. Sirve para probar el modo evento de main.py.
+    """
+
+    def __init__(self, interval_s=20.0, burst_s=2.0, offset_s=5.0, shake_hz=4.0, shake_g=0.5,
+                 shake_dps=120.0, accel_noise=0.05, gyro_noise=0.3, seed=0):
+        self.interval_s = interval_s
+        self.burst_s = burst_s
+        self.offset_s = offset_s
+        self.shake_hz = shake_hz
+        self.shake_g = shake_g
+        self.shake_dps = shake_dps
+        self.accel_noise = accel_noise
+        self.gyro_noise = gyro_noise
+        self.random = random.Random(seed)
+
+    def shaking(self, t):
+        return t >= self.offset_s and (t - self.offset_s) % self.interval_s < self.burst_s
+
+    def sample(self, t):
+        gauss = self.random.gauss
+        shake = 0.0
+        if self.shaking(t):
+            shake = math.sin(2 * math.pi * self.shake_hz * t)
+        accel = (self.shake_g * GRAVITY_MS2 * shake + gauss(0, self.accel_noise),
+                 gauss(0, self.accel_noise),
+                 GRAVITY_MS2 + gauss(0, self.accel_noise))
+        gyro = (gauss(0, self.gyro_noise), gauss(0, self.gyro_noise),
+                self.shake_dps * shake + gauss(0, self.gyro_noise))
+        return accel, gyro
+
+    def row(self, i, rate_hz):
+        accel, gyro = self.sample(i / rate_hz)
+        return accel, gyro, (0.0, 0.0, 0.0)
+
+
+class CsvReplay:
+    """
+    Repite en bucle una captura guardada por INTERFAZ.PY (tiempo, acc, ángulos).
+    sample(t) devuelve la fila vigente en el instante t; row(i, rate_hz)
+    devuelve las filas una tras otra a la frecuencia pedida, sea cual sea la
+    de la captura. El giroscopio se estima como la derivada de los ángulos
+    entre filas consecutivas.
+    """
+
+    def __init__(self, path=CSV_PATH):
+        self.times = []
+        self.accel = []
+        self.angles = []
+        with open(path, newline="", encoding="utf-8") as file:
+            reader = csv.reader(file)
+            next(reader)
+            for row in reader:
+                try:
+                    values = [float(v) for v in row[:7]]
+                except ValueError:
+                    continue
+                self.times.append(values[0])
+                self.accel.append(tuple(values[1:4]))
+                self.angles.append(tuple(values[4:7]))
+        if len(self.times) < 2:
+            raise ValueError(f"{path}: se necesitan al menos dos filas")
+        step = (self.times[-1] - self.times[0]) / (len(self.times) - 1)
+        self.duration = self.times[-1] - self.times[0] + step
+        self.gyro = []
+        for i in range(len(self.times)):
+            j = (i + 1) % len(self.times)
+            self.gyro.append(tuple((b - a) / step for a, b in zip(self.angles[i], self.angles[j])))
+        self._index = 0
+
+    def sample(self, t):
+        t = self.times[0] + t % self.duration
+        i = self._index
+        # Las consultas casi siempre avanzan: se busca a partir de la anterior
+        if self.times[i] > t:
+            i = 0
+        while i + 1 < len(self.times) and self.times[i + 1] <= t:
+            i += 1
+        self._index = i
+        return self.accel[i], self.gyro[i]
+
+    def row(self, i, rate_hz=None):
+        i %= len(self.times)
+        return self.accel[i], self.gyro[i], self.angles[i]
+
+
+def make_source(name, **params):
+    """'synthetic', 'bursts' o 'csv' (o la ruta de un CSV con el formato de INTERFAZ.PY)."""
+    if name == "synthetic":
+        return SyntheticMotion(**params)
+    if name == "bursts":
+        return BurstMotion(**params)
+    if name == "csv":
+        return CsvReplay(**params)
+    return CsvReplay(name)
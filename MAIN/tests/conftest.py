@@ -0,0 +1,10 @@
+# Las pruebas importan los módulos de MAIN/ igual que INTERFAZ.PY y collector.py.
+# Uso (desde MAIN/):
+#   python -m pytest -q tests
+
+import os
+import sys
+
+MAIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if MAIN_DIR not in sys.path:
+    sys.path.insert(0, MAIN_DIR)
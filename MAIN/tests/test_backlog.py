@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+from backlog import Backlog
+
+FRAME_SIZE = 4
+
+
+def frames(first, n):
+    return b"".join((first + i).to_bytes(FRAME_SIZE, "big") for i in range(n))
+
+
+def read_all(backlog, chunk_frames=3):
+    buf = bytearray(chunk_frames * FRAME_SIZE)
+    out = []
+    while len(backlog):
+        n = backlog.read_into(buf)
+        out += [int.from_bytes(buf[i * FRAME_SIZE:(i + 1) * FRAME_SIZE], "big") for i in range(n)]
+    return out
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "backlog.bin")
+
+
+def test_fits_in_ram(path):
+    backlog = Backlog(8, FRAME_SIZE, path, 1024)
+    backlog.add(frames(0, 5), 5)
+    assert not os.path.exists(path)
+    assert read_all(backlog) == list(range(5))
+
+
+def test_spills_to_file_and_keeps_order(path):
+    backlog = Backlog(4, FRAME_SIZE, path, 1024)
+    backlog.add(frames(0, 11), 11)
+    assert os.path.getsize(path) == 8 * FRAME_SIZE
+    assert len(backlog) == 11
+    assert backlog.stats()["spills"] == 2
+    assert read_all(backlog) == list(range(11))
+    # Leído todo, el archivo se borra
+    assert not os.path.exists(path)
+    assert backlog.stored == backlog.delivered == 11
+
+
+def test_adds_while_reading(path):
+    backlog = Backlog(4, FRAME_SIZE, path, 1024)
+    backlog.add(frames(0, 9), 9)
+    buf = bytearray(2 * FRAME_SIZE)
+    backlog.read_into(buf)
+    backlog.add(frames(9, 6), 6)
+    assert read_all(backlog) == list(range(2, 15))
+
+
+def test_full_flash_drops_oldest_ram(path):
+    backlog = Backlog(4, FRAME_SIZE, path, 4 * FRAME_SIZE)
+    backlog.add(frames(0, 13), 13)
+    # 0-3 en la flash, 4-7 y 8-11 descartados de la RAM al no caber, 12 en la RAM
+    assert backlog.dropped == 8
+    assert read_all(backlog) == [0, 1, 2, 3, 12]
+
+
+def test_removes_stale_file(path):
+    with open(path, "wb") as file:
+        file.write(frames(100, 3))
+    backlog = Backlog(4, FRAME_SIZE, path, 1024)
+    assert len(backlog) == 0
+    assert not os.path.exists(path)
+
+
+def test_peek_keeps_frames_until_consumed(path):
+    backlog = Backlog(4, FRAME_SIZE, path, 1024)
+    backlog.add(frames(0, 6), 6)
+    buf = bytearray(3 * FRAME_SIZE)
+    n = backlog.peek_into(buf)
+    assert n == 3
+    # El envío falla: lo mismo vuelve a salir en el siguiente intento
+    assert backlog.peek_into(buf) == 3
+    assert len(backlog) == 6
+    backlog.consume(n)
+    assert read_all(backlog) == list(range(3, 6))
+
+
+def test_spill_between_peek_and_consume(path):
+    backlog = Backlog(4, FRAME_SIZE, path, 1024)
+    backlog.add(frames(0, 3), 3)
+    buf = bytearray(2 * FRAME_SIZE)
+    n = backlog.peek_into(buf)
+    assert buf == frames(0, 2)
+    # Llegan muestras nuevas y la RAM (con lo leído) se vuelca a la flash
+    backlog.add(frames(3, 4), 4)
+    backlog.consume(n)
+    assert read_all(backlog) == list(range(2, 7))
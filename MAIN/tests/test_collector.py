@@ -0,0 +1,201 @@
+import asyncio
+import struct
+
+import numpy as np
+import pytest
+
+import protocol
+from collector import Collector, Device, Sink, StreamDecoder
+from sample_buffer import T
+
+PERIOD = protocol.TICKS_PERIOD
+RATE_HZ = 100
+STEP_US = 1000000 // RATE_HZ
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def frames(seqs, ticks):
+    out = np.zeros(len(seqs), dtype=protocol.frame_dtype())
+    out["seq"] = seqs
+    out["t_us"] = np.asarray(ticks, dtype=np.int64) % PERIOD
+    out["accel"][:, 2] = 16384
+    return out
+
+
+def make_decoder(clock, flags=0, period_us=STEP_US):
+    decoder = StreamDecoder(clock)
+    connect(decoder, flags, period_us)
+    return decoder
+
+
+def connect(decoder, flags=0, period_us=STEP_US):
+    # Lo que hace detect() con la cabecera de una conexión nueva
+    decoder.reset()
+    decoder.mode = 'binary'
+    decoder.binary = protocol.BinaryStreamDecoder()
+    decoder.binary.header = protocol.unpack_header(protocol.pack_header(0, 0, period_us, flags))
+
+
+def run(first_seq, n, first_tick, step_us=STEP_US):
+    seqs = np.arange(first_seq, first_seq + n)
+    return frames(seqs, first_tick + (seqs - first_seq) * step_us)
+
+
+def test_first_batch_ends_now():
+    clock = Clock()
+    decoder = make_decoder(clock)
+    rows = decoder.decode_frames(run(0, 10, 5000))
+    assert rows[-1, T] == pytest.approx(clock.now)
+    assert np.diff(rows[:, T]) == pytest.approx(np.full(9, 0.01))
+
+
+def test_reconnect_continues_by_seq():
+    clock = Clock()
+    decoder = make_decoder(clock)
+    first = decoder.decode_frames(run(0, 10, 0))
+    # Lo guardado sin cliente llega mucho después, pero se coloca por t_us
+    clock.now += 60.0
+    connect(decoder)
+    second = decoder.decode_frames(run(10, 10, 10 * STEP_US))
+    assert second[0, T] - first[-1, T] == pytest.approx(0.01)
+    assert decoder.lost == 0
+
+
+def test_counts_lost_frames_and_keeps_their_time():
+    decoder = make_decoder(Clock())
+    first = decoder.decode_frames(run(0, 10, 0))
+    second = decoder.decode_frames(run(13, 5, 13 * STEP_US))
+    assert decoder.lost == 3
+    assert second[0, T] - first[-1, T] == pytest.approx(0.04)
+
+
+def test_ticks_wrap_inside_batch():
+    decoder = make_decoder(Clock())
+    rows = decoder.decode_frames(run(0, 10, PERIOD - 3 * STEP_US))
+    assert np.diff(rows[:, T]) == pytest.approx(np.full(9, 0.01))
+
+
+def test_long_gap_resolved_by_seq():
+    clock = Clock()
+    decoder = make_decoder(clock)
+    first = decoder.decode_frames(run(0, 10, 0))
+    # 45 min sin conexión: ticks_us dio más de dos vueltas
+    gap_s = 45 * 60
+    clock.now += gap_s + 5
+    connect(decoder)
+    seq = 10 + gap_s * RATE_HZ
+    second = decoder.decode_frames(run(seq, 5, seq * STEP_US))
+    assert second[0, T] - first[0, T] == pytest.approx(seq / RATE_HZ)
+
+
+@pytest.mark.parametrize("period_ms", [1500, 3])
+def test_long_gap_with_slow_or_uneven_period(period_ms):
+    # Con la frecuencia en Hz enteros, 1500 ms daba 0 Hz (sin corrección) y 3 ms, 333 Hz
+    step_us = period_ms * 1000
+    clock = Clock()
+    decoder = make_decoder(clock, period_us=step_us)
+    first = decoder.decode_frames(run(0, 3, 0, step_us))
+    seq = 3 + (3 * 3600 * 1000) // period_ms  # 3 h sin conexión
+    clock.now += seq * step_us / 1e6
+    connect(decoder, period_us=step_us)
+    second = decoder.decode_frames(run(seq, 3, seq * step_us, step_us))
+    assert second[0, T] - first[0, T] == pytest.approx(seq * step_us / 1e6)
+
+
+def test_event_mode_gap_resolved_by_host_clock():
+    clock = Clock()
+    decoder = make_decoder(clock, protocol.FLAG_EVENTS)
+    first = decoder.decode_frames(run(0, 10, 0))
+    # En modo evento seq no cuenta el reposo: el siguiente evento llega con seq 10
+    gap_s = 45 * 60
+    clock.now += gap_s + 0.5
+    tick = 9 * STEP_US + gap_s * 1000000
+    second = decoder.decode_frames(run(10, 5, tick))
+    assert second[0, T] - first[-1, T] == pytest.approx(gap_s)
+    assert decoder.lost == 0
+
+
+def test_resent_frames_are_dropped():
+    clock = Clock()
+    decoder = make_decoder(clock)
+    decoder.decode_frames(run(0, 10, 0))
+    connect(decoder)
+    # El ESP32 reenvía el lote que no llegó a confirmar (seq 5-9) y sigue
+    rows = decoder.decode_frames(run(5, 10, 5 * STEP_US))
+    assert decoder.resent == 5
+    assert len(rows) == 5
+    assert decoder.lost == 0
+
+
+def test_device_restart_starts_a_new_timeline():
+    clock = Clock()
+    decoder = make_decoder(clock)
+    decoder.decode_frames(run(100, 10, 123456))
+    clock.now += 30.0
+    connect(decoder)
+    rows = decoder.decode_frames(run(0, 10, 0))
+    assert rows[-1, T] == pytest.approx(clock.now)
+    assert decoder.resent == 0
+
+
+def test_stats_frames_are_split_off():
+    decoder = make_decoder(Clock())
+    batch = run(0, 3, 0)
+    stats = np.zeros(1, dtype=protocol.frame_dtype())
+    stats["seq"] = protocol.STATS_SEQ
+    rows = decoder.decode_frames(np.concatenate([batch, stats]))
+    assert len(rows) == 3
+    assert len(decoder.device_stats) == 1
+
+
+class StatusSink(Sink):
+    def __init__(self, fail_metadata=False):
+        self.statuses = []
+        self.fail_metadata = fail_metadata
+
+    def on_status(self, device, text):
+        self.statuses.append(text)
+
+    def on_metadata(self, device, **values):
+        if self.fail_metadata:
+            raise OSError("disco lleno")
+
+
+def serve_and_collect(header, sink, seconds=1.6):
+    connections = []
+
+    async def handler(reader, writer):
+        connections.append(writer)
+        writer.write(header + bytes(protocol.FRAME_SIZE * 10))
+        await writer.drain()
+
+    async def main():
+        server = await asyncio.start_server(handler, "127.0.0.1", 0)
+        device = Device("dev", "127.0.0.1", server.sockets[0].getsockname()[1])
+        await Collector([device], [sink]).run(seconds)
+        server.close()
+
+    asyncio.run(main())
+    return connections
+
+
+def test_decoder_error_reconnects_with_backoff():
+    sink = StatusSink()
+    old_header = struct.pack(">4sBBBBH", protocol.MAGIC, 1, 0, 0, 0, 100)
+    connections = serve_and_collect(old_header, sink)
+    assert len(connections) >= 2
+    assert any("Versión de protocolo" in text and "Reintento" in text for text in sink.statuses)
+
+
+def test_sink_error_reconnects():
+    sink = StatusSink(fail_metadata=True)
+    connections = serve_and_collect(protocol.pack_header(0, 0, 10000), sink)
+    assert len(connections) >= 2
+    assert any("disco lleno" in text for text in sink.statuses)
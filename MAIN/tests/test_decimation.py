@@ -0,0 +1,52 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data_Examples"))
+
+from decimation import Pyramid
+
+
+def signal(n, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / 1000.0
+    return t, rng.standard_normal((n, 3))
+
+
+def test_levels_hold_the_min_and_max_of_each_bucket():
+    t, values = signal(10_000)
+    values[123, 1] = np.nan  # Un NaN no debe tapar el resto del bucket
+    pyramid = Pyramid.build(t, values, base=16, factor=4, min_buckets=20)
+    assert [size for size, _, _, _ in pyramid.levels] == [16, 64, 256, 1024]
+    for size, bt, ymin, ymax in pyramid.levels:
+        assert len(bt) == -(-len(t) // size)
+        np.testing.assert_array_equal(bt, t[::size])
+        for i in (0, 7, len(bt) - 1):  # El último bucket está incompleto
+            bucket = values[i * size:(i + 1) * size]
+            np.testing.assert_array_equal(ymin[i], np.nanmin(bucket, axis=0))
+            np.testing.assert_array_equal(ymax[i], np.nanmax(bucket, axis=0))
+    assert len(pyramid.levels[-1][1]) <= 20
+
+
+def test_query_picks_a_level_with_about_one_bucket_per_pixel():
+    t, values = signal(100_000)
+    pyramid = Pyramid.build(t, values)
+    x, y = pyramid.query(t[0], t[-1], 2, pixels=800)
+    assert len(x) == len(y) and len(x) // 2 <= 800
+    assert y.min() == values[:, 2].min() and y.max() == values[:, 2].max()
+    # Pocas muestras en rango: se dibujan las originales
+    assert pyramid.query(t[1000], t[1100], 0, pixels=800) is None
+
+
+def test_save_and_load_round_trip(tmp_path):
+    t, values = signal(5_000)
+    pyramid = Pyramid.build(t, values[:, 0], min_buckets=10)
+    path = str(tmp_path / "pyramid.npz")
+    pyramid.save(path)
+    loaded = Pyramid.load(path)
+    assert len(loaded.levels) == len(pyramid.levels)
+    for a, b in zip(pyramid.levels, loaded.levels):
+        assert a[0] == b[0]
+        for x, y in zip(a[1:], b[1:]):
+            np.testing.assert_array_equal(x, y)
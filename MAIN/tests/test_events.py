@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+import events
+from recording import FILE_EXTENSION, SessionRecorder, open_recording
+from sample_buffer import make_rows
+
+RATE_HZ = 100
+
+
+def write_session(path, times, metadata=None):
+    t = np.asarray(times, dtype=float)
+    accel = np.column_stack([t, -t, np.full(len(t), 9.8)])
+    recorder = SessionRecorder(path, metadata if metadata is not None else {"rate_hz": RATE_HZ, "event_mode": True})
+    recorder.write_rows(make_rows(t, accel))
+    recorder.close()
+    return open_recording(path)
+
+
+def session_times():
+    # Latido, evento de 1 s, dos latidos, evento de 0.5 s
+    return np.concatenate([[0.0], 5 + np.arange(100) / RATE_HZ, [10.0, 15.0], 20 + np.arange(50) / RATE_HZ])
+
+
+@pytest.fixture
+def recording(tmp_path):
+    return write_session(str(tmp_path / ("sesion" + FILE_EXTENSION)), session_times())
+
+
+def test_split_events_separates_events_and_heartbeats(recording):
+    evts, beats = events.split_events(recording)
+    assert evts == [(1, 101), (103, 153)]
+    assert beats == [(0, 1), (101, 102), (102, 103)]
+
+
+def test_small_gaps_do_not_split_an_event(tmp_path):
+    times = np.arange(200) / RATE_HZ
+    times = np.delete(times, [50, 51, 52])  # 3 muestras perdidas < GAP_PERIODS
+    recording = write_session(str(tmp_path / ("a" + FILE_EXTENSION)), times)
+    assert events.split_events(recording) == ([(0, 197)], [])
+
+
+def test_rate_falls_back_to_the_median_step(tmp_path):
+    recording = write_session(str(tmp_path / ("a" + FILE_EXTENSION)), session_times(), metadata={})
+    assert events.recording_rate_hz(recording) == pytest.approx(RATE_HZ)
+    assert events.split_events(recording)[0] == [(1, 101), (103, 153)]
+
+
+def test_write_events_one_file_per_event(recording, tmp_path):
+    out = tmp_path / "eventos"
+    out.mkdir()
+    paths = events.write_events(recording, str(out))
+    assert [p.rsplit("_", 1)[-1] for p in paths] == ["001" + FILE_EXTENSION, "002" + FILE_EXTENSION,
+                                                       "latidos" + FILE_EXTENSION]
+    first = open_recording(paths[0])
+    np.testing.assert_array_equal(np.asarray(first.data), np.asarray(recording.data[1:101]))
+    assert first.metadata["event"] == 1
+    assert first.metadata["event_start"] == 5.0
+    assert first.metadata["source_recording"] == "sesion" + FILE_EXTENSION
+    assert open_recording(paths[2]).time.tolist() == [0.0, 10.0, 15.0]
+
+
+def test_summarize_compares_with_the_continuous_stream(recording):
+    summary = events.summarize(recording)
+    assert summary["events"] == 2
+    assert summary["heartbeats"] == 3
+    assert summary["samples"] == 153
+    assert summary["duration_s"] == pytest.approx(20.5)
+    assert summary["continuous_samples"] == pytest.approx(2050)
+    assert summary["reduction"] == pytest.approx(2050 / 153)
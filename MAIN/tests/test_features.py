@@ -0,0 +1,110 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data_Examples"))
+
+import features
+import loader
+
+RATE_HZ = 100.0
+
+
+@pytest.fixture(autouse=True)
+def numpy_parser(monkeypatch):
+    monkeypatch.setattr(loader, "pa_csv", None)
+
+
+def shake(seconds, freq_hz=5.0, amplitude=2.0):
+    """Gravedad en Z más una vibración senoidal en X."""
+    t = np.arange(int(seconds * RATE_HZ)) / RATE_HZ
+    accel = np.column_stack([amplitude * np.sin(2 * np.pi * freq_hz * t), np.zeros_like(t), np.full_like(t, 9.80665)])
+    return t, accel
+
+
+def write_csv(path, t, accel):
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("Tiempo (s),Acc X,Acc Y,Acc Z\n")
+        for row in np.column_stack([t, accel]):
+            file.write(",".join(f"{v:.6f}" for v in row) + "\n")
+    return str(path)
+
+
+def column(values, name):
+    return values[:, features.feature_names().index(name)]
+
+
+def test_window_features_of_a_sine():
+    t, accel = shake(2.0)
+    values = features.window_features(accel[None], 1 / RATE_HZ)
+    assert values.shape == (1, len(features.feature_names()))
+    assert column(values, "rms_x")[0] == pytest.approx(2.0 / np.sqrt(2), rel=1e-3)
+    assert column(values, "rms_y")[0] == 0.0
+    assert column(values, "peak_x")[0] == pytest.approx(2.0, rel=1e-3)
+    assert column(values, "dominant_hz")[0] == pytest.approx(10.0)  # El módulo oscila al doble
+    bands = values[0, [features.feature_names().index(f"band_{lo:g}_{hi:g}hz") for lo, hi in features.BANDS_HZ]]
+    assert bands.argmax() == 3  # 6-12 Hz
+    assert column(values, "tilt_min")[0] == pytest.approx(0.0, abs=1e-6)
+    assert column(values, "roll_mean")[0] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_stream_features_does_not_depend_on_the_chunks():
+    t, accel = shake(30.0)
+    whole_t, whole, rate_hz = features.stream_features([(t, accel)])
+    assert rate_hz == pytest.approx(RATE_HZ)
+    # Ventanas de 2 s cada 0.5 s
+    assert len(whole_t) == (len(t) - 200) // 50 + 1
+    assert whole_t[0] == pytest.approx((t[0] + t[199]) / 2)
+    cuts = [0, 7, 500, 1234, 2999, len(t)]
+    chunks = [(t[a:b], accel[a:b]) for a, b in zip(cuts, cuts[1:])]
+    split_t, split, _ = features.stream_features(chunks)
+    np.testing.assert_array_equal(split_t, whole_t)
+    np.testing.assert_allclose(split, whole, rtol=1e-12, atol=1e-12)
+
+
+def test_stream_features_too_short():
+    t, accel = shake(1.0)
+    times, values, rate_hz = features.stream_features([(t, accel)])
+    assert len(times) == 0
+    assert values.shape == (0, len(features.feature_names()))
+    assert rate_hz == pytest.approx(RATE_HZ)
+
+
+def test_file_features_uses_and_invalidates_the_cache(tmp_path, monkeypatch):
+    path = write_csv(tmp_path / "s.csv", *shake(10.0))
+    first = features.file_features(path)
+    assert len(first["t"]) == 17
+    real = features.stream_features
+
+    def fail(*args, **kwargs):
+        raise AssertionError("debería reutilizar features.npz")
+
+    monkeypatch.setattr(features, "stream_features", fail)
+    cached = features.file_features(path)
+    for name in ["t"] + features.feature_names():
+        np.testing.assert_array_equal(cached[name], first[name])
+
+    # Otros parámetros o un CSV editado obligan a recalcular
+    monkeypatch.setattr(features, "stream_features", real)
+    assert len(features.file_features(path, hop_s=1.0)["t"]) == 9
+    write_csv(tmp_path / "s.csv", *shake(5.0))
+    assert len(features.file_features(path, hop_s=1.0)["t"]) == 4
+
+
+def test_extract_many_in_parallel_matches_serial(tmp_path):
+    paths = [write_csv(tmp_path / f"s{i}.csv", *shake(5.0 + i, freq_hz=2.0 + i)) for i in range(3)]
+    serial = features.extract_many(paths, use_cache=False, workers=1)
+    parallel = features.extract_many(paths, use_cache=False, workers=2)
+    assert list(parallel) == paths
+    for path in paths:
+        for name in ["t"] + features.feature_names():
+            np.testing.assert_array_equal(parallel[path][name], serial[path][name])
+
+    out = str(tmp_path / "features.csv")
+    features.write_features_csv(serial, out)
+    with open(out) as file:
+        lines = file.read().splitlines()
+    assert lines[0].split(",")[:3] == ["file", "t", "rms_x"]
+    assert len(lines) == 1 + sum(len(r["t"]) for r in serial.values())
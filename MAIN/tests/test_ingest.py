@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from ingest import LineReader, parse_text_block
+
+
+def line(values):
+    ax, ay, az, gx, gy, gz = values
+    return (f"Aceleración (m/s²) -> X: {ax:.3f} Y: {ay:.3f} Z: {az:.3f} | "
+            f"Ángulos (grados) -> X: {gx:.1f} Y: {gy:.1f} Z: {gz:.1f}\n").encode("utf-8")
+
+
+ROWS = [(0.125, -9.807, 1.5, 12.5, -3.0, 90.0), (-0.001, 0.0, 9.81, -180.0, 0.1, 0.0)]
+
+
+def test_parse_text_block_fast_path():
+    values, rejected = parse_text_block(b"".join(line(r) for r in ROWS))
+    assert rejected == 0
+    np.testing.assert_array_equal(values, np.array(ROWS))
+
+
+def test_parse_text_block_rejects_garbage_and_keeps_good_lines():
+    block = line(ROWS[0]) + b"Iniciando WiFi...\n" + line(ROWS[1]) + b"X: 1 | basura\n"
+    values, rejected = parse_text_block(block)
+    assert rejected == 2
+    np.testing.assert_array_equal(values, np.array(ROWS))
+
+
+def test_parse_text_block_irregular_spacing():
+    block = line(ROWS[0]).replace(b"X: ", b"X:   ").replace(b" | ", b"|")
+    values, rejected = parse_text_block(block)
+    assert rejected == 0
+    np.testing.assert_array_equal(values, np.array(ROWS[:1]))
+
+
+def test_parse_text_block_empty():
+    values, rejected = parse_text_block(b"")
+    assert values.shape == (0, 6)
+    assert rejected == 0
+
+
+class ChunkSocket:
+    def __init__(self, data, chunk):
+        self.data = data
+        self.chunk = chunk
+
+    def recv_into(self, buf):
+        n = min(len(buf), self.chunk, len(self.data))
+        buf[:n] = self.data[:n]
+        self.data = self.data[n:]
+        return n
+
+
+def test_line_reader_splits_on_complete_lines_and_grows():
+    data = b"".join(line(r) for r in ROWS * 10)
+    reader = LineReader(size=32)  # Más pequeño que una línea: tiene que crecer
+    sock = ChunkSocket(data, chunk=50)
+    blocks = []
+    while sock.data:
+        reader.recv(sock)
+        block = reader.take_lines()
+        if block:
+            assert block.endswith(b"\n")
+            blocks.append(block)
+    assert b"".join(blocks) == data
+    assert reader.fill == 0
+    values, rejected = parse_text_block(b"".join(blocks))
+    assert values.shape == (20, 6) and rejected == 0
+
+
+def test_line_reader_raises_when_the_peer_closes():
+    reader = LineReader()
+    with pytest.raises(ConnectionError):
+        reader.recv(ChunkSocket(b"", chunk=10))
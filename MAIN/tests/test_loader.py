@@ -0,0 +1,79 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data_Examples"))
+
+import loader
+
+HEADER = "Tiempo,AccX,AccY,AccZ\n"
+
+
+@pytest.fixture(autouse=True)
+def numpy_parser(monkeypatch):
+    # Mismo resultado con o sin pyarrow; aquí se prueba el analizador de NumPy
+    monkeypatch.setattr(loader, "pa_csv", None)
+
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(HEADER)
+        file.writelines(",".join(f"{v:g}" for v in row) + "\n" for row in rows)
+    return str(path)
+
+
+def make_rows(n):
+    t = np.arange(n, dtype=float)
+    return np.column_stack([t / 100, t, -t, t * 0.5])
+
+
+def test_chunks_split_on_line_boundaries(tmp_path):
+    rows = make_rows(500)
+    path = write_csv(tmp_path / "s.csv", rows)
+    chunks = list(loader.iter_csv_chunks(path, chunk_bytes=256))
+    assert len(chunks) > 10
+    np.testing.assert_array_equal(np.concatenate(chunks), rows)
+    used = np.concatenate(list(loader.iter_csv_chunks(path, chunk_bytes=256, usecols=[0, 3])))
+    np.testing.assert_array_equal(used, rows[:, [0, 3]])
+
+
+def test_malformed_rows_are_skipped(tmp_path, capsys):
+    with open(tmp_path / "s.csv", "w", encoding="utf-8") as file:
+        file.write(HEADER + "0,1,2,3\n0,1,x,3\n1,2\n4,5,6,7")  # Última línea sin \n
+    header, data = loader.load_csv(str(tmp_path / "s.csv"), use_cache=False)
+    assert header == ["Tiempo", "AccX", "AccY", "AccZ"]
+    np.testing.assert_array_equal(data, [[0, 1, 2, 3], [4, 5, 6, 7]])
+    assert capsys.readouterr().out.count("Error processing row") == 2
+
+
+def test_load_csv_caches_and_reopens_with_memmap(tmp_path, monkeypatch):
+    rows = make_rows(100)
+    path = write_csv(tmp_path / "s.csv", rows)
+    _, data = loader.load_csv(path)
+    assert not isinstance(data, np.memmap)
+    assert loader.cache_is_valid(path)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("la caché debería evitar volver a leer el CSV")
+
+    monkeypatch.setattr(loader, "iter_csv_chunks", fail)
+    _, cached = loader.load_csv(path)
+    assert isinstance(cached, np.memmap)
+    np.testing.assert_array_equal(cached, rows)
+
+
+def test_cache_is_dropped_when_the_csv_changes(tmp_path):
+    path = write_csv(tmp_path / "s.csv", make_rows(10))
+    loader.load_csv(path)
+    stale = os.path.join(loader.cache_dir(path), "pyramid.npz")
+    open(stale, "wb").close()
+
+    rows = make_rows(20)
+    write_csv(tmp_path / "s.csv", rows)
+    assert not loader.cache_is_valid(path)
+    _, data = loader.load_csv(path)
+    np.testing.assert_array_equal(data, rows)
+    assert not os.path.exists(stale)
+    assert loader.cache_is_valid(path)
@@ -0,0 +1,123 @@
+# MotionTrigger (modo evento del ESP32) con tramas sintéticas, sin reloj real.
+
+import os
+import struct
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sim"))
+
+import micropython_time
+
+micropython_time.install()
+
+import protocol
+from motion_trigger import MotionTrigger
+
+ACC_SCALER = 16384.0  # ±2 g
+GYR_SCALER = 131.0    # ±250 °/s
+PERIOD_MS = 10
+REST = ((0, 0, 16384), (0, 0, 0))
+SHAKE = ((0, 0, 24576), (0, 0, 0))   # 1.5 g: desviación de 0.5 g
+SPIN = ((0, 0, 16384), (0, 0, 131 * 100))
+HOLD = ((0, 0, 18022), (0, 0, 0))    # 0.1 g: entre liberación y disparo
+
+
+def make_trigger(pre_frames=4, post_frames=3, heartbeat_ms=1000, max_frames=64):
+    return MotionTrigger(0.3, 0.05, 50.0, 10.0, pre_frames, post_frames, heartbeat_ms, max_frames)
+
+
+def make_frames(first_seq, samples):
+    buf = bytearray(len(samples) * protocol.FRAME_SIZE)
+    for i, (accel, gyro) in enumerate(samples):
+        raw = struct.pack(">7h", *accel, 0, *gyro)
+        seq = first_seq + i
+        protocol.pack_frame_into(buf, i * protocol.FRAME_SIZE, seq, seq * PERIOD_MS * 1000, raw, 0, 0)
+    return buf
+
+
+class Feeder:
+    """Pasa las muestras por el filtro en bloques, como el bucle de reparto."""
+
+    def __init__(self, trigger):
+        self.trigger = trigger
+        self.seq = 0
+        self.out = []  # (seq renumerado, t_us) de las tramas enviadas
+
+    def feed(self, samples, skip=0):
+        self.seq += skip  # Muestras perdidas de verdad en el ESP32
+        frames = make_frames(self.seq, samples)
+        self.seq += len(samples)
+        now_ms = self.seq * PERIOD_MS
+        view, m = self.trigger.filter(frames, len(samples), ACC_SCALER, GYR_SCALER, now_ms)
+        new = [struct.unpack_from(">II", view, i * protocol.FRAME_SIZE) for i in range(m)]
+        self.out += new
+        return new
+
+
+def t_index(out):
+    return [t_us // (PERIOD_MS * 1000) for _, t_us in out]
+
+
+def test_motion_measures_accel_deviation_and_gyro():
+    trigger = make_trigger()
+    frames = make_frames(0, [REST, SHAKE, SPIN])
+    size = protocol.FRAME_SIZE
+    assert trigger.motion(frames, 0, ACC_SCALER, GYR_SCALER) == (0.0, 0.0)
+    assert trigger.motion(frames, size, ACC_SCALER, GYR_SCALER) == (0.5, 0.0)
+    assert trigger.motion(frames, 2 * size, ACC_SCALER, GYR_SCALER) == (0.0, 100.0)
+
+
+def test_rest_only_sends_heartbeats():
+    feeder = Feeder(make_trigger(heartbeat_ms=1000))
+    for _ in range(50):
+        feeder.feed([REST] * 10)  # 5 s en reposo
+    stats = feeder.trigger.stats()
+    assert stats["events"] == 0 and not stats["active"]
+    assert stats["heartbeats"] == len(feeder.out) == 5
+    assert stats["frames_in"] == 500
+
+
+def test_event_carries_pre_trigger_context_and_post_frames():
+    feeder = Feeder(make_trigger(pre_frames=4, post_frames=3, heartbeat_ms=10 ** 6))
+    feeder.feed([REST] * 20)
+    beats = len(feeder.out)
+    event = feeder.feed([REST] * 2 + [SHAKE] * 3 + [REST] * 10)
+    # 4 de contexto (2 del bloque anterior), el movimiento y 3 de reposo para cerrar
+    assert t_index(event) == list(range(18, 28))
+    assert feeder.trigger.stats()["events"] == 1
+    assert not feeder.trigger.active
+    assert len(feeder.out) == beats + 10
+
+
+def test_hysteresis_keeps_the_event_open_between_thresholds():
+    feeder = Feeder(make_trigger(pre_frames=0, post_frames=2, heartbeat_ms=10 ** 6))
+    feeder.feed([REST] * 5)
+    event = feeder.feed([SPIN] + [HOLD] * 6 + [REST] * 5)
+    assert t_index(event) == list(range(5, 14))
+    assert not feeder.trigger.active
+
+
+def test_seq_is_renumbered_only_across_skipped_rest():
+    feeder = Feeder(make_trigger(pre_frames=2, post_frames=2, heartbeat_ms=10 ** 6))
+    feeder.feed([REST] * 10)
+    feeder.feed([SHAKE] * 2 + [REST] * 4)
+    feeder.feed([REST] * 30)
+    # Pérdida real de 3 muestras en mitad del segundo evento
+    feeder.feed([SHAKE] * 2)
+    feeder.feed([SHAKE] + [REST] * 4, skip=3)
+    seqs = [seq for seq, _ in feeder.out]
+    assert seqs == sorted(seqs)
+    gaps = [b - a for a, b in zip(seqs, seqs[1:])]
+    assert gaps.count(1) == len(gaps) - 1
+    assert 4 in gaps  # El hueco de 3 muestras perdidas sigue visible para el PC
+    assert feeder.trigger.stats()["events"] == 2
+
+
+@pytest.mark.parametrize("pre_frames", [0, 3])
+def test_output_buffer_fits_a_full_call(pre_frames):
+    trigger = make_trigger(pre_frames=pre_frames, max_frames=8)
+    feeder = Feeder(trigger)
+    feeder.feed([REST] * 8)
+    assert len(feeder.feed([SHAKE] * 8)) == pre_frames + 8
@@ -0,0 +1,133 @@
+# Pruebas del driver MPU6050.py contra el banco de registros emulado de sim/.
+
+import math
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sim"))
+
+import MPU6050 as mpu6050
+from fake_mpu6050 import FakeMPU6050I2C
+
+G = 9.80665
+
+
+@pytest.fixture
+def bus():
+    return FakeMPU6050I2C()
+
+
+@pytest.fixture
+def mpu(bus):
+    return mpu6050.MPU6050(i2c=bus)
+
+
+def test_read_all_into_decodes_one_burst(bus, mpu):
+    bus.set_sample(accel=(16384, -8192, 4096), temp=340, gyro=(131, -262, 0))
+    out = [0.0] * 7
+    reads = bus.reads
+    assert mpu.read_all_into(out, g=True) is out
+    assert bus.reads == reads + 1
+    assert out[:3] == [1.0, -0.5, 0.25]
+    assert out[3] == pytest.approx(37.53)
+    assert out[4:] == [1.0, -2.0, 0.0]
+
+
+def test_read_all_into_scales_to_ms2_and_follows_the_range(bus, mpu):
+    bus.set_sample(accel=(0, 0, 16384))
+    assert mpu.read_all_into([0.0] * 7)[2] == pytest.approx(G)
+
+    mpu.set_accel_range(mpu6050._ACC_RNG_4G)
+    mpu.set_gyro_range(mpu6050._GYR_RNG_500DEG)
+    bus.set_sample(accel=(0, 0, 8192), gyro=(655, 0, 0))
+    out = mpu.read_all_into([0.0] * 7, g=True)
+    assert out[2] == 1.0
+    assert out[4] == pytest.approx(10.0)
+
+
+def test_read_all_matches_the_per_register_reads(bus, mpu):
+    bus.set_physical((1.5, -3.0, 9.0), (10.0, -20.0, 30.0), temp_c=30.0)
+    ax, ay, az, temp, gx, gy, gz = mpu.read_all()
+    accel = mpu.read_accel_data()
+    gyro = mpu.read_gyro_data()
+    assert (ax, ay, az) == pytest.approx((accel["x"], accel["y"], accel["z"]))
+    assert (gx, gy, gz) == pytest.approx((gyro["x"], gyro["y"], gyro["z"]))
+    assert temp == pytest.approx(mpu.read_temperature())
+
+
+def test_read_all_into_returns_nan_when_the_bus_fails(bus, mpu, monkeypatch):
+    monkeypatch.setattr(mpu6050, "sleep_ms", lambda ms: None)
+    mpu.addr = 0x69  # Sin ACK: el bus falso lanza OSError
+    out = mpu.read_all_into([0.0] * 7)
+    assert all(math.isnan(v) for v in out)
+    assert mpu._terminatingFailCount == 1
+    assert not mpu.read_raw_into(bytearray(14))
+
+
+def test_set_sample_rate_picks_dlpf_and_divider(bus, mpu):
+    assert mpu.set_sample_rate(200) == 200.0
+    assert bus.regs[mpu6050._SMPLRT_DIV] == 4
+    assert mpu.get_dlpf() == mpu6050._DLPF_184HZ
+    assert mpu.set_sample_rate(1000, dlpf=mpu6050._DLPF_260HZ) == 1000.0
+    assert bus.regs[mpu6050._SMPLRT_DIV] == 7
+    assert mpu.set_sample_rate(1) == 1000 / 256  # divider saturado en 255
+
+
+def test_drain_fifo_reads_frames_in_chunks(bus, mpu):
+    mpu.start_fifo()
+    n = mpu6050._FIFO_CHUNK_FRAMES + 8
+    for i in range(n):
+        bus.set_sample(accel=(i, 0, 16384), gyro=(0, 0, 131 * i))
+        bus.push_frames()
+    reads = bus.reads
+    frames = [list(out) for out in mpu.drain_fifo(g=True)]
+    assert mpu.fifo_frames_drained == n
+    assert not mpu.fifo_overflow
+    # INT_STATUS + FIFO_COUNT + dos lecturas de la FIFO
+    assert bus.reads - reads == 4
+    assert [f[0] * 16384 for f in frames] == list(range(n))
+    assert [f[5] for f in frames] == list(range(n))
+    assert all(f[2] == 1.0 for f in frames)
+    assert mpu.fifo_count() == 0
+
+
+def test_drain_fifo_max_frames_leaves_the_rest(bus, mpu):
+    mpu.start_fifo()
+    bus.push_frames(10)
+    assert len(list(mpu.drain_fifo(max_frames=4))) == 4
+    assert mpu.fifo_count() == 6 * 12
+    assert len(list(mpu.drain_fifo())) == 6
+
+
+def test_drain_fifo_accel_only_leaves_gyro_nan(bus, mpu):
+    mpu.start_fifo(gyro=False)
+    bus.push_frames(3)
+    frames = [list(out) for out in mpu.drain_fifo(g=True)]
+    assert len(frames) == 3
+    assert all(f[:3] == [0.0, 0.0, 1.0] for f in frames)
+    assert all(math.isnan(v) for f in frames for v in f[3:])
+
+
+def test_drain_fifo_resets_after_overflow(bus, mpu):
+    mpu.start_fifo()
+    bus.push_frames(mpu6050._FIFO_SIZE // 12 + 5)
+    assert list(mpu.drain_fifo()) == []
+    assert mpu.fifo_overflow
+    assert mpu._fifoOverflowCount == 1
+    assert mpu.fifo_count() == 0
+    # La FIFO sigue activa y vuelve a entregar tramas alineadas
+    bus.push_frames(2)
+    assert len(list(mpu.drain_fifo(g=True))) == 2
+    assert not mpu.fifo_overflow
+
+
+def test_drain_fifo_without_start_or_after_stop(bus, mpu):
+    assert list(mpu.drain_fifo()) == []
+    mpu.start_fifo()
+    bus.push_frames(2)
+    mpu.stop_fifo()
+    bus.push_frames(2)
+    assert list(mpu.drain_fifo()) == []
+    assert mpu.fifo_count() == 0
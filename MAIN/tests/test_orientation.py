@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from orientation import ComplementaryFilter, _linear_scan, complementary_batch, tilt_angle
+
+
+def sequential_scan(u, alpha, x0):
+    out = []
+    x = x0
+    for value in u:
+        x = alpha * x + value
+        out.append(x)
+    return np.array(out)
+
+
+@pytest.mark.parametrize("alpha", [0.0, 1e-9, 0.01, 0.5, 0.98, 0.999, 1.0])
+def test_linear_scan_matches_recurrence(alpha):
+    u = np.random.default_rng(0).standard_normal(2000)
+    expected = sequential_scan(u, alpha, 0.5)
+    result = _linear_scan(u, alpha, 0.5)
+    assert np.isfinite(result).all()
+    np.testing.assert_allclose(result, expected, rtol=1e-9, atol=1e-9 * max(1.0, np.abs(expected).max()))
+
+
+def test_batch_matches_per_sample_filter():
+    rng = np.random.default_rng(1)
+    accel = rng.standard_normal((500, 3)) + [0.0, 0.0, 9.8]
+    gyro = rng.standard_normal((500, 3)) * 10
+    dt = np.full(500, 0.01)
+    for alpha in (0.98, 0.2):
+        reference = ComplementaryFilter(alpha)
+        expected = [reference.update(*a, *g, 0.01) for a, g in zip(accel.tolist(), gyro.tolist())]
+        # En dos lotes, pasando el estado de uno a otro
+        head, state = complementary_batch(accel[:200], gyro[:200], dt[:200], alpha=alpha)
+        tail, _ = complementary_batch(accel[200:], gyro[200:], dt[200:], alpha=alpha, state=state)
+        np.testing.assert_allclose(np.concatenate([head, tail]), expected, atol=1e-9)
+
+
+def test_batch_rejects_invalid_alpha():
+    with pytest.raises(ValueError):
+        complementary_batch(np.zeros((1, 3)), np.zeros((1, 3)), 0.01, alpha=1.5)
+
+
+def test_tilt_angle():
+    assert tilt_angle(0.0, 0.0, 9.8) == pytest.approx(0.0)
+    assert tilt_angle(9.8, 0.0, 0.0) == pytest.approx(np.pi / 2)
+    assert tilt_angle(0.0, 0.0, -9.8) == pytest.approx(np.pi)
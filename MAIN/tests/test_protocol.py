@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+
+import protocol
+
+
+def pack_frames(seqs, ticks, accel_range=0, gyro_range=0):
+    buf = bytearray(len(seqs) * protocol.FRAME_SIZE)
+    for i, (seq, t_us) in enumerate(zip(seqs, ticks)):
+        # Acel X, Y, Z, temperatura, giro X, Y, Z como los devuelve el MPU6050
+        raw = (i.to_bytes(2, "big", signed=True) + (-i).to_bytes(2, "big", signed=True) + (16384).to_bytes(2, "big")
+               + bytes(2) + (3 * i).to_bytes(2, "big", signed=True) + bytes(4))
+        protocol.pack_frame_into(buf, i * protocol.FRAME_SIZE, seq, t_us, raw, accel_range, gyro_range)
+    return bytes(buf)
+
+
+def frames_array(seqs, ticks):
+    return np.frombuffer(pack_frames(seqs, ticks), dtype=protocol.frame_dtype())
+
+
+def test_header_round_trip():
+    header = protocol.unpack_header(protocol.pack_header(1, 2, 2000, protocol.FLAG_STATS | protocol.FLAG_EVENTS))
+    assert header == {"version": protocol.VERSION, "flags": protocol.FLAG_STATS | protocol.FLAG_EVENTS,
+                      "accel_range": 1, "gyro_range": 2, "period_us": 2000, "rate_hz": 500.0}
+
+
+def test_header_keeps_slow_and_uneven_periods():
+    # SAMPLE_PERIOD_MS = 1500 y 3: en Hz enteros serían 0 y 333
+    assert protocol.unpack_header(protocol.pack_header(0, 0, 1500000))["rate_hz"] == pytest.approx(2 / 3)
+    assert protocol.unpack_header(protocol.pack_header(0, 0, 3000))["period_us"] == 3000
+
+
+def test_header_rejects_zero_period():
+    with pytest.raises(ValueError):
+        protocol.pack_header(0, 0, 0)
+    header = bytearray(protocol.pack_header(0, 0, 1000))
+    header[-4:] = bytes(4)
+    with pytest.raises(ValueError):
+        protocol.unpack_header(header)
+
+
+def test_header_rejects_other_magic():
+    with pytest.raises(ValueError):
+        protocol.unpack_header(b"XXXX" + bytes(protocol.HEADER_SIZE - 4))
+    buf = bytearray(protocol.HEADER_SIZE)
+    protocol.pack_datagram_header_into(buf, 0, 0, 1000)
+    with pytest.raises(ValueError):
+        protocol.unpack_header(buf)
+
+
+def test_stream_decoder_handles_any_split():
+    stream = protocol.pack_header(0, 0, 10000) + pack_frames(range(50), range(0, 500000, 10000))
+    decoder = protocol.BinaryStreamDecoder()
+    chunks = []
+    for start in range(0, len(stream), 7):
+        chunks.append(decoder.feed(stream[start:start + 7]))
+    frames = np.concatenate(chunks)
+    assert decoder.header["rate_hz"] == 100
+    assert frames["seq"].tolist() == list(range(50))
+    assert frames["accel"][5].tolist() == [5, -5, 16384]
+    assert frames["gyro"][5].tolist() == [15, 0, 0]
+
+
+def test_frames_to_physical_units():
+    physical = protocol.frames_to_physical(frames_array([0], [0]))
+    assert physical["accel"][0] == pytest.approx([0.0, 0.0, 9.80665])
+    # Ang Z es la inclinación absoluta: 0° con el sensor horizontal
+    assert physical["angles"][0] == pytest.approx([0.0, 0.0, 0.0])
+
+
+def test_times_s_unwraps_ticks():
+    decoder = protocol.BinaryStreamDecoder()
+    period = protocol.TICKS_PERIOD
+    times = decoder.times_s(frames_array([0, 1, 2], [period - 10000, 0, 10000]))
+    assert times.tolist() == pytest.approx([0.0, 0.01, 0.02])
+    assert decoder.times_s(frames_array([3], [20000])).tolist() == pytest.approx([0.03])
+
+
+def test_split_stats():
+    buf = bytearray(pack_frames([0, 1], [0, 10]) + bytes(protocol.FRAME_SIZE))
+    protocol.pack_stats_into(buf, 2 * protocol.FRAME_SIZE, 1234, range(1, len(protocol.STATS_FIELDS) + 1))
+    frames, stats = protocol.split_stats(np.frombuffer(bytes(buf), dtype=protocol.frame_dtype()))
+    assert frames["seq"].tolist() == [0, 1]
+    assert stats == [dict(zip(protocol.STATS_FIELDS, range(1, 8)), t_us=1234)]
+    line = protocol.format_stats_line(buf, 2 * protocol.FRAME_SIZE)
+    assert protocol.parse_stats_line(line) == dict(zip(protocol.STATS_FIELDS, range(1, 8)))
+
+
+def test_unpack_datagram():
+    buf = bytearray(protocol.HEADER_SIZE)
+    protocol.pack_datagram_header_into(buf, 0, 0, 5000)
+    header, frames = protocol.unpack_datagram(bytes(buf) + pack_frames([7, 8], [0, 5000]))
+    assert header["rate_hz"] == 200
+    assert frames["seq"].tolist() == [7, 8]
+    with pytest.raises(ValueError):
+        protocol.unpack_datagram(bytes(buf) + pack_frames([7], [0])[:-1])
+
+
+def batch(first, n):
+    return frames_array(range(first, first + n), range(0, n * 1000, 1000))
+
+
+def delivered_seqs(batches):
+    return [int(s) for frames in batches for s in frames["seq"]]
+
+
+def test_reorderer_reorders_within_window():
+    reorderer = protocol.DatagramReorderer(window=4, timeout_s=1.0)
+    reorderer.push(batch(0, 5), 0.0)
+    assert delivered_seqs(reorderer.pop_ready(0.0)) == list(range(5))
+    reorderer.push(batch(10, 5), 0.01)
+    assert reorderer.pop_ready(0.01) == []
+    reorderer.push(batch(5, 5), 0.02)
+    assert delivered_seqs(reorderer.pop_ready(0.02)) == list(range(5, 15))
+    assert reorderer.stats() == {"reordered": 1, "late": 0, "gaps": 0, "missing": 0}
+
+
+def test_reorderer_gives_up_on_gap_after_timeout():
+    reorderer = protocol.DatagramReorderer(window=4, timeout_s=0.05)
+    reorderer.push(batch(0, 5), 0.0)
+    reorderer.pop_ready(0.0)
+    reorderer.push(batch(10, 5), 0.01)
+    assert reorderer.pop_ready(0.03) == []
+    assert delivered_seqs(reorderer.pop_ready(0.07)) == list(range(10, 15))
+    # El lote perdido que llega después se descarta
+    reorderer.push(batch(5, 5), 0.08)
+    assert reorderer.pop_ready(0.08) == []
+    assert reorderer.stats() == {"reordered": 0, "late": 1, "gaps": 1, "missing": 5}
+
+
+def test_reorderer_trims_partial_duplicates():
+    reorderer = protocol.DatagramReorderer(window=4, timeout_s=1.0)
+    reorderer.push(batch(0, 5), 0.0)
+    reorderer.pop_ready(0.0)
+    reorderer.push(batch(3, 5), 0.01)
+    assert delivered_seqs(reorderer.pop_ready(0.01)) == [5, 6, 7]
@@ -0,0 +1,67 @@
+import numpy as np
+
+from recording import CSV_HEADER, FILE_EXTENSION, SessionRecorder, open_recording
+from sample_buffer import make_rows
+
+
+def rows(first, n):
+    t = np.arange(first, first + n) * 0.01
+    accel = np.column_stack([t, 2 * t, np.full(n, 9.8)])
+    return make_rows(t, accel, gyro=-accel, angles=accel / 2)
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / ("sesion" + FILE_EXTENSION))
+    recorder = SessionRecorder(path, {"source": "prueba"})
+    recorder.write_rows(rows(0, 100))
+    recorder.update_metadata(rate_hz=100, accel_range=0)
+    recorder.write_rows(rows(100, 50))
+    recorder.close()
+    # Tras close() lo que llegue se ignora
+    recorder.write_rows(rows(150, 10))
+
+    recording = open_recording(path)
+    assert len(recording) == 150
+    np.testing.assert_array_equal(np.asarray(recording.data), np.concatenate([rows(0, 100), rows(100, 50)]))
+    assert recording.metadata["source"] == "prueba"
+    assert recording.metadata["rate_hz"] == 100
+    assert len(recording.between(0.5, 1.0)) == 50
+
+
+def test_flush_and_pending(tmp_path):
+    recorder = SessionRecorder(str(tmp_path / ("a" + FILE_EXTENSION)))
+    recorder.write_rows(rows(0, 10))
+    recorder.flush()
+    assert recorder.pending() == 0
+    assert recorder.rows_written == 10
+    # Sin cerrar: lo que exporta "Guardar Datos" durante la captura
+    recording = open_recording(recorder.path)
+    assert len(recording) == 10
+    np.testing.assert_array_equal(np.asarray(recording.data), rows(0, 10))
+    recorder.write_rows(rows(10, 5))
+    recorder.flush()
+    assert len(open_recording(recorder.path)) == 15
+    recorder.close()
+
+
+def test_truncated_record_is_ignored(tmp_path):
+    path = str(tmp_path / ("a" + FILE_EXTENSION))
+    recorder = SessionRecorder(path)
+    recorder.write_rows(rows(0, 3))
+    recorder.close()
+    with open(path, "ab") as file:
+        file.write(b"\0" * 10)
+    assert len(open_recording(path)) == 3
+
+
+def test_to_csv(tmp_path):
+    path = str(tmp_path / ("a" + FILE_EXTENSION))
+    recorder = SessionRecorder(path)
+    recorder.write_rows(rows(5, 3))
+    recorder.close()
+    csv_path = tmp_path / "a.csv"
+    open_recording(path).to_csv(str(csv_path))
+    lines = csv_path.read_text().splitlines()
+    assert lines[0] == ",".join(CSV_HEADER)
+    assert lines[1].split(",")[0] == "0.000"
+    assert lines[3].split(",")[:2] == ["0.020", "0.070"]
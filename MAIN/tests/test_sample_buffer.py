@@ -0,0 +1,70 @@
+import numpy as np
+
+from sample_buffer import ACCEL, ANGLES, GYRO, N_COLUMNS, T, SampleBuffer, make_rows
+
+
+def times(buffer):
+    return buffer.snapshot()[:, T].tolist()
+
+
+def test_append_wraps_around():
+    buffer = SampleBuffer(5)
+    for i in range(12):
+        buffer.append(float(i), (i, 0, 0))
+    assert len(buffer) == 5
+    assert buffer.total == 12
+    assert times(buffer) == [7.0, 8.0, 9.0, 10.0, 11.0]
+    assert buffer.last_time() == 11.0
+    assert buffer.snapshot()[:, ACCEL][:, 0].tolist() == [7, 8, 9, 10, 11]
+
+
+def test_extend_matches_append():
+    appended = SampleBuffer(8)
+    extended = SampleBuffer(8)
+    t = np.arange(20.0)
+    accel = np.column_stack([t, -t, 2 * t])
+    for i in range(20):
+        appended.append(t[i], accel[i])
+    for start in (0, 3, 10, 11):
+        end = {0: 3, 3: 10, 10: 11, 11: 20}[start]
+        extended.extend(t[start:end], accel[start:end])
+    np.testing.assert_array_equal(appended.snapshot(), extended.snapshot())
+    assert extended.total == 20
+
+
+def test_extend_larger_than_capacity_keeps_newest():
+    buffer = SampleBuffer(4)
+    buffer.extend(np.arange(10.0), np.zeros((10, 3)))
+    assert times(buffer) == [6.0, 7.0, 8.0, 9.0]
+    assert buffer.total == 10
+
+
+def test_full_window_stays_ordered_after_next_append():
+    buffer = SampleBuffer(6)
+    buffer.extend(np.arange(9.0), np.zeros((9, 3)))
+    view = buffer.window()
+    assert len(view) == 5
+    buffer.append(9.0, (0, 0, 0))
+    # La vista anterior no ve la muestra nueva en su primera fila
+    assert view[:, T].tolist() == [4.0, 5.0, 6.0, 7.0, 8.0]
+    assert np.all(np.diff(buffer.window()[:, T]) > 0)
+
+
+def test_window_since():
+    buffer = SampleBuffer(100)
+    buffer.extend(np.arange(0.0, 5.0, 0.5), np.zeros((10, 3)))
+    assert buffer.window_since(1.0)[:, T].tolist() == [3.5, 4.0, 4.5]
+    assert buffer.window(2)[:, T].tolist() == [4.0, 4.5]
+
+
+def test_clear_and_missing_channels():
+    buffer = SampleBuffer(4)
+    assert buffer.last_time() is None
+    assert len(buffer.window_since(1.0)) == 0
+    rows = make_rows([0.0], [[1, 2, 3]], angles=[[4, 5, 6]])
+    assert rows.shape == (1, N_COLUMNS)
+    assert np.isnan(rows[0, GYRO]).all()
+    buffer.extend_rows(rows)
+    assert buffer.snapshot()[0, ANGLES].tolist() == [4, 5, 6]
+    buffer.clear()
+    assert len(buffer) == 0 and buffer.total == 0
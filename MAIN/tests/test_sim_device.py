@@ -0,0 +1,175 @@
+# Pruebas de extremo a extremo con main.py sin modificar en el ESP32 simulado
+# (sim/run_device.py) en un proceso aparte, conectándose por localhost.
+
+import contextlib
+import os
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+import protocol
+from collector import StreamDecoder
+
+MAIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUN_DEVICE = os.path.join(MAIN_DIR, "sim", "run_device.py")
+STARTUP_TIMEOUT_S = 20.0
+# Buffer de envío de lwIP en el ESP32: sin él, el del sistema tarda mucho en llenarse
+ESP32_SNDBUF = 5744
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def sim_device(workdir, *args):
+    """Arranca el ESP32 simulado; devuelve (puerto, líneas que imprime)."""
+    port = free_port()
+    process = subprocess.Popen([sys.executable, "-u", RUN_DEVICE, "--port", str(port), "--workdir", str(workdir),
+                                *args], cwd=MAIN_DIR, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    lines = []
+    ready = threading.Event()
+
+    def pump():
+        for line in process.stdout:
+            lines.append(line)
+            if "Esperando conexiones" in line:
+                ready.set()
+
+    threading.Thread(target=pump, daemon=True).start()
+    try:
+        assert ready.wait(STARTUP_TIMEOUT_S), "".join(lines)
+        yield port, lines
+    finally:
+        process.terminate()
+        process.wait(10)
+
+
+def wait_for(condition, timeout_s):
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def read_for(sock, seconds):
+    data = bytearray()
+    deadline = time.monotonic() + seconds
+    sock.settimeout(0.2)
+    while time.monotonic() < deadline:
+        try:
+            chunk = sock.recv(65536)
+        except socket.timeout:
+            continue
+        if not chunk:
+            break
+        data += chunk
+    return bytes(data)
+
+
+def test_stalled_client_is_dropped_and_its_slot_freed(tmp_path):
+    with sim_device(tmp_path, "--rate", "1000", "--format", "text", "--sndbuf", str(ESP32_SNDBUF)) as (port, lines):
+        stalled = socket.socket()
+        stalled.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        stalled.connect(("127.0.0.1", port))
+        # Nunca lee: tras CLIENT_STALL_MS (5 s) el ESP32 lo desconecta
+        assert wait_for(lambda: any("sin leer" in line for line in lines), 15.0), "".join(lines)
+
+        # El socket se cerró de verdad: tras lo que quedara en el buffer llega el fin
+        closed = False
+        stalled.settimeout(2.0)
+        try:
+            while stalled.recv(65536):
+                pass
+            closed = True
+        except ConnectionResetError:
+            closed = True
+        except socket.timeout:
+            pass
+        stalled.close()
+        assert closed
+
+        # Su plaza quedó libre: caben MAX_CLIENTS (4) clientes nuevos y todos reciben datos
+        others = [socket.create_connection(("127.0.0.1", port)) for _ in range(4)]
+        try:
+            for sock in others:
+                assert read_for(sock, 1.5)
+        finally:
+            for sock in others:
+                sock.close()
+        assert not any("rechazado" in line for line in lines)
+
+
+def decode(decoder, data):
+    decoder.reset()
+    decoder.mode = 'binary'
+    decoder.binary = protocol.BinaryStreamDecoder()
+    frames, _ = protocol.split_stats(decoder.binary.feed(data))
+    decoder.decode_frames(frames)
+    return frames["seq"].astype(np.int64)
+
+
+def test_no_gap_when_client_connection_drops(tmp_path):
+    with sim_device(tmp_path, "--rate", "200", "--format", "binary") as (port, lines):
+        first = socket.create_connection(("127.0.0.1", port))
+        first_data = read_for(first, 3.0)
+        # Corte brusco, como al caerse el Wi-Fi: RST con datos aún sin confirmar
+        first.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        first.close()
+        time.sleep(1.0)
+        second = socket.create_connection(("127.0.0.1", port))
+        second_data = read_for(second, 3.0)
+        second.close()
+
+    decoder = StreamDecoder(time.perf_counter)
+    first_seqs = decode(decoder, first_data)
+    second_seqs = decode(decoder, second_data)
+    assert len(first_seqs) and len(second_seqs)
+    # El segundo cliente recibe lo tomado durante el corte (y quizá algo repetido)
+    assert second_seqs[0] <= first_seqs[-1] + 1
+    received = np.union1d(first_seqs, second_seqs)
+    assert np.array_equal(received, np.arange(received[0], received[-1] + 1))
+    assert decoder.lost == 0
+
+
+def backlog_sizes(lines):
+    return [int(line.split()[1]) for line in lines if line.startswith("Enviando ") and "guardadas" in line]
+
+
+def test_backlog_stops_growing_when_its_client_drops(tmp_path):
+    rate = 1000
+    # En texto lo guardado ocupa bastante más que los buffers del socket
+    with sim_device(tmp_path, "--rate", str(rate), "--format", "text", "--sndbuf", str(ESP32_SNDBUF)) as (port, lines):
+        time.sleep(3.0)  # Sin clientes: se guarda
+        # Este cliente se queda con lo guardado pero no lo lee
+        owner = socket.socket()
+        owner.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        owner.connect(("127.0.0.1", port))
+        assert wait_for(lambda: backlog_sizes(lines), 5.0), "".join(lines)
+        live = socket.create_connection(("127.0.0.1", port))
+        done = threading.Event()
+        threading.Thread(target=lambda: (read_for(live, 6.0), done.set()), daemon=True).start()
+        time.sleep(0.5)
+        owner.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        owner.close()
+        # Con otro cliente conectado, lo que llega en vivo ya no se guarda
+        time.sleep(3.0)
+        late = socket.create_connection(("127.0.0.1", port))
+        try:
+            assert wait_for(lambda: len(backlog_sizes(lines)) == 2, 5.0), "".join(lines)
+        finally:
+            late.close()
+            done.wait(10)
+            live.close()
+    first, second = backlog_sizes(lines)
+    # Lo que quedaba más lo guardado mientras el primero lo recibía (~1 s), no los 3 s posteriores
+    assert second < first + 2 * rate